@@ -1,18 +1,27 @@
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Optional
 from langgraph.graph import StateGraph, START, END
-from nodes.image_generation_node import generate_and_place_images
+from nodes.image_generation_node import generate_and_place_images, maybe_start_warmup
 from nodes.merging_node import decide_images
 from nodes.merging_node import merge_content
 from nodes.Route_Node import Router_Node, route_next
-from nodes.Worker_node import worker_node
-from nodes.orches_node import orchestrator_node, fanout
+from nodes.Worker_node import worker_node, section_cache_node
+from nodes.orches_node import orchestrator_node, draft_planner_node, fanout
 from state.State import Blog_State
 from nodes.tavily_research import research_node
+from state.run_context import register_run_context
+from services.kv_cache import default_cache_dir
+from services.tracing import traced
 
 # build reducer subgraph
 reducer_graph=StateGraph(Blog_State)
-reducer_graph.add_node("merge_content", merge_content)
-reducer_graph.add_node("decide_images", decide_images)
-reducer_graph.add_node("generate_and_place_images", generate_and_place_images)
+# Every node is wrapped in a tracing span (timings, queue wait, tokens, cache hits)
+reducer_graph.add_node("merge_content", traced("merge_content", merge_content))
+reducer_graph.add_node("decide_images", traced("decide_images", decide_images))
+reducer_graph.add_node("generate_and_place_images", traced("generate_and_place_images", generate_and_place_images))
 
 reducer_graph.add_edge(START, "merge_content")
 reducer_graph.add_edge("merge_content", "decide_images")
@@ -22,24 +31,82 @@ reducer_subgraph=reducer_graph.compile()
 
 #--------------  BUILD MAIN GRAPH
 
+# Upper bound on graph tasks running at once (mostly the per-section workers
+# dispatched by fanout). Override with BLOG_MAX_CONCURRENCY.
+MAX_CONCURRENCY=int(os.getenv("BLOG_MAX_CONCURRENCY", "8"))
+
 g=StateGraph(Blog_State)
-g.add_node("router", Router_Node)
-g.add_node("research", research_node)
-g.add_node("orchestrator", orchestrator_node)
-g.add_node("worker", worker_node)
+g.add_node("router", traced("router", Router_Node))
+g.add_node("research", traced("research", research_node))
+g.add_node("draft_planner", traced("draft_planner", draft_planner_node))
+g.add_node("orchestrator", traced("orchestrator", orchestrator_node))
+g.add_node("section_cache", traced("section_cache", section_cache_node))
+g.add_node("worker", traced("worker", worker_node))
 g.add_node("reducer", reducer_subgraph)
 
 # Add edges
 g.add_edge(START, "router")
-g.add_conditional_edges("router", route_next)
+g.add_conditional_edges("router", route_next, ["research", "draft_planner", "orchestrator"])
 g.add_edge("research", "orchestrator")
-# Use fanout for parallel worker execution
-# The fanout function returns Send objects which LangGraph handles automatically
-# We need to add an edge that triggers fanout - using add_edge with fanout
-g.add_edge("orchestrator", "worker")
+# Speculative planning (hybrid mode): draft_planner runs alongside research
+# and the orchestrator only reconciles its draft with the evidence
+g.add_edge("draft_planner", "orchestrator")
+# section_cache puts sections whose task fingerprint is unchanged since an
+# earlier run straight into `sections`. fanout returns one Send per remaining
+# task, so every section is written by its own worker in the same superstep;
+# their outputs are collected in `sections` through the operator.add reducer.
+# With nothing left to write it goes straight to the reducer.
+g.add_edge("orchestrator", "section_cache")
+g.add_conditional_edges("section_cache", fanout, ["worker", "reducer"])
 # After all workers complete, go to reducer
 g.add_edge("worker", "reducer")
 g.add_edge("reducer", END)
 
+# State is checkpointed to SQLite after every step (each finished worker's
+# section included), so a failed run can be resumed by thread_id.
+CHECKPOINTS_ENABLED=os.getenv("BLOG_CHECKPOINTS", "1") != "0"
+CHECKPOINT_PATH=os.getenv("BLOG_CHECKPOINT_PATH", os.path.join(default_cache_dir(), "checkpoints.sqlite"))
+
+# Our pydantic types stored in checkpoints (state values and worker Sends)
+CHECKPOINT_TYPES=[
+    ("Schemas.plan_schema", "Plan"),
+    ("Schemas.task_schema", "Task"),
+    ("Schemas.evidence_schema", "EvidenceItem"),
+]
+
+def make_checkpointer(path: str=CHECKPOINT_PATH):
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn=sqlite3.connect(path, check_same_thread=False)
+    return SqliteSaver(conn, serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES))
+
+checkpointer=make_checkpointer() if CHECKPOINTS_ENABLED else None
+
 # Compile the graph
-app = g.compile()
+app = g.compile(checkpointer=checkpointer).with_config({"max_concurrency": MAX_CONCURRENCY})
+
+def new_run_config(thread_id: Optional[str]=None, recursion_limit: int=50)-> dict:
+    """Config for a fresh run; keep the thread_id to resume it later."""
+    return {
+        "configurable": {"thread_id": thread_id or uuid.uuid4().hex},
+        "recursion_limit": recursion_limit,
+    }
+
+def prepare_resume(thread_id: str, graph=None, recursion_limit: int=50)-> dict:
+    """
+    Config for resuming `thread_id` from its last completed step; stream it
+    with input None. Pending workers only carry a run-context key, so the
+    context is re-registered from the checkpointed plan and evidence.
+    """
+    graph=graph or app
+    config=new_run_config(thread_id, recursion_limit)
+    snapshot=graph.get_state(config)
+    if not snapshot.values:
+        raise ValueError(f"No checkpoint found for thread_id {thread_id}")
+    if snapshot.values.get("plan") is not None:
+        register_run_context(snapshot.values)
+    return config
+
+# Optionally start loading Stable Diffusion in the background (BLOG_SD_WARMUP=1)
+maybe_start_warmup()
@@ -0,0 +1,9 @@
+from datetime import date
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional
+
+class RunRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    topic: str = Field(..., min_length=1, max_length=500)
+    as_of: Optional[date] = Field(default=None, description="Reference date for 'latest' queries (default: today)")
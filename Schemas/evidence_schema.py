@@ -10,4 +10,6 @@ class EvidenceItem(BaseModel):
 
 class EvidencePack(BaseModel):
     evidence: List[EvidenceItem] = Field(default_factory=list)
-    
+
+class EvidenceRanking(BaseModel):
+    order: List[int] = Field(default_factory=list, description="Indices of the relevant items, most useful first")
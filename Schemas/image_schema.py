@@ -9,9 +9,10 @@ class ImageSpec(BaseModel):
     prompt: str = Field(..., description="Prompt send to the image model")
     size: Literal["1024*1024", "1024*1536", "1536*1024"]="1024*1024"
     quality: Literal["low", "medium","high"]="medium"
+    section: str = Field("", description="Section id from the outline (e.g. S3) the image belongs to")
+    after_paragraph: int = Field(0, description="Insert after this paragraph of the section (0 = right after its heading)")
 
 class GlobalImagePlan(BaseModel):
-    md_with_placeholders: str
     images: List[ImageSpec]= Field(default_factory=list)
 
 
@@ -9,3 +9,10 @@ class Plan(BaseModel):
     blog_kind: Literal["Explainer","Tutorial","news_roundup","Comparison","System_Design"]="Explainer" 
     constraints: List[str] = Field(default_factory=list)
     tasks: List[Task]
+
+class PlanPatch(BaseModel):
+    accept: bool = Field(..., description="True if the draft plan holds up against the evidence as is")
+    tasks: List[Task] = Field(
+        default_factory=list,
+        description="Replacements for draft tasks that need fresh facts, keeping their ids",
+    )
@@ -0,0 +1,200 @@
+"""
+HTTP API for blog generation (needs fastapi and uvicorn).
+Run from project root:
+    python api_server.py                      # or: uvicorn api_server:api --port 8000
+
+    POST /runs                         {"topic": "...", "as_of": "YYYY-MM-DD"} -> 202 with the new run
+    GET  /runs                         runs of this process, newest first
+    GET  /runs/{id}                    status and progress; the saved post once done, with late images
+                                       filled in as they finish (pending_images) (?sections=true for partial text)
+    GET  /runs/{id}/events             Server-Sent Events: status, node, section_chunk and section_done
+    POST /runs/{id}/cancel             stop a queued or running run
+    POST /runs/{id}/resume             continue a failed, cancelled or interrupted run from its checkpoint
+    GET  /runs/{id}/artifacts          the run's manifest
+    GET  /runs/{id}/artifacts/{path}   download one artifact (images, the post)
+    GET  /health
+
+Runs execute on the job manager's bounded pool (BLOG_MAX_JOBS); once
+BLOG_API_MAX_QUEUED runs are waiting for a slot, POST /runs answers 429.
+An event stream picks up after the Last-Event-ID header when a client
+reconnects.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+
+from Schemas.api_schema import RunRequest
+from services.job_manager import JobManager, get_job_manager
+from services.run_output import MANIFEST_NAME, load_manifest, read_post, run_output_dir
+
+load_dotenv()
+
+MAX_QUEUED = int(os.getenv("BLOG_API_MAX_QUEUED", "100"))
+# How often an event stream checks its run for new events, and how long it may stay silent
+SSE_POLL_SECONDS = float(os.getenv("BLOG_API_SSE_POLL_SECONDS", "0.2"))
+SSE_KEEPALIVE_SECONDS = 15.0
+
+MEDIA_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+               ".md": "text/markdown; charset=utf-8", ".json": "application/json"}
+_RUN_ID = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def create_app(manager: Optional[JobManager] = None, warm: bool = True) -> FastAPI:
+    """The API over `manager` (default: the process-wide job manager)."""
+
+    def jobs() -> JobManager:
+        return manager or get_job_manager()
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        if warm:
+            from services.warmup import warm_up
+            await run_in_threadpool(warm_up)
+        yield
+        # Stop runs at their next chunk so the checkpoint is a clean point to resume from
+        for job in jobs().list():
+            jobs().cancel(job.id)
+
+    api = FastAPI(title="Blog Writing Agent", lifespan=lifespan)
+
+    def job_or_404(run_id: str):
+        job = jobs().get(run_id)
+        if job is None:
+            raise HTTPException(404, f"Unknown run {run_id} (runs of an earlier process can be resumed)")
+        return job
+
+    def view(job, sections: bool = False, markdown: bool = True) -> dict:
+        out = job.snapshot(include_text=sections)
+        if markdown and out["status"] == "done":
+            # The saved post gets late images filled in; `final` keeps their placeholders
+            saved = read_post(job.output_dir) if job.output_dir else None
+            out["markdown"], out["pending_images"] = saved or (job.final, 0)
+        return out
+
+    def run_dir(run_id: str) -> Path:
+        job = jobs().get(run_id)
+        if job is not None and job.output_dir:
+            path = Path(job.output_dir)
+        elif _RUN_ID.match(run_id):
+            # Finished runs of an earlier process are still on disk
+            path = run_output_dir(run_id)
+        else:
+            raise HTTPException(404, f"Unknown run {run_id}")
+        if not (path / MANIFEST_NAME).exists():
+            raise HTTPException(404, f"No output for run {run_id}")
+        return path
+
+    @api.post("/runs", status_code=202)
+    async def create_run(body: RunRequest):
+        if jobs().stats()["queued"] >= MAX_QUEUED:
+            raise HTTPException(429, f"{MAX_QUEUED} runs already waiting; retry later")
+        as_of = body.as_of.isoformat() if body.as_of else None
+        job = await run_in_threadpool(jobs().submit, body.topic, as_of)
+        return view(job)
+
+    @api.get("/runs")
+    async def list_runs(limit: int = 50):
+        return {"stats": jobs().stats(), "runs": [view(job, markdown=False) for job in jobs().list()[:limit]]}
+
+    @api.get("/runs/{run_id}")
+    async def get_run(run_id: str, sections: bool = False):
+        return view(job_or_404(run_id), sections=sections)
+
+    @api.post("/runs/{run_id}/cancel")
+    async def cancel_run(run_id: str):
+        job = job_or_404(run_id)
+        if not jobs().cancel(run_id):
+            raise HTTPException(409, f"Run {run_id} is already {job.status}")
+        return view(job)
+
+    @api.post("/runs/{run_id}/resume", status_code=202)
+    async def resume_run(run_id: str):
+        current = jobs().get(run_id)
+        if current is not None and not current.done():
+            raise HTTPException(409, f"Run {run_id} is still {current.status}")
+        try:
+            job = await run_in_threadpool(jobs().resume, run_id)
+        except ValueError as e:
+            raise HTTPException(404, str(e))
+        return view(job)
+
+    @api.get("/runs/{run_id}/events")
+    async def run_events(run_id: str, request: Request):
+        job = job_or_404(run_id)
+        try:
+            after = int(request.headers.get("last-event-id", "0"))
+        except ValueError:
+            after = 0
+
+        async def stream():
+            seq, idle = after, 0.0
+            while True:
+                # Read done before the events: a finished run's last status event is then included
+                done = job.done()
+                events = job.events_since(seq)
+                for event in events:
+                    yield _sse(event)
+                if events:
+                    seq, idle = events[-1]["seq"], 0.0
+                if done:
+                    return
+                if not events:
+                    if await request.is_disconnected():
+                        return
+                    await asyncio.sleep(SSE_POLL_SECONDS)
+                    idle += SSE_POLL_SECONDS
+                    if idle >= SSE_KEEPALIVE_SECONDS:
+                        idle = 0.0
+                        yield ": keep-alive\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @api.get("/runs/{run_id}/artifacts")
+    async def list_artifacts(run_id: str):
+        return load_manifest(run_dir(run_id))
+
+    @api.get("/runs/{run_id}/artifacts/{path:path}")
+    async def get_artifact(run_id: str, path: str):
+        directory = run_dir(run_id)
+        # Only files the run recorded in its manifest are served
+        listed = any(a["path"] == path for a in load_manifest(directory).get("artifacts", []))
+        file = directory / path
+        if not listed or not file.is_file():
+            raise HTTPException(404, f"No artifact {path} in run {run_id}")
+        return FileResponse(file, media_type=MEDIA_TYPES.get(file.suffix.lower(), "application/octet-stream"))
+
+    @api.get("/health")
+    async def get_health():
+        from services.warmup import health
+        components = await run_in_threadpool(health)
+        ok = components["graph"]["ok"] and components["llm"]["ok"]
+        return JSONResponse({"ok": ok, "components": components, "jobs": jobs().stats()},
+                            status_code=200 if ok else 503)
+
+    return api
+
+
+api = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(api, host=os.getenv("BLOG_API_HOST", "127.0.0.1"), port=int(os.getenv("BLOG_API_PORT", "8000")))
@@ -6,7 +6,6 @@ import streamlit as st
 import sys
 import os
 from datetime import date, datetime
-from pathlib import Path
 import traceback
 import time
 from dotenv import load_dotenv
@@ -28,6 +27,40 @@ def get_env_var(key: str) -> str:
         value = value.strip().strip("'").strip('"')
     return value
 
+# Seconds between refreshes while this session's job is running
+POLL_SECONDS = float(os.getenv("BLOG_UI_POLL_SECONDS", "1.0"))
+
+# Process-wide resources. Streamlit re-executes this script on every
+# interaction and per browser session; st.cache_resource builds these once
+# per server process and shares them, so only the first visitor pays for
+# the warm-up.
+@st.cache_resource(show_spinner="Warming up the blog pipeline...")
+def load_runtime() -> dict:
+    """Compiled graph (with its checkpointer), LLM client and caches."""
+    from services.warmup import warm_up
+    timings = warm_up()
+    from Graph.graph import app, new_run_config, prepare_resume
+    return {"app": app, "new_run_config": new_run_config, "prepare_resume": prepare_resume,
+            "warmup_s": timings}
+
+@st.cache_resource(show_spinner=False)
+def load_job_manager():
+    """Background runs shared by every session of this server (BLOG_MAX_JOBS at a time)."""
+    load_runtime()
+    from services.job_manager import get_job_manager
+    return get_job_manager()
+
+@st.cache_resource(show_spinner=False)
+def load_image_pipeline():
+    """Start loading Stable Diffusion in the background (once per process)."""
+    from nodes.image_generation_node import start_warmup
+    return start_warmup()
+
+@st.cache_data(ttl=15, show_spinner=False)
+def cached_health() -> dict:
+    from services.warmup import health
+    return health()
+
 # Page config
 st.set_page_config(
     page_title="AI Blog Writer",
@@ -142,10 +175,12 @@ if 'generation_status' not in st.session_state:
     st.session_state.generation_status = None
 if 'error_message' not in st.session_state:
     st.session_state.error_message = None
-if 'progress' not in st.session_state:
-    st.session_state.progress = 0
-if 'current_step' not in st.session_state:
-    st.session_state.current_step = ""
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'thread_id' not in st.session_state:
+    st.session_state.thread_id = None
+if 'output_dir' not in st.session_state:
+    st.session_state.output_dir = None
 
 def display_status_card(status_type, title, message):
     """Display a styled status card"""
@@ -162,12 +197,75 @@ def display_status_card(status_type, title, message):
     </div>
     """, unsafe_allow_html=True)
 
-def update_progress(step, progress_value):
-    """Update progress bar and current step"""
-    st.session_state.current_step = step
-    st.session_state.progress = progress_value
+# Rough progress per finished node; sections fill the writing stretch
+NODE_PROGRESS = {"router": 0.15, "draft_planner": 0.30, "research": 0.35, "orchestrator": 0.50,
+                 "section_cache": 0.50, "worker": 0.70, "reducer": 0.95}
+
+def follow(job):
+    """Point this session at a job; follow_job() renders it until it settles."""
+    st.session_state.job_id = job.id
+    st.session_state.thread_id = job.id
+    st.session_state.output_dir = job.output_dir or None
+    st.session_state.blog_generated = False
+    st.session_state.blog_content = None
+    st.session_state.error_message = None
+    st.session_state.generation_status = "running"
+
+def follow_job(job, show_debug=False):
+    """Render a queued or running job; once it settles, move its result into the session. True while it runs."""
+    snap = job.snapshot()
+    if snap["status"] in ("done", "error", "cancelled"):
+        if snap["status"] == "done" and job.final:
+            st.session_state.blog_content = job.final
+            st.session_state.blog_title = snap["title"] or snap["topic"]
+            st.session_state.blog_generated = True
+            st.session_state.generation_status = "success"
+        elif snap["status"] == "cancelled":
+            st.session_state.generation_status = "cancelled"
+        else:
+            error_msg = f"Error during blog generation: {snap['error'] or 'no content was produced'}"
+            if show_debug and job.traceback:
+                error_msg += f"\n\nTraceback:\n{job.traceback}"
+            st.session_state.error_message = error_msg
+            st.session_state.generation_status = "error"
+        return False
+
+    done, total = snap["sections_done"], snap["sections_total"]
+    progress = NODE_PROGRESS.get(snap["current_node"], 0.05)
+    if total:
+        progress = max(progress, 0.50 + 0.45 * done / total)
+    st.progress(progress)
+    status_col, cancel_col = st.columns([4, 1])
+    with status_col:
+        if snap["status"] == "queued":
+            st.info("🕒 Queued: waiting for a free slot on this server...")
+        else:
+            elapsed = time.time() - (snap["started_at"] or snap["created_at"])
+            step = f"last step: {snap['current_node']}" if snap["current_node"] else "starting"
+            sections = f", {done}/{total} sections" if total else ""
+            st.info(f"🔄 Generating ({step}{sections}, {elapsed:.0f}s) · thread ID `{job.id}`")
+    with cancel_col:
+        if st.button("🛑 Cancel", use_container_width=True, help="Stop this run; it can be resumed later"):
+            load_job_manager().cancel(job.id)
+
+    if snap["sections"]:
+        st.subheader("✍️ Live Preview")
+        for section in snap["sections"]:
+            if section["text"]:
+                st.markdown(section["text"] + ("" if section["done"] else " ▌"))
+    return True
 
 def main():
+    # Warm the shared graph/clients on first page load instead of on the first click
+    try:
+        runtime = load_runtime()
+    except ImportError as e:
+        runtime = None
+        st.error(f"❌ Import Error: {str(e)}")
+        st.info("💡 Make sure all dependencies are installed: `pip install -r requirements.txt`")
+    if os.getenv("BLOG_SD_WARMUP") == "1":
+        load_image_pipeline()
+
     # Header
     st.markdown("""
     <div class="main-header">
@@ -211,7 +309,78 @@ def main():
         with st.expander("🔧 Advanced Settings"):
             st.info("Default settings are optimized for best results")
             show_debug = st.checkbox("Show Debug Info", value=False)
-    
+
+        # Shared resources of this server process
+        with st.expander("🩺 System Health"):
+            if runtime:
+                st.caption("Warm-up: " + ", ".join(f"{k} {v:.1f}s" for k, v in runtime["warmup_s"].items()))
+            for component, status in cached_health().items():
+                label = component.replace("_", " ")
+                if status["ok"]:
+                    st.success(f"{label}: {status['detail']}")
+                else:
+                    st.warning(f"{label}: {status['detail']}")
+            if st.button("Load image model now", use_container_width=True,
+                         help="Start loading Stable Diffusion in the background so the first image is faster"):
+                load_image_pipeline()
+                cached_health.clear()
+
+        # Every run on this server, so a refreshed tab (or a teammate) can pick a job back up
+        if runtime:
+            with st.expander("🗂️ Jobs on this Server"):
+                manager = load_job_manager()
+                counts = manager.stats()
+                st.caption(f"{counts['running']} running, {counts['queued']} queued "
+                           f"({counts['max_jobs']} at a time)")
+                icons = {"queued": "🕒", "running": "🔄", "done": "✅", "error": "❌", "cancelled": "🛑"}
+                for listed in manager.list()[:10]:
+                    if st.button(f"{icons.get(listed.status, '')} {listed.topic or listed.id[:8]}",
+                                 key=f"job-{listed.id}", use_container_width=True,
+                                 help=f"{listed.status} · thread ID {listed.id}"):
+                        follow(listed)
+
+        # Resume an interrupted run from its last checkpoint
+        with st.expander("♻️ Resume a Run"):
+            if st.session_state.get("thread_id"):
+                st.caption(f"Last run thread ID: `{st.session_state.thread_id}`")
+            resume_thread_id = st.text_input(
+                "Thread ID",
+                value=st.session_state.get("thread_id") or "",
+                help="Continue a failed or interrupted run; finished sections are not rewritten"
+            )
+            resume_button = st.button("Resume Run", use_container_width=True)
+
+        # Where the last run's time and money went, per stage
+        if st.session_state.get("thread_id"):
+            from services.tracing import summarize_run
+            summary = summarize_run(st.session_state.thread_id)
+            if summary["stages"]:
+                with st.expander("📊 Last Run Trace", expanded=True):
+                    total = summary["total"]
+                    m1, m2 = st.columns(2)
+                    m1.metric("Wall time", f"{total['wall_s']:.1f}s")
+                    m2.metric("LLM cost", f"${total['llm_cost_usd']:.4f}")
+                    m1.metric("LLM calls", f"{int(total['llm_calls'])}",
+                              help=f"{int(total['llm_cache_hits'])} served from cache")
+                    m2.metric("Tokens", f"{int(total['llm_prompt_tokens'] + total['llm_completion_tokens']):,}")
+                    st.dataframe(
+                        [
+                            {
+                                "stage": name,
+                                "wall s": round(stage["wall_s"], 2),
+                                "queue s": round(stage.get("queue_wait_s", 0), 2),
+                                "LLM calls": int(stage.get("llm_calls", 0)),
+                                "tokens": int(stage.get("llm_prompt_tokens", 0) + stage.get("llm_completion_tokens", 0)),
+                                "cost $": round(stage.get("llm_cost_usd", 0), 4),
+                                "searches": int(stage.get("search_calls", 0)),
+                                "image s": round(stage.get("image_seconds", 0), 1),
+                            }
+                            for name, stage in summary["stages"].items()
+                        ],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+
     # Main content area
     col1, col2 = st.columns([2, 1])
     
@@ -234,9 +403,10 @@ def main():
             use_container_width=True
         )
     
-    # Generation process
-    if generate_button:
-        if not topic or not topic.strip():
+    # Runs execute in the background job manager; this script only submits and polls
+    resuming = resume_button and bool(resume_thread_id.strip())
+    if generate_button or resuming:
+        if not resuming and (not topic or not topic.strip()):
             st.error("❌ Please enter a blog topic")
             return
         
@@ -247,145 +417,46 @@ def main():
             st.info("💡 Make sure your .env file is in the project root and contains: OPENAI_API_KEY=your_key_here")
             return
         
-        # Initialize progress
-        progress_bar = st.progress(0)
-        status_placeholder = st.empty()
-        
         try:
-            # Import graph (with error handling)
-            try:
-                from Graph.graph import app
-                from state.State import Blog_State
-            except ImportError as e:
-                st.error(f"❌ Import Error: {str(e)}")
-                st.info("💡 Make sure all dependencies are installed: `pip install -r requirements.txt`")
-                return
-            
-            # Initialize state
-            initial_state: Blog_State = {
-                "topic": topic.strip(),
-                "mode": "",
-                "needs_research": False,
-                "queries": [],
-                "evidence": [],
-                "plan": None,
-                "as_of": as_of_date.isoformat(),
-                "recency_days": 3650,
-                "sections": [],
-                "merged_md": "",
-                "md_with_placeholders": "",
-                "image_specs": [],
-                "final": ""
-            }
-            
-            # Stream the graph execution
-            update_progress("Initializing...", 0.05)
-            status_placeholder.info("🔄 Initializing blog generation pipeline...")
-            progress_bar.progress(5)
-            
-            # Execute graph with streaming
-            final_state = None
-            step_count = 0
-            total_steps = 6  # router, research (optional), orchestrator, worker, reducer
-            
-            try:
-                # Stream through the graph
-                config = {"recursion_limit": 50}
-                
-                # Router step
-                update_progress("Routing...", 0.15)
-                status_placeholder.info("🔀 Analyzing topic and determining research needs...")
-                progress_bar.progress(15)
-                
-                # Collect all states from stream
-                all_states = []
-                for event in app.stream(initial_state, config=config, stream_mode="values"):
-                    step_count += 1
-                    current_state = event
-                    all_states.append(current_state)
-                    
-                    # Update progress based on state
-                    if "needs_research" in current_state and current_state.get("needs_research"):
-                        if "evidence" in current_state and current_state.get("evidence"):
-                            update_progress("Researching...", 0.35)
-                            status_placeholder.info(f"🔍 Researching topic: Found {len(current_state.get('evidence', []))} sources...")
-                            progress_bar.progress(35)
-                        else:
-                            update_progress("Researching...", 0.30)
-                            status_placeholder.info("🔍 Conducting web research...")
-                            progress_bar.progress(30)
-                    
-                    if "plan" in current_state and current_state.get("plan"):
-                        update_progress("Planning...", 0.50)
-                        plan = current_state["plan"]
-                        num_tasks = len(plan.tasks) if hasattr(plan, 'tasks') else 0
-                        status_placeholder.info(f"📋 Creating blog plan: {num_tasks} sections...")
-                        progress_bar.progress(50)
-                    
-                    if "sections" in current_state and current_state.get("sections"):
-                        sections = current_state.get("sections", [])
-                        plan = current_state.get("plan")
-                        num_tasks = len(plan.tasks) if plan and hasattr(plan, 'tasks') else len(sections)
-                        update_progress("Writing...", 0.70)
-                        status_placeholder.info(f"✍️ Writing blog sections: {len(sections)}/{num_tasks} completed...")
-                        progress_bar.progress(70)
-                    
-                    if "final" in current_state and current_state.get("final"):
-                        update_progress("Finalizing...", 0.95)
-                        status_placeholder.success("✨ Blog generation complete!")
-                        progress_bar.progress(95)
-                        final_state = current_state
-                        break
-                
-                # If no final state found, use the last state
-                if not final_state and all_states:
-                    final_state = all_states[-1]
-                
-                # Finalize
-                if not final_state or not final_state.get("final"):
-                    # Try to get final state from last event
-                    final_state = current_state if 'current_state' in locals() else initial_state
-                
-                progress_bar.progress(100)
-                time.sleep(0.5)
-                
-                # Extract results
-                if final_state and final_state.get("final"):
-                    st.session_state.blog_content = final_state["final"]
-                    st.session_state.blog_title = final_state.get("plan").blog_title if final_state.get("plan") else topic
-                    st.session_state.blog_generated = True
-                    st.session_state.generation_status = "success"
-                    st.rerun()
-                else:
-                    # Fallback: use merged_md if final is not available
-                    if final_state and final_state.get("merged_md"):
-                        st.session_state.blog_content = final_state["merged_md"]
-                        st.session_state.blog_title = final_state.get("plan").blog_title if final_state.get("plan") else topic
-                        st.session_state.blog_generated = True
-                        st.session_state.generation_status = "success"
-                        st.rerun()
-                    else:
-                        raise Exception("Blog generation completed but no content was produced")
-                        
-            except Exception as e:
-                error_msg = str(e)
-                st.session_state.error_message = error_msg
-                st.session_state.generation_status = "error"
-                raise
-        
+            manager = load_job_manager()
+            if resuming:
+                job = manager.resume(resume_thread_id.strip())
+            else:
+                job = manager.submit(topic.strip(), as_of_date.isoformat())
+        except ImportError as e:
+            st.error(f"❌ Import Error: {str(e)}")
+            st.info("💡 Make sure all dependencies are installed: `pip install -r requirements.txt`")
+            return
         except Exception as e:
-            error_msg = f"Error during blog generation: {str(e)}"
+            error_msg = f"Could not start blog generation: {str(e)}"
             if show_debug:
                 error_msg += f"\n\nTraceback:\n{traceback.format_exc()}"
-            
             st.session_state.error_message = error_msg
             st.session_state.generation_status = "error"
             display_status_card("error", "Generation Failed", error_msg)
-            
-            if show_debug:
-                with st.expander("🔍 Debug Information"):
-                    st.code(traceback.format_exc())
+            return
+        follow(job)
+    
+    # This session's job: progress and sections so far, re-rendered on every poll
+    polling = False
+    if st.session_state.job_id and st.session_state.generation_status == "running":
+        job = load_job_manager().get(st.session_state.job_id)
+        if job is None:
+            st.session_state.generation_status = None
+        else:
+            polling = follow_job(job, show_debug)
     
+    # Images that finish after the run are filled into the saved post, so show that copy
+    pending_images = 0
+    if st.session_state.blog_generated and st.session_state.output_dir:
+        from services.run_output import read_post
+        saved = read_post(st.session_state.output_dir)
+        if saved:
+            st.session_state.blog_content, pending_images = saved
+            # Keep polling until the last placeholder is replaced (only this process fills them)
+            polling = polling or (pending_images > 0 and st.session_state.job_id is not None
+                                  and load_job_manager().get(st.session_state.job_id) is not None)
+
     # Display results
     if st.session_state.blog_generated and st.session_state.blog_content:
         st.divider()
@@ -408,12 +479,14 @@ def main():
         
         # Blog content
         st.markdown("---")
+        if pending_images:
+            st.caption(f"⏳ {pending_images} image(s) still generating; they appear here when ready")
         st.markdown(st.session_state.blog_content)
         
-        # Check for images
-        images_dir = Path("images")
-        if images_dir.exists():
-            image_files = list(images_dir.glob("*.png")) + list(images_dir.glob("*.jpg"))
+        # Images of this run only, as listed in its output manifest
+        if st.session_state.output_dir:
+            from services.run_output import artifacts
+            image_files = artifacts(st.session_state.output_dir, "image")
             if image_files:
                 st.divider()
                 st.subheader("🖼️ Generated Images")
@@ -423,6 +496,9 @@ def main():
     # Error display
     if st.session_state.generation_status == "error" and st.session_state.error_message:
         display_status_card("error", "Error", st.session_state.error_message)
+    if st.session_state.generation_status == "cancelled":
+        display_status_card("warning", "Run Cancelled",
+                            f"Completed steps are saved; resume with thread ID {st.session_state.thread_id}")
     
     # Footer
     st.divider()
@@ -433,5 +509,10 @@ def main():
     </div>
     """, unsafe_allow_html=True)
 
+    # Poll the running job or its late images; any click in the meantime reruns the script straight away
+    if polling:
+        time.sleep(POLL_SECONDS)
+        st.rerun()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,223 @@
+"""
+Headless batch runner: generate many blog posts from a JSONL topics file.
+Run from project root:
+    python batch_run.py topics.jsonl --out batch_output --runs 4
+
+Each line of the topics file is {"topic": "...", "as_of": "YYYY-MM-DD"}
+("as_of" optional) or a bare JSON string. Every run writes its post and
+images to its own directory, listed in that directory's manifest.json, and
+one JSON line per run is appended to the batch manifest (default:
+<out>/manifest.jsonl) as soon as that run settles, so it can be tailed
+while the batch is going.
+
+All runs share one process, so the LLM rate limiter (BLOG_OPENAI_RPM,
+BLOG_OPENAI_TPM, BLOG_LLM_CONCURRENCY), the Tavily pool and rate limiter
+(BLOG_SEARCH_CONCURRENCY, BLOG_SEARCH_RATE_PER_SEC) and the image
+service are global across runs rather than per run.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+from state.State import initial_state
+from services.job_manager import JobCancelled, clear_stop, request_stop, stop_requested
+from services.run_output import artifacts, init_manifest
+
+
+def read_topics(path: str) -> List[dict]:
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"topic": item}
+            if not str(item.get("topic", "")).strip():
+                raise ValueError(f"{path}:{line_no}: missing 'topic'")
+            jobs.append(item)
+    return jobs
+
+
+def run_dir_name(index: int, topic: str) -> str:
+    from nodes.image_generation_node import _safe_slug
+    return f"{index:04d}_{_safe_slug(topic)[:60]}"
+
+
+def run_one(graph, job: dict, out_dir: Path, config: dict) -> dict:
+    """Stream one run to completion and return its manifest record."""
+    record = {
+        "topic": job["topic"],
+        "thread_id": config["configurable"]["thread_id"],
+        "output_dir": str(out_dir),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    init_manifest(out_dir, record["thread_id"], topic=job["topic"])
+    state = initial_state(job["topic"], job.get("as_of") or date.today().isoformat(), str(out_dir))
+    node_finished = {}
+    start = time.perf_counter()
+    try:
+        final = ""
+        for update in graph.stream(state, config=config, stream_mode="updates"):
+            if stop_requested(record["thread_id"]):
+                raise JobCancelled(f"run {record['thread_id']} cancelled")
+            for node, values in update.items():
+                # Parallel nodes (workers) report when the last one finished
+                node_finished[node] = round(time.perf_counter() - start, 3)
+                if isinstance(values, dict) and values.get("final"):
+                    final = values["final"]
+        record.update(status="ok", chars=len(final))
+        md_files = artifacts(out_dir, "markdown")
+        if md_files:
+            record["md_path"] = str(md_files[0])
+    except JobCancelled:
+        record.update(status="cancelled")
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    record["node_finished_s"] = node_finished
+    from services.tracing import summarize_run
+    total = summarize_run(record["thread_id"])["total"]
+    if total:
+        record["trace"] = {k: round(v, 6) for k, v in total.items()}
+    return record
+
+
+class _RunSlot:
+    """One run's claim on a batch slot; the first of (finish, timeout) to settle it wins."""
+
+    def __init__(self, on_settle: Callable[[dict], None]):
+        self._on_settle = on_settle
+        self._settled = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+    def settle(self, record: dict) -> bool:
+        if not self._settled.acquire(blocking=False):
+            return False
+        if self.timer is not None:
+            self.timer.cancel()
+        self._on_settle(record)
+        return True
+
+
+def run_batch(jobs: List[dict], out_root: str, runs: int = 4, run_timeout: Optional[float] = None,
+              manifest_path: Optional[str] = None, graph=None, new_config: Optional[Callable[[], dict]] = None) -> List[dict]:
+    """
+    Run every job with at most `runs` graphs in flight. A run that exceeds
+    `run_timeout` is recorded as "timeout", asked to stop (workers at their
+    next chunk, the run at its next node) and its slot handed to the next
+    topic. Completed steps stay checkpointed, so it can be resumed.
+    """
+    if graph is None or new_config is None:
+        from Graph.graph import app, new_run_config
+        graph = graph or app
+        new_config = new_config or new_run_config
+    out = Path(out_root)
+    out.mkdir(parents=True, exist_ok=True)
+    manifest = Path(manifest_path) if manifest_path else out / "manifest.jsonl"
+    write_lock = threading.Lock()
+    free_slots = threading.Semaphore(max(1, runs))
+    all_settled = threading.Event()
+    results: List[dict] = []
+    if not jobs:
+        return results
+
+    def on_settle(record: dict):
+        with write_lock:
+            with open(manifest, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results.append(record)
+            print(f"[batch] {record['status']:<7} {record['seconds']:8.1f}s  {record['topic']}  "
+                  f"({len(results)}/{len(jobs)})")
+            if len(results) == len(jobs):
+                all_settled.set()
+        free_slots.release()
+
+    def work(slot: _RunSlot, index: int, job: dict, run_path: Path, config: dict):
+        record = run_one(graph, job, run_path, config)
+        record["index"] = index
+        if not slot.settle(record):
+            clear_stop(config["configurable"]["thread_id"])
+            print(f"[batch] late finish ({record['status']}) after timeout: {job['topic']}")
+
+    def expire(slot: _RunSlot, index: int, job: dict, run_path: Path, config: dict, begun: float):
+        if slot.settle({
+            "index": index, "topic": job["topic"], "thread_id": config["configurable"]["thread_id"],
+            "output_dir": str(run_path), "status": "timeout",
+            "seconds": round(time.perf_counter() - begun, 3),
+        }):
+            # Stop it so it does not keep spending the shared LLM and search budgets next to its replacement
+            request_stop(config["configurable"]["thread_id"])
+
+    for index, job in enumerate(jobs, 1):
+        free_slots.acquire()
+        run_path = out / run_dir_name(index, job["topic"])
+        config = new_config()
+        slot = _RunSlot(on_settle)
+        if run_timeout:
+            slot.timer = threading.Timer(run_timeout, expire, (slot, index, job, run_path, config, time.perf_counter()))
+            slot.timer.daemon = True
+            slot.timer.start()
+        threading.Thread(target=work, args=(slot, index, job, run_path, config), name=f"blog-run-{index}", daemon=True).start()
+
+    all_settled.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate many blog posts from a JSONL topics file.")
+    parser.add_argument("topics", help="JSONL file, one topic per line")
+    parser.add_argument("--out", default="batch_output", help="Root directory for per-run outputs")
+    parser.add_argument("--manifest", help="Results manifest path (default: <out>/manifest.jsonl)")
+    parser.add_argument("--runs", type=int, default=4, help="Graphs in flight at once")
+    parser.add_argument("--run-timeout", type=float, help="Seconds before a run is recorded as timed out")
+    parser.add_argument("--openai-rpm", type=float, help="OpenAI requests/min limit (BLOG_OPENAI_RPM)")
+    parser.add_argument("--openai-tpm", type=float, help="OpenAI tokens/min limit (BLOG_OPENAI_TPM)")
+    parser.add_argument("--llm-concurrency", type=int, help="Global LLM calls in flight (BLOG_LLM_CONCURRENCY)")
+    parser.add_argument("--search-concurrency", type=int, help="Global Tavily searches in flight (BLOG_SEARCH_CONCURRENCY)")
+    parser.add_argument("--search-rate", type=float, help="Global Tavily searches per second (BLOG_SEARCH_RATE_PER_SEC)")
+    parser.add_argument("--image-drain-seconds", type=float, default=600,
+                        help="How long to wait for late images after the last run")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Budgets are read at import time, so set them before the graph is imported
+    for flag, env in (("openai_rpm", "BLOG_OPENAI_RPM"),
+                      ("openai_tpm", "BLOG_OPENAI_TPM"),
+                      ("llm_concurrency", "BLOG_LLM_CONCURRENCY"),
+                      ("search_concurrency", "BLOG_SEARCH_CONCURRENCY"),
+                      ("search_rate", "BLOG_SEARCH_RATE_PER_SEC")):
+        value = getattr(args, flag)
+        if value is not None:
+            os.environ[env] = str(value)
+
+    jobs = read_topics(args.topics)
+    print(f"[batch] {len(jobs)} topic(s), {args.runs} run(s) at once -> {args.out}")
+    start = time.perf_counter()
+    results = run_batch(jobs, args.out, runs=args.runs, run_timeout=args.run_timeout, manifest_path=args.manifest)
+
+    from nodes.image_generation_node import _service
+    if not _service.drain(args.image_drain_seconds):
+        print("[batch] some late images were still generating at exit")
+    from services.llm_gateway import concurrency_stats
+    print(f"[batch] LLM limiter: {concurrency_stats()}")
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    print(f"[batch] done in {time.perf_counter() - start:.1f}s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
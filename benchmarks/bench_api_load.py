@@ -0,0 +1,193 @@
+"""
+Load test: the HTTP API (api_server.py) under concurrent clients.
+By default the API runs in-process on the offline fakes (benchmarks/fakes.py)
+and is driven through httpx's ASGI transport, so no server, network or API
+keys are involved; --url targets a running server instead (with whatever
+backends it uses). Each of `--clients` concurrent clients creates runs,
+polls them (or follows their event stream with --sse) until they settle,
+and fetches the post and one image. Reports requests/s, runs/s and
+p50/p95 latency per endpoint and per run.
+
+Run from project root:
+    python -m benchmarks.bench_api_load --runs 40 --clients 8
+    python -m benchmarks.bench_api_load --url http://127.0.0.1:8000 --runs 10 --clients 2
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.bench_end_to_end import add_scenario_args, install_fakes, percentile
+
+FINISHED = ("done", "error", "cancelled")
+
+
+class _Recorder:
+    """Latencies per endpoint, plus per-run outcomes."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.runs: List[float] = []
+        self.outcomes: Dict[str, int] = {}
+
+    def outcome(self, name: str):
+        self.outcomes[name] = self.outcomes.get(name, 0) + 1
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        resp = await client.request(method, url, **kwargs)
+        self.latencies.setdefault(name, []).append(time.perf_counter() - start)
+        return resp
+
+
+async def _one_run(client: httpx.AsyncClient, rec: _Recorder, i: int, args):
+    start = time.perf_counter()
+    resp = await rec.request(client, "POST /runs", "POST", "/runs",
+                             json={"topic": f"load test topic {i}", "as_of": "2026-01-01"})
+    if resp.status_code == 429:
+        rec.outcome("rejected")
+        return
+    resp.raise_for_status()
+    run_id = resp.json()["id"]
+
+    if args.sse:
+        # One long request; its duration is the run's, so it is not counted as request latency
+        async with client.stream("GET", f"/runs/{run_id}/events") as stream:
+            async for _ in stream.aiter_lines():
+                pass
+        run = (await rec.request(client, "GET /runs/{id}", "GET", f"/runs/{run_id}")).json()
+    else:
+        while True:
+            run = (await rec.request(client, "GET /runs/{id}", "GET", f"/runs/{run_id}")).json()
+            if run["status"] in FINISHED:
+                break
+            await asyncio.sleep(args.poll_seconds)
+    rec.runs.append(time.perf_counter() - start)
+    rec.outcome(run["status"])
+    if run["status"] != "done":
+        return
+
+    manifest = (await rec.request(client, "GET /runs/{id}/artifacts", "GET", f"/runs/{run_id}/artifacts")).json()
+    images = [a["path"] for a in manifest["artifacts"] if a["kind"] == "image"]
+    if images:
+        resp = await rec.request(client, "GET /runs/{id}/artifacts/{path}", "GET",
+                                 f"/runs/{run_id}/artifacts/{images[0]}")
+        resp.raise_for_status()
+
+
+async def drive(client: httpx.AsyncClient, runs: int, clients: int, args) -> dict:
+    rec = _Recorder()
+    slots = asyncio.Semaphore(clients)
+
+    async def limited(i):
+        async with slots:
+            await _one_run(client, rec, i, args)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(i) for i in range(runs)))
+    wall = time.perf_counter() - start
+    requests = sum(len(v) for v in rec.latencies.values())
+    return {
+        "runs": runs,
+        "clients": clients,
+        "wall_s": round(wall, 3),
+        "requests": requests,
+        "requests_per_s": round(requests / wall, 1),
+        "runs_per_s": round(len(rec.runs) / wall, 3),
+        "outcomes": rec.outcomes,
+        "run_p50_s": round(percentile(rec.runs, 50), 3),
+        "run_p95_s": round(percentile(rec.runs, 95), 3),
+        "endpoints": {
+            name: {"count": len(v), "p50_ms": round(percentile(v, 50) * 1000, 2),
+                   "p95_ms": round(percentile(v, 95) * 1000, 2)}
+            for name, v in rec.latencies.items()
+        },
+    }
+
+
+def run_local(args) -> dict:
+    """Serve the API in-process on the fake backends and drive it through the ASGI transport."""
+    from Graph.graph import g, make_checkpointer
+    from api_server import create_app
+    from services import tracing
+    from services.job_manager import JobManager
+
+    restore = install_fakes(args)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with tempfile.TemporaryDirectory(prefix="blog_api_load_") as tmp, quiet:
+            tracing.configure_tracing(tracing.TRACE_MODE, os.path.join(tmp, "traces.jsonl"))
+            saver = make_checkpointer(os.path.join(tmp, "checkpoints.sqlite"))
+            manager = JobManager(max_jobs=args.jobs, graph=g.compile(checkpointer=saver), output_root=tmp)
+            api = create_app(manager, warm=False)
+
+            async def main():
+                transport = httpx.ASGITransport(app=api)
+                async with httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None) as client:
+                    # Warm-up run so first-call setup is not billed to the measurement
+                    await drive(client, 1, 1, args)
+                    return await drive(client, args.runs, args.clients, args)
+
+            try:
+                report = asyncio.run(main())
+            finally:
+                manager.shutdown()
+                saver.conn.close()
+    finally:
+        restore()
+        tracing.configure_tracing(tracing.TRACE_MODE)
+    report["max_jobs"] = args.jobs
+    return report
+
+
+def run_remote(args) -> dict:
+    async def main():
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            return await drive(client, args.runs, args.clients, args)
+
+    return asyncio.run(main())
+
+
+def print_report(report: dict):
+    outcomes = ", ".join(f"{n} {k}" for k, n in sorted(report["outcomes"].items()))
+    print(f"{report['runs']} runs from {report['clients']} clients in {report['wall_s']:.2f}s ({outcomes})")
+    print(f"  {report['requests']} requests -> {report['requests_per_s']:.1f} requests/s, "
+          f"{report['runs_per_s']:.2f} runs/s")
+    print(f"  run latency (POST to settled): p50 {report['run_p50_s']:.2f}s  p95 {report['run_p95_s']:.2f}s")
+    print(f"  {'endpoint':<34} {'count':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, e in report["endpoints"].items():
+        print(f"  {name:<34} {e['count']:>6} {e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="base URL of a running api_server (default: in-process on fakes)")
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--jobs", type=int, default=4, help="job pool size of the in-process server")
+    parser.add_argument("--poll-seconds", type=float, default=0.05, help="status poll interval per client")
+    parser.add_argument("--sse", action="store_true", help="follow each run's event stream instead of polling")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show node logs")
+    add_scenario_args(parser)
+    args = parser.parse_args()
+
+    report = run_remote(args) if args.url else run_local(args)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
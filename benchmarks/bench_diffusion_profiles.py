@@ -0,0 +1,58 @@
+"""
+Benchmark: seconds per image for each diffusion engine profile.
+Applies every torch profile (scheduler, precision, channels-last,
+torch.compile, thread count) to a tiny randomly initialised pipeline and
+reports time per image against the per-image wait budget used by
+generate_and_place_images. Export profiles (onnx/openvino) need optimum
+and a real model, so they are skipped here.
+
+Run from project root: python -m benchmarks.bench_diffusion_profiles
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nodes.image_generation_node as ign
+from benchmarks.fakes import tiny_sd_pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", default=["quality", "balanced", "fast", "lcm"])
+    parser.add_argument("--images", type=int, default=2)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--compile", action="store_true", help="also enable torch.compile")
+    args = parser.parse_args()
+
+    print(f"{args.images} images at {args.size}x{args.size} per profile (tiny pipeline, CPU); "
+          f"wait budget {ign.IMAGE_WAIT_SECONDS:g}s/image")
+    print(f"{'profile':>10} | {'steps':>5} | {'scheduler':>9} | {'dtype':>8} | {'s/image':>8} | fits budget")
+    for name in args.profiles:
+        profile = ign.PROFILES[name].model_copy(
+            update={"num_threads": args.threads, "compile": args.compile or ign.PROFILES[name].compile}
+        )
+        if profile.export != "none":
+            print(f"{name:>10} | skipped (export profile)")
+            continue
+        ign.set_engine_profile(profile)
+        # LoRA weights are for the real SD 1.5 UNet, not the tiny one
+        ign._pipeline = ign._apply_profile(tiny_sd_pipeline(), profile, load_lora=False)
+        service = ign.ImageGenerationService()
+        service.submit_many([("warm up", args.size, args.size, 0)])[0].wait()
+        start = time.perf_counter()
+        jobs = service.submit_many([(f"diagram {i}", args.size, args.size, i) for i in range(args.images)])
+        for job in jobs:
+            job.wait()
+            assert job.error is None, job.error
+        per_image = (time.perf_counter() - start) / args.images
+        service.shutdown()
+        fits = "yes" if per_image <= ign.IMAGE_WAIT_SECONDS else "no"
+        print(f"{name:>10} | {profile.steps:>5} | {profile.scheduler:>9} | {profile.dtype:>8} | {per_image:>7.2f}s | {fits}")
+
+
+if __name__ == "__main__":
+    main()
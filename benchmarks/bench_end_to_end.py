@@ -0,0 +1,326 @@
+"""
+Benchmark suite: the full Graph.graph.app end to end on offline stand-ins.
+OpenAI, Tavily and Stable Diffusion are replaced by the deterministic fakes
+in benchmarks/fakes.py (latency and response sizes set by flags), and
+`--runs` blog runs are pushed through the graph at each `--concurrency`
+level. Reports per-node wall time, p50/p95 end-to-end latency, peak RSS
+and throughput, and compares them with benchmarks/baselines.json.
+
+Run from project root:
+    python -m benchmarks.bench_end_to_end                   # report + compare
+    python -m benchmarks.bench_end_to_end --save-baseline   # record this machine's baseline
+    python -m benchmarks.bench_end_to_end --check           # exit 1 on regression (CI)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep benchmark runs out of the real checkpoint database (when run as a script)
+os.environ.setdefault("BLOG_CHECKPOINTS", "0")
+
+from Schemas.image_schema import GlobalImagePlan, ImageSpec
+from Schemas.plan_schema import Plan, PlanPatch
+from Schemas.router_schema import RouterDecision
+from benchmarks.fakes import FakeChatModel, FakeDiffusionPipeline, FakeSearch, FakeTorch, fake_plan
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+# Settings that define a scenario; baselines are only compared like for like
+SCENARIO_KEYS = ("mode", "sections", "research_every", "words", "llm_latency", "token_latency", "search_latency",
+                 "queries", "images", "sd_step_seconds", "runs")
+
+
+def _topic_of(messages) -> str:
+    for line in messages[-1].content.splitlines():
+        if line.startswith("Topic:"):
+            return line.split(":", 1)[1].strip()
+    return "topic"
+
+
+def install_fakes(args) -> Callable[[], None]:
+    """Point every backend at a local stand-in. Returns a function that undoes it."""
+    from services import image_store, llm_gateway, search_cache, section_store
+    import nodes.tavily_research as tavily_research
+    import nodes.image_generation_node as image_node
+
+    structured = {
+        Plan: lambda messages: fake_plan(args.sections, args.research_every),
+        RouterDecision: lambda messages: RouterDecision(
+            needs_research=args.mode != "closed_book", mode=args.mode, reason="benchmark",
+            queries=[f"{_topic_of(messages)} angle {i}" for i in range(args.queries)],
+        ),
+        GlobalImagePlan: lambda messages: GlobalImagePlan(images=[
+            ImageSpec(placeholders=f"[[IMAGE_{i}]]", filename=f"figure_{i}.png", alt=f"Figure {i}",
+                      caption=f"Figure {i}", prompt=f"diagram {i}", section=f"S{i}", after_paragraph=1)
+            for i in range(1, min(args.images, args.sections) + 1)
+        ]),
+    }
+    # A plan review only writes out the flagged tasks, so it answers in proportion
+    flagged_share = (args.sections // args.research_every) / args.sections if args.research_every else 0.0
+    fake_llm = FakeChatModel(latency=args.llm_latency, words=args.words, num_tasks=args.sections,
+                             structured=structured, chunk_latency=args.token_latency,
+                             structured_latency={PlanPatch: args.llm_latency * flagged_share})
+    fake_pipeline = FakeDiffusionPipeline(step_seconds=args.sd_step_seconds)
+
+    saved = (tavily_research._tavily_search, image_node._get_pipeline, image_node._backend)
+    llm_gateway.set_client_factory(lambda model: fake_llm)
+    llm_gateway.configure_cache(enabled=False)
+    llm_gateway.configure_rate_limits(1e9, 1e9, max_concurrency=1024)
+    search_cache.configure_search_cache(enabled=False)
+    section_store.configure_section_store(enabled=False)
+    image_store.configure_image_store(enabled=False)
+    tavily_research._tavily_search = FakeSearch(latency=args.search_latency)
+    image_node._get_pipeline = lambda: fake_pipeline
+    image_node._backend = lambda: (FakeTorch, FakeDiffusionPipeline)
+
+    def restore():
+        tavily_research._tavily_search, image_node._get_pipeline, image_node._backend = saved
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        llm_gateway.configure_rate_limits()
+        search_cache.configure_search_cache(enabled=search_cache.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        image_store.configure_image_store(enabled=image_store.STORE_ENABLED)
+
+    return restore
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # ru_maxrss is the lifetime peak (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _PeakRss:
+    """Samples resident memory in the background while a level runs."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "_PeakRss":
+        self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _node_spans(events: List[tuple]) -> Dict[str, float]:
+    """Wall time per node name: first task start to last task result, across parallel tasks."""
+    started, spans = {}, {}
+    for _, event in events:
+        payload, ts = event["payload"], datetime.fromisoformat(event["timestamp"]).timestamp()
+        name = payload["name"]
+        if event["type"] == "task":
+            started.setdefault(payload["id"], (name, ts))
+        elif event["type"] == "task_result" and payload["id"] in started:
+            _, t0 = started[payload["id"]]
+            first, last = spans.get(name, (t0, ts))
+            spans[name] = (min(first, t0), max(last, ts))
+    return {name: last - first for name, (first, last) in spans.items()}
+
+
+def run_once(graph, topic: str, out_dir: str) -> dict:
+    from Graph.graph import new_run_config
+    from state.State import initial_state
+
+    state = initial_state(topic, "2026-01-01", out_dir)
+    start = time.perf_counter()
+    events = list(graph.stream(state, config=new_run_config(), stream_mode="debug", subgraphs=True))
+    elapsed = time.perf_counter() - start
+    final = ""
+    for _, event in events:
+        if event["type"] == "task_result" and event["payload"]["name"] == "generate_and_place_images":
+            final = dict(event["payload"].get("result") or []).get("final", "")
+    if not final:
+        raise RuntimeError(f"run for {topic!r} produced no post")
+    return {"seconds": elapsed, "nodes": _node_spans(events)}
+
+
+def run_level(graph, concurrency: int, runs: int, out_root: str, verbose: bool = False) -> dict:
+    """Push `runs` topics through the graph with `concurrency` runs in flight."""
+    def one(i):
+        return run_once(graph, f"benchmark topic {concurrency}-{i}", os.path.join(out_root, f"c{concurrency}_{i}"))
+
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet, _PeakRss() as rss:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(runs)))
+        wall = time.perf_counter() - start
+
+    latencies = [r["seconds"] for r in results]
+    node_names = sorted({n for r in results for n in r["nodes"]})
+    return {
+        "runs": runs,
+        "wall_s": round(wall, 3),
+        "throughput_rpm": round(runs / wall * 60, 2),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+        "nodes_p50_s": {n: round(percentile([r["nodes"][n] for r in results if n in r["nodes"]], 50), 3)
+                        for n in node_names},
+    }
+
+
+def run_suite(args, graph=None) -> dict:
+    if graph is None:
+        from Graph.graph import app as graph
+
+    from services import tracing
+
+    restore = install_fakes(args)
+    try:
+        with tempfile.TemporaryDirectory(prefix="blog_bench_") as out_root:
+            # Spans are still recorded (their cost is part of the measurement), just not into the real trace file
+            tracing.configure_tracing(tracing.TRACE_MODE, os.path.join(out_root, "traces.jsonl"))
+            # Warm-up run so imports and first-call setup are not billed to the first level
+            run_level(graph, 1, 1, out_root, args.verbose)
+            levels = {str(c): run_level(graph, c, args.runs, out_root, args.verbose) for c in args.concurrency}
+    finally:
+        restore()
+        tracing.configure_tracing(tracing.TRACE_MODE)
+    return {"scenario": {k: getattr(args, k) for k in SCENARIO_KEYS}, "levels": levels}
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.2, min_seconds: float = 0.05,
+            min_rss_mb: float = 25.0) -> List[str]:
+    """
+    Regressions of `report` against `baseline`: latencies (end to end and per
+    node) and peak RSS more than `tolerance` above baseline, throughput more
+    than `tolerance` below. Small absolute changes are ignored as noise.
+    """
+    flagged = []
+    for level, base in baseline.get("levels", {}).items():
+        cur = report["levels"].get(level)
+        if cur is None:
+            continue
+
+        def slower(name, now, before, floor):
+            if now > before * (1 + tolerance) and now - before > floor:
+                flagged.append(f"concurrency={level} {name}: {before:g} -> {now:g} (+{(now / before - 1) if before else 1:.0%})")
+
+        slower("p50_s", cur["p50_s"], base["p50_s"], min_seconds)
+        slower("p95_s", cur["p95_s"], base["p95_s"], min_seconds)
+        slower("peak_rss_mb", cur["peak_rss_mb"], base["peak_rss_mb"], min_rss_mb)
+        for node, before in base.get("nodes_p50_s", {}).items():
+            if node in cur["nodes_p50_s"]:
+                slower(f"node {node}", cur["nodes_p50_s"][node], before, min_seconds)
+        if cur["throughput_rpm"] < base["throughput_rpm"] * (1 - tolerance):
+            flagged.append(f"concurrency={level} throughput_rpm: {base['throughput_rpm']:g} -> "
+                           f"{cur['throughput_rpm']:g} ({cur['throughput_rpm'] / base['throughput_rpm'] - 1:.0%})")
+    return flagged
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def print_report(report: dict):
+    print(f"{'concurrency':>11} {'runs':>5} {'wall':>7} {'runs/min':>9} {'p50':>7} {'p95':>7} {'peak RSS':>9}")
+    for level, r in report["levels"].items():
+        print(f"{level:>11} {r['runs']:>5d} {r['wall_s']:>6.2f}s {r['throughput_rpm']:>9.1f} "
+              f"{r['p50_s']:>6.2f}s {r['p95_s']:>6.2f}s {r['peak_rss_mb']:>7.1f}MB")
+    for level, r in report["levels"].items():
+        nodes = "  ".join(f"{n}={s:.2f}s" for n, s in r["nodes_p50_s"].items())
+        print(f"  node p50 @ concurrency={level}: {nodes}")
+
+
+def add_scenario_args(parser: argparse.ArgumentParser):
+    """Flags that shape the fake backends (see install_fakes)."""
+    parser.add_argument("--mode", default="hybrid", choices=["closed_book", "hybrid", "open_book"])
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--research-every", type=int, default=2,
+                        help="flag every n-th planned section requires_research (0 = none)")
+    parser.add_argument("--words", type=int, default=300, help="words per section (response size)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per LLM call before output")
+    parser.add_argument("--token-latency", type=float, default=0.001, help="seconds per streamed word")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--queries", type=int, default=4)
+    parser.add_argument("--images", type=int, default=2)
+    parser.add_argument("--sd-step-seconds", type=float, default=0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--name", default="default", help="Baseline entry to compare with / save to")
+    add_scenario_args(parser)
+    parser.add_argument("--runs", type=int, default=8, help="runs per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a regression is flagged")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show node logs")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baselines = load_baselines()
+    if args.save_baseline:
+        baselines[args.name] = {**report, "recorded_at": datetime.now().isoformat(timespec="seconds")}
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline '{args.name}' saved to {BASELINES_PATH}")
+        return
+
+    baseline = baselines.get(args.name)
+    if baseline is None:
+        print(f"\nNo baseline '{args.name}' yet (run with --save-baseline)")
+        return
+    if baseline["scenario"] != report["scenario"]:
+        print(f"\nBaseline '{args.name}' was recorded with different settings; not comparing")
+        return
+    flagged = compare(report, baseline, args.tolerance)
+    if flagged:
+        print(f"\n⚠️  {len(flagged)} regression(s) vs baseline '{args.name}' (tolerance {args.tolerance:.0%}):")
+        for line in flagged:
+            print(f"  - {line}")
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\nNo regressions vs baseline '{args.name}' (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: BM25 evidence index build and query time.
+Builds the index over synthetic evidence and runs one query per section,
+the way fanout does.
+
+Run from project root: python -m benchmarks.bench_evidence_index
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Schemas.evidence_schema import EvidenceItem
+from services.evidence_index import EvidenceIndex, task_query
+from benchmarks.fakes import fake_plan
+
+VOCAB = (
+    "python rust golang kubernetes docker llm transformer attention cache latency "
+    "throughput benchmark database postgres index query vector embedding retrieval "
+    "security auth oauth token deploy release model training inference gpu cpu memory "
+    "streaming async thread process queue scheduler compiler runtime api http grpc"
+).split()
+
+
+def make_evidence(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        EvidenceItem(
+            title=" ".join(rng.choices(VOCAB, k=8)),
+            url=f"https://example.com/{i}",
+            snippet=" ".join(rng.choices(VOCAB, k=60)),
+        )
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    plan = fake_plan(9)
+    rng = random.Random(1)
+    for task in plan.tasks:
+        task.bullets = [" ".join(rng.choices(VOCAB, k=5)) for _ in range(4)]
+    queries = [task_query(t) for t in plan.tasks]
+
+    print(f"{'evidence':>8} | {'build':>9} | {'query (avg of 9)':>16}")
+    for n in args.sizes:
+        evidence = make_evidence(n)
+        start = time.perf_counter()
+        index = EvidenceIndex(evidence)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for q in queries:
+            index.search(q, args.k)
+        query = (time.perf_counter() - start) / len(queries)
+        print(f"{n:>8} | {build * 1000:>7.1f}ms | {query * 1000:>14.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: local evidence pipeline (services/evidence_pipeline.build_evidence)
+on synthetic search results with realistic duplication: the same page
+behind tracking links and www./mobile hosts, syndicated copies of an
+article on other domains with a few words changed, and mixed date formats.
+Reports time per result and how many items survive deduplication.
+
+Run from project root: python -m benchmarks.bench_evidence_pipeline
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.evidence_pipeline import build_evidence
+from benchmarks.bench_evidence_index import VOCAB
+
+DOMAINS = ["docs.python.org", "github.com", "medium.com", "example.com", "techcrunch.com",
+           "blog.example.dev", "arxiv.org", "reddit.com", "news.example.org", "dev.to"]
+DATE_STYLES = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%SZ", "%b %d, %Y", "%d %B %Y", "%a, %d %b %Y %H:%M:%S GMT"]
+
+
+def make_results(n: int, duplicate_rate: float = 0.3, seed: int = 0):
+    """`n` raw results of which about `duplicate_rate` repeat an earlier page or article."""
+    rng = random.Random(seed)
+    results, originals = [], []
+    while len(results) < n:
+        if originals and rng.random() < duplicate_rate:
+            base = rng.choice(originals)
+            words = base["snippet"].split()
+            if rng.random() < 0.5:
+                # Same page, different link
+                host = base["url"].split("/")[2]
+                url = base["url"].replace(host, rng.choice([f"www.{host}", f"m.{host}", host]), 1)
+                url += f"?utm_source={rng.choice(['twitter', 'rss'])}&utm_medium=social"
+            else:
+                # Syndicated copy with light edits
+                for _ in range(2):
+                    words[rng.randrange(len(words))] = rng.choice(VOCAB)
+                url = f"https://{rng.choice(DOMAINS)}/mirror/{len(results)}"
+            results.append({**base, "url": url, "snippet": " ".join(words)})
+            continue
+        day = date(2024, 1, 1).toordinal() + rng.randrange(700)
+        published = date.fromordinal(day).strftime(rng.choice(DATE_STYLES))
+        item = {
+            "title": " ".join(rng.choices(VOCAB, k=8)),
+            "url": f"https://{rng.choice(DOMAINS)}/post/{len(results)}",
+            "snippet": " ".join(rng.choices(VOCAB, k=rng.randint(40, 120))),
+            "published_at": published if rng.random() < 0.8 else None,
+            "source": None,
+        }
+        originals.append(item)
+        results.append(item)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{'results':>8} | {'unique':>6} | {'kept':>6} | {'total':>8} | {'per result':>10}")
+    for n in args.sizes:
+        raw = make_results(n, args.duplicate_rate)
+        unique = len({r["title"] for r in raw})
+        start = time.perf_counter()
+        evidence = build_evidence(raw, today=date(2026, 1, 1))
+        elapsed = time.perf_counter() - start
+        print(f"{n:>8} | {unique:>6} | {len(evidence):>6} | {elapsed:>7.3f}s | {elapsed / n * 1e6:>8.0f}us")
+
+
+if __name__ == "__main__":
+    main()
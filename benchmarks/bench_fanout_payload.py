@@ -0,0 +1,115 @@
+"""
+Benchmark: fanout + worker setup cost at large evidence sizes.
+Compares the old payload (plan and every evidence item dumped into each
+Send, then re-validated by every worker) against the shared run context
+(Send carries the Task, a context key and evidence indices). As in the
+graph, each task's evidence is selected once beforehand (section_cache);
+that one-off cost is reported separately. Measures CPU time and peak
+traced memory; no LLM calls are made.
+
+Run from project root: python -m benchmarks.bench_fanout_payload
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.types import Send
+
+from nodes.orches_node import fanout, plan_evidence_idx
+from nodes.Worker_node import _load_inputs
+from Schemas.evidence_schema import EvidenceItem
+from Schemas.plan_schema import Plan
+from Schemas.task_schema import Task
+from state.run_context import register_run_context
+from benchmarks.fakes import fake_plan
+
+
+def make_state(num_tasks: int, num_evidence: int) -> dict:
+    evidence = [
+        EvidenceItem(
+            title=f"Evidence {i}",
+            url=f"https://example.com/article/{i}",
+            source="example.com",
+            published_at="2026-01-01",
+            snippet="A reasonably long snippet about the topic. " * 6,
+        )
+        for i in range(num_evidence)
+    ]
+    return {
+        "topic": "benchmark topic", "mode": "hybrid", "as_of": "2026-01-01",
+        "recency_days": 45, "plan": fake_plan(num_tasks), "evidence": evidence,
+    }
+
+
+def legacy_fanout_and_setup(state: dict) -> int:
+    """The previous implementation, kept here as the reference point."""
+    sends = [
+        Send("worker", {
+            "task": task.model_dump(),
+            "topic": state["topic"],
+            "mode": state["mode"],
+            "as_of": state["as_of"],
+            "recency_days": state["recency_days"],
+            "plan": state["plan"].model_dump(),
+            "evidence": [e.model_dump() for e in state.get("evidence", [])],
+        })
+        for task in state["plan"].tasks
+    ]
+    n = 0
+    for s in sends:
+        Task(**s.arg["task"])
+        Plan(**s.arg["plan"])
+        n += len([EvidenceItem(**e) for e in s.arg["evidence"]])
+    return n
+
+
+def select_evidence(state: dict) -> dict:
+    """What section_cache adds to the state before fanout."""
+    return {**state, "evidence_idx": plan_evidence_idx(register_run_context(state))}
+
+
+def context_fanout_and_setup(state: dict) -> int:
+    n = 0
+    for s in fanout(state):
+        _, _, evidence = _load_inputs(s.arg)
+        n += len(evidence)
+    return n
+
+
+def measure(fn, state: dict, repeat: int):
+    tracemalloc.start()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(state)
+    cpu = (time.process_time() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=9)
+    parser.add_argument("--evidence", type=int, nargs="+", default=[60, 600, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'evidence':>8} | {'legacy cpu':>10} {'legacy peak':>12} | {'context cpu':>11} {'context peak':>12} | "
+          f"{'select once':>11}")
+    for n in args.evidence:
+        state = make_state(args.tasks, n)
+        l_cpu, l_peak = measure(legacy_fanout_and_setup, state, args.repeat)
+        start = time.process_time()
+        selected = select_evidence(state)
+        s_cpu = time.process_time() - start
+        c_cpu, c_peak = measure(context_fanout_and_setup, selected, args.repeat)
+        print(f"{n:>8} | {l_cpu * 1000:>8.1f}ms {l_peak / 1e6:>10.2f}MB | "
+              f"{c_cpu * 1000:>9.1f}ms {c_peak / 1e6:>10.2f}MB | {s_cpu * 1000:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: token cost of decide_images, full-document vs anchor-based.
+The old GlobalImagePlan sent the whole post and asked for all of it back
+as md_with_placeholders; the anchor plan sends an outline and gets back
+only image specs with (section, after_paragraph) anchors. Counts input
+and output tokens for a synthetic post (tiktoken if installed, else
+chars/4), estimates output latency at a given decode speed, and checks
+the spliced post is byte-identical outside the placeholders.
+
+Run from project root: python -m benchmarks.bench_image_plan_tokens
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Schemas.image_schema import GlobalImagePlan, ImageSpec
+from nodes.merging_node import DECIDE_IMAGE_SYSTEM, _outline, _outline_text, insert_placeholders
+
+WORDS = ("latency throughput cache request worker queue token model service batch index "
+         "memory thread process deploy measure debug trace").split()
+
+
+def count_tokens(text: str) -> int:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("o200k_base").encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def make_post(words: int, sections: int = 9, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    per_section = words // sections
+    parts = ["# Synthetic Post\n"]
+    for s in range(1, sections + 1):
+        parts.append(f"## Section {s}\n")
+        left = per_section
+        while left > 0:
+            n = min(left, rng.randint(40, 90))
+            parts.append(" ".join(rng.choices(WORDS, k=n)).capitalize() + ".\n")
+            left -= n
+    return "\n".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=4000)
+    parser.add_argument("--decode-tps", type=float, default=80.0, help="output tokens per second")
+    args = parser.parse_args()
+
+    md = make_post(args.words)
+    images = [
+        ImageSpec(placeholders=f"[[IMAGE_{i}]]", filename=f"diagram_{i}.png", alt="Request flow",
+                  caption="How a request moves through the system", prompt="Clean technical diagram of ...",
+                  section=f"S{2 * i}", after_paragraph=1)
+        for i in range(1, 4)
+    ]
+    spliced = insert_placeholders(md, images)
+    restored = spliced
+    for img in images:
+        restored = restored.replace(f"\n\n{img.placeholders}", "")
+
+    old_in = count_tokens(DECIDE_IMAGE_SYSTEM) + count_tokens(md)
+    old_out = count_tokens(spliced) + count_tokens(
+        GlobalImagePlan(images=images).model_dump_json(exclude={"images": {"__all__": {"section", "after_paragraph"}}})
+    )
+    new_in = count_tokens(DECIDE_IMAGE_SYSTEM) + count_tokens(_outline_text(_outline(md)))
+    new_out = count_tokens(GlobalImagePlan(images=images).model_dump_json())
+
+    print(f"{args.words}-word post, 3 images, decode at {args.decode_tps:g} tok/s")
+    print(f"{'':>14} | {'input tok':>9} | {'output tok':>10} | {'est. output latency':>19}")
+    print(f"{'full document':>14} | {old_in:>9} | {old_out:>10} | {old_out / args.decode_tps:>18.1f}s")
+    print(f"{'anchors':>14} | {new_in:>9} | {new_out:>10} | {new_out / args.decode_tps:>18.1f}s")
+    print(f"output tokens reduced {old_out / new_out:.0f}x; prose byte-identical outside placeholders: {restored == md}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark / guard: import latency of the graph module.
+Runs `python -X importtime -c "import Graph.graph"` in a fresh process,
+reports the total and the slowest top-level imports, and fails when the
+total exceeds --max-ms or when torch/diffusers get imported eagerly.
+
+Run from project root: python -m benchmarks.bench_import_time [--max-ms 3000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("torch", "diffusers", "transformers")
+
+
+def import_profile(module: str):
+    """Return (total_us, [(cumulative_us, depth, name)], set of imported top-level packages)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "BLOG_SD_WARMUP": "0"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line.split("|", 2)
+        name = name[1:]  # one separator space, the rest is nesting
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cum_us), depth, name.strip()))
+    total = sum(us for us, depth, _ in rows if depth == 0)
+    imported = {name.split(".")[0] for _, _, name in rows}
+    return total, rows, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="Graph.graph")
+    parser.add_argument("--max-ms", type=float, default=3000.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total, rows, imported = import_profile(args.module)
+    print(f"import {args.module}: {total / 1000:.0f}ms (slowest direct dependencies below)")
+    direct = sorted((r for r in rows if r[1] in (0, 1)), reverse=True)
+    for us, depth, name in direct[:args.top]:
+        print(f"  {us / 1000:8.1f}ms  {'  ' * depth}{name}")
+
+    ok = True
+    eager = sorted(set(HEAVY) & imported)
+    if eager:
+        print(f"FAIL: heavy backends imported eagerly: {', '.join(eager)}")
+        ok = False
+    if total / 1000 > args.max_ms:
+        print(f"FAIL: import took {total / 1000:.0f}ms (> {args.max_ms:.0f}ms budget)")
+        ok = False
+    if ok:
+        print(f"OK: within {args.max_ms:.0f}ms budget, no heavy backends imported")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: sequential vs parallel section writing.
+Runs orchestrator -> fanout -> worker with a fake LLM that sleeps for
+a fixed latency per call, and compares wall-clock time at several
+max_concurrency settings.
+
+Run from project root: python -m benchmarks.bench_parallel_workers
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph, START, END
+
+import nodes.orches_node as orches_node
+import nodes.Worker_node as Worker_node
+from nodes.merging_node import merge_content
+from state.State import Blog_State
+from services import llm_gateway, section_store
+from benchmarks.fakes import FakeChatModel
+
+
+def build_graph():
+    g = StateGraph(Blog_State)
+    g.add_node("orchestrator", orches_node.orchestrator_node)
+    g.add_node("worker", Worker_node.worker_node)
+    g.add_node("merge_content", merge_content)
+    g.add_edge(START, "orchestrator")
+    g.add_conditional_edges("orchestrator", orches_node.fanout, ["worker"])
+    g.add_edge("worker", "merge_content")
+    g.add_edge("merge_content", END)
+    return g.compile()
+
+
+def run_once(graph, max_concurrency: int) -> float:
+    state = {
+        "topic": "benchmark topic",
+        "mode": "closed_book",
+        "needs_research": False,
+        "queries": [],
+        "evidence": [],
+        "plan": None,
+        "as_of": "2026-01-01",
+        "recency_days": 3650,
+        "sections": [],
+    }
+    start = time.perf_counter()
+    out = graph.invoke(state, config={"max_concurrency": max_concurrency})
+    elapsed = time.perf_counter() - start
+    assert len(out["sections"]) == len(out["plan"].tasks)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=9)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 3, 9])
+    args = parser.parse_args()
+
+    fake = FakeChatModel(latency=args.latency, num_tasks=args.tasks)
+    llm_gateway.set_client_factory(lambda model: fake)
+    llm_gateway.configure_rate_limits(1e9, 1e9, max_concurrency=max(args.concurrency))
+    llm_gateway.configure_cache(enabled=False)
+    section_store.configure_section_store(enabled=False)
+    graph = build_graph()
+
+    print(f"{args.tasks} sections, {args.latency:.2f}s per LLM call (1 planning call + 1 per section)")
+    baseline = None
+    for c in args.concurrency:
+        elapsed = run_once(graph, c)
+        baseline = baseline or elapsed
+        print(f"  max_concurrency={c:<3d} wall={elapsed:6.2f}s  speedup={baseline / elapsed:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
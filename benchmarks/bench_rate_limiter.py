@@ -0,0 +1,87 @@
+"""
+Benchmark: shared rate limiter vs per-client retries against a rate-limited API.
+Starts a local fake OpenAI server that allows `--server-rps` requests per
+second (429 beyond that) and fires `--calls` chat calls from `--threads`
+threads through ChatOpenAI, comparing:
+  sdk-retries   no shared limiter, each call retried by the OpenAI SDK
+  limiter       the shared limiter, configured at the provider's real limit
+  limiter-2x    the shared limiter configured at twice the real limit,
+                so it has to learn from 429s (AIMD + Retry-After)
+
+Run from project root: python -m benchmarks.bench_rate_limiter
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from services import llm_gateway
+from benchmarks.fakes import FakeOpenAIServer
+
+
+def run_scenario(name: str, args, rpm_factor: float = None) -> dict:
+    with FakeOpenAIServer(args.server_rps, burst=args.server_rps / 4, latency=args.latency,
+                          retry_after_ms=args.retry_after_ms) as server:
+        sdk_retries = 8 if rpm_factor is None else 0
+        llm_gateway.set_client_factory(lambda model: ChatOpenAI(
+            model=model, base_url=server.base_url, api_key="fake", max_retries=sdk_retries, timeout=30,
+        ))
+        if rpm_factor is None:
+            llm_gateway.configure_rate_limits(1e9, 1e9, max_concurrency=args.threads)
+        else:
+            llm_gateway.configure_rate_limits(args.server_rps * 60 * rpm_factor, 1e9, max_concurrency=args.threads,
+                                              max_retries=10, base_delay=0.1, burst_seconds=0.25)
+        llm = llm_gateway.get_llm()
+
+        def one(i):
+            try:
+                llm.invoke([HumanMessage(content=f"call {i}")])
+                return None
+            except Exception as e:
+                return type(e).__name__
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            errors = Counter(e for e in pool.map(one, range(args.calls)) if e)
+        elapsed = time.perf_counter() - start
+        ok = args.calls - sum(errors.values())
+        stats = llm_gateway.concurrency_stats()
+        return {
+            "name": name, "ok": ok, "failed": args.calls - ok, "errors": dict(errors), "seconds": elapsed,
+            "throughput": ok / elapsed, "http_429": server.throttled, "final_limit": stats["concurrency_limit"],
+            "transient_retried": stats["transient_errors"],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--server-rps", type=float, default=40.0)
+    parser.add_argument("--latency", type=float, default=0.05, help="server seconds per accepted call")
+    parser.add_argument("--retry-after-ms", type=int, default=None)
+    args = parser.parse_args()
+    llm_gateway.configure_cache(enabled=False)
+
+    print(f"{args.calls} calls from {args.threads} threads, server limit {args.server_rps:g} req/s")
+    for name, factor in (("sdk-retries", None), ("limiter", 1.0), ("limiter-2x", 2.0)):
+        r = run_scenario(name, args, factor)
+        print(f"  {r['name']:<12} ok={r['ok']:<4d} failed={r['failed']:<3d} wall={r['seconds']:6.2f}s "
+              f"throughput={r['throughput']:5.1f}/s ({r['throughput'] / args.server_rps:4.0%} of limit) "
+              f"429s={r['http_429']:<5d} concurrency_limit={r['final_limit']} "
+              f"transient_retried={r['transient_retried']}")
+        for error, n in sorted(r["errors"].items()):
+            print(f"  {'':<12} failed: {n} x {error}")
+    llm_gateway.set_client_factory(None)
+    llm_gateway.configure_rate_limits()
+
+
+if __name__ == "__main__":
+    main()
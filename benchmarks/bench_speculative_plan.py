@@ -0,0 +1,46 @@
+"""
+Benchmark: hybrid-mode latency with and without speculative planning.
+Runs the full graph on the offline fakes (see bench_end_to_end) with
+draft_planner on and off, and compares end-to-end and orchestrator time.
+
+Run from project root: python -m benchmarks.bench_speculative_plan
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("BLOG_CHECKPOINTS", "0")
+
+import nodes.Route_Node as Route_Node
+from benchmarks.bench_end_to_end import run_suite
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--research-every", type=int, default=2)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per LLM call")
+    parser.add_argument("--search-latency", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=4)
+    args = parser.parse_args()
+    args.mode, args.words, args.token_latency, args.images, args.sd_step_seconds = "hybrid", 100, 0.0, 0, 0.0
+    args.concurrency, args.verbose = [1], False
+
+    print(f"hybrid mode, {args.llm_latency:g}s per LLM call, {args.search_latency:g}s per search, "
+          f"{args.queries} queries, every {args.research_every} section(s) flagged for research")
+    results = {}
+    for speculative in (False, True):
+        Route_Node.SPECULATIVE_PLANNING = speculative
+        level = run_suite(args)["levels"]["1"]
+        results[speculative] = level
+        nodes = level["nodes_p50_s"]
+        print(f"  speculative={str(speculative):<5} p50={level['p50_s']:6.2f}s  research={nodes.get('research', 0):5.2f}s  "
+              f"draft_planner={nodes.get('draft_planner', 0):5.2f}s  orchestrator={nodes.get('orchestrator', 0):5.2f}s")
+    saved = results[False]["p50_s"] - results[True]["p50_s"]
+    print(f"  critical path shortened by {saved:.2f}s ({saved / results[False]['p50_s']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Offline stand-ins for the external backends used by the graph.
+They mimic just enough of the real client APIs for the nodes to run,
+with a configurable latency so timings look like real network calls.
+"""
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from Schemas.evidence_schema import EvidenceRanking
+from Schemas.image_schema import GlobalImagePlan
+from Schemas.plan_schema import Plan, PlanPatch
+from Schemas.router_schema import RouterDecision
+from Schemas.task_schema import Task
+
+
+def fake_plan(num_tasks: int = 9, research_every: int = 0) -> Plan:
+    """`research_every=n` flags every n-th task requires_research (0 = none)."""
+    tasks = [
+        Task(
+            id=i,
+            title=f"Section {i}",
+            goal=f"Understand part {i} of the topic.",
+            bullets=[f"Point {i}.a", f"Point {i}.b", f"Point {i}.c"],
+            target_words=200,
+            requires_research=bool(research_every) and i % research_every == 0,
+        )
+        for i in range(1, num_tasks + 1)
+    ]
+    return Plan(blog_title="Fake Blog", audience="developers", tone="practical", tasks=tasks)
+
+
+def _default_structured(num_tasks: int) -> Dict[type, Callable[[list], object]]:
+    return {
+        Plan: lambda messages: fake_plan(num_tasks),
+        RouterDecision: lambda messages: RouterDecision(
+            needs_research=False, mode="closed_book", reason="fake"
+        ),
+        EvidenceRanking: lambda messages: EvidenceRanking(order=[]),
+        GlobalImagePlan: lambda messages: GlobalImagePlan(images=[]),
+        PlanPatch: lambda messages: PlanPatch(accept=True),
+    }
+
+
+class FakeChatModel:
+    """Drop-in for ChatOpenAI: `invoke`, `stream` and `with_structured_output(...).invoke`."""
+
+    def __init__(self, latency: float = 0.0, words: int = 200, num_tasks: int = 9,
+                 structured: Optional[Dict[type, Callable[[list], object]]] = None,
+                 chunk_latency: float = 0.0, structured_latency: Optional[Dict[type, float]] = None):
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        # Per-schema latency, e.g. a short review call answering faster than a full plan
+        self.structured_latency = structured_latency or {}
+        self.words = words
+        self.structured = _default_structured(num_tasks)
+        self.structured.update(structured or {})
+        self.calls = 0
+
+    def _sleep(self, latency: Optional[float] = None):
+        self.calls += 1
+        latency = self.latency if latency is None else latency
+        if latency:
+            time.sleep(latency)
+
+    def invoke(self, messages: List, **kwargs) -> AIMessage:
+        self._sleep()
+        prompt = messages[-1].content
+        title = "Section"
+        for line in prompt.splitlines():
+            if line.startswith("Section title:"):
+                title = line.split(":", 1)[1].strip()
+        body = " ".join(["lorem"] * self.words)
+        return AIMessage(content=f"## {title}\n\n{body}")
+
+    def stream(self, messages: List, **kwargs):
+        """Yield the invoke() text word by word, `chunk_latency` seconds apart."""
+        first = True
+        text = self.invoke(messages).content
+        for word in text.split(" "):
+            if not first and self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield AIMessageChunk(content=word if first else " " + word)
+            first = False
+
+    def with_structured_output(self, schema, **kwargs):
+        return _FakeStructured(self, schema)
+
+
+class _FakeStructured:
+    def __init__(self, model: FakeChatModel, schema):
+        self.model = model
+        self.schema = schema
+
+    def invoke(self, messages: List, **kwargs):
+        self.model._sleep(self.model.structured_latency.get(self.schema))
+        return self.model.structured[self.schema](messages)
+
+
+class FakeSearch:
+    """
+    Stand-in for `_tavily_search(query, max_results)`.
+    `latency` is a float, or a callable(query) -> seconds for per-query delays.
+    """
+
+    def __init__(self, latency=0.0, results_per_query: Optional[int] = None):
+        self.latency = latency
+        self.results_per_query = results_per_query
+        self.calls = 0
+
+    def __call__(self, query: str, max_results: int = 5) -> List[dict]:
+        self.calls += 1
+        delay = self.latency(query) if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        n = self.results_per_query or max_results
+        slug = "-".join(query.lower().split())
+        return [
+            {
+                "title": f"{query} result {i}",
+                "url": f"https://example.com/{slug}/{i}",
+                "snippet": f"Snippet {i} about {query}.",
+                "published_at": "2026-01-01",
+                "source": "example.com",
+            }
+            for i in range(n)
+        ]
+
+
+class FakeDiffusionPipeline:
+    """
+    Stand-in for StableDiffusionPipeline: sleeps `step_seconds` per step,
+    honours callback_on_step_end and returns solid-colour PIL images whose
+    colour depends on the prompt and the generator's seed. Each call is
+    recorded in `batches` as (width, height, number of prompts).
+    """
+
+    def __init__(self, step_seconds: float = 0.0):
+        self.step_seconds = step_seconds
+        self.calls = 0
+        self.batches = []
+
+    def __call__(self, prompt, num_inference_steps=20, width=512, height=512,
+                 callback_on_step_end=None, generator=None, **kwargs):
+        from PIL import Image
+
+        self.calls += 1
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        self.batches.append((width, height, len(prompts)))
+        generators = generator if isinstance(generator, list) else [generator] * len(prompts)
+        seeds = [_seed_of(g) for g in generators]
+        for step in range(num_inference_steps):
+            if self.step_seconds:
+                time.sleep(self.step_seconds)
+            if callback_on_step_end is not None:
+                callback_on_step_end(self, step, num_inference_steps - step, {})
+        images = [Image.new("RGB", (width, height), (len(p) * 7 % 256, seed % 251, 160))
+                  for p, seed in zip(prompts, seeds)]
+        return type("PipelineOutput", (), {"images": images})()
+
+
+def _seed_of(generator) -> int:
+    """Seed of a torch.Generator or _FakeGenerator (80 when none was passed)."""
+    if generator is None:
+        return 80
+    if hasattr(generator, "initial_seed"):
+        return int(generator.initial_seed())
+    seed = getattr(generator, "seed", None)
+    return seed if isinstance(seed, int) else 0
+
+
+class _FakeGenerator:
+    def __init__(self, device: str = "cpu"):
+        self.seed = None
+
+    def manual_seed(self, seed: int) -> "_FakeGenerator":
+        self.seed = seed
+        return self
+
+
+class FakeTorch:
+    """Just enough of `torch` for the image service to seed a fake pipeline."""
+
+    Generator = _FakeGenerator
+
+
+def tiny_sd_pipeline(seed: int = 0):
+    """
+    A real StableDiffusionPipeline with tiny randomly initialised weights.
+    Exercises the genuine diffusers code path on CPU without downloading
+    a model. Needs torch, diffusers and transformers.
+    """
+    import json
+    import tempfile
+
+    import torch
+    from diffusers import AutoencoderKL, DDIMScheduler, StableDiffusionPipeline, UNet2DConditionModel
+    from transformers import CLIPTextConfig, CLIPTextModel, CLIPTokenizer
+
+    torch.manual_seed(seed)
+    unet = UNet2DConditionModel(
+        block_out_channels=(32, 64), layers_per_block=1, sample_size=32, in_channels=4, out_channels=4,
+        down_block_types=("DownBlock2D", "CrossAttnDownBlock2D"),
+        up_block_types=("CrossAttnUpBlock2D", "UpBlock2D"),
+        cross_attention_dim=32, norm_num_groups=32,
+    )
+    vae = AutoencoderKL(
+        block_out_channels=[32, 64], in_channels=3, out_channels=3,
+        down_block_types=["DownEncoderBlock2D"] * 2, up_block_types=["UpDecoderBlock2D"] * 2,
+        latent_channels=4, norm_num_groups=32,
+    )
+    text_encoder = CLIPTextModel(CLIPTextConfig(
+        bos_token_id=0, eos_token_id=2, pad_token_id=1, hidden_size=32, intermediate_size=37,
+        layer_norm_eps=1e-5, num_attention_heads=4, num_hidden_layers=2, vocab_size=1000,
+    ))
+    tok_dir = tempfile.mkdtemp(prefix="tiny_clip_")
+    vocab = {"<|startoftext|>": 0, "!": 1, "<|endoftext|>": 2}
+    for i, c in enumerate("abcdefghijklmnopqrstuvwxyz0123456789"):
+        vocab[c] = 3 + i
+        vocab[c + "</w>"] = 100 + i
+    with open(os.path.join(tok_dir, "vocab.json"), "w") as f:
+        json.dump(vocab, f)
+    with open(os.path.join(tok_dir, "merges.txt"), "w") as f:
+        f.write("#version: 0.2\n")
+    tokenizer = CLIPTokenizer(
+        os.path.join(tok_dir, "vocab.json"), os.path.join(tok_dir, "merges.txt"), model_max_length=77
+    )
+    pipe = StableDiffusionPipeline(
+        unet=unet, vae=vae, text_encoder=text_encoder, tokenizer=tokenizer,
+        scheduler=DDIMScheduler(clip_sample=False), safety_checker=None, feature_extractor=None,
+        requires_safety_checker=False,
+    )
+    pipe.set_progress_bar_config(disable=True)
+    return pipe
+
+
+class FakeOpenAIServer:
+    """
+    Local HTTP server speaking enough of the (non-streaming) OpenAI chat API for
+    `ChatOpenAI(base_url=server.base_url, ...)`, with a provider-style rate
+    limit: a token bucket of `requests_per_second` (burst `burst`) that
+    answers 429 with a retry-after-ms header once it is empty.
+    Use as a context manager; counts are in `ok` and `throttled`.
+    """
+
+    def __init__(self, requests_per_second: float = 10.0, burst: float = 1.0, latency: float = 0.0,
+                 retry_after_ms: Optional[int] = None, words: int = 20):
+        import threading
+
+        self.rate = requests_per_second
+        self.burst = burst
+        self.latency = latency
+        self.retry_after_ms = retry_after_ms
+        self.words = words
+        self.ok = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _admit(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self.throttled += 1
+                return False
+            self._tokens -= 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def _completion(self, body: dict) -> dict:
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": " ".join(["lorem"] * self.words)}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": self.words,
+                      "total_tokens": len(prompt) // 4 + self.words},
+        }
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not fake._admit():
+                    headers = {"retry-after-ms": str(fake.retry_after_ms)} if fake.retry_after_ms else {}
+                    self._send(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                               "code": "rate_limit_exceeded"}}, headers)
+                    return
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    self._send(200, fake._completion(body))
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+                        fake.ok += 1
+
+        class Server(ThreadingHTTPServer):
+            # The default backlog of 5 resets connections when many clients connect at once
+            request_queue_size = 128
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
@@ -1,11 +1,15 @@
 from __future__ import annotations
-from langchain_openai import ChatOpenAI
+from services.llm_gateway import get_llm
 from dotenv import load_dotenv
 from state.State import Blog_State
 from Schemas.router_schema import RouterDecision
 from langchain_core.messages import SystemMessage, HumanMessage
+import os
 load_dotenv()
-llm=ChatOpenAI(model="gpt-4.1-mini")
+llm=get_llm()
+# Hybrid mode, opt-in: draft the plan in parallel with research, reconcile once evidence lands
+# (shorter critical path, one extra LLM call per run)
+SPECULATIVE_PLANNING=os.getenv("BLOG_SPECULATIVE_PLAN", "0") == "1"
 
 ROUTER_SYSTEM="""You are a routing module for a technical blog planner.
 Decide whether web research is needed before planning
@@ -44,8 +48,11 @@ def Router_Node(state: Blog_State)-> dict:
         "recency_days":recency_days,
 
     }
-def route_next(state: Blog_State) -> str:
+def route_next(state: Blog_State):
     if state["needs_research"]==True:
+        if SPECULATIVE_PLANNING and state.get("mode")=="hybrid":
+            # Both run in the same superstep; the orchestrator starts when both are done
+            return ["research", "draft_planner"]
         return "research"
     else:
         return "orchestrator"
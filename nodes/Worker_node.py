@@ -1,13 +1,19 @@
-from nodes.orches_node import orchestrator_node, fanout
+import hashlib
+from nodes.orches_node import plan_evidence_idx
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from services.llm_gateway import get_llm
 from dotenv import load_dotenv
 from state.State import Blog_State
 from Schemas.task_schema import Task
-from Schemas.plan_schema import Plan
 from Schemas.evidence_schema import EvidenceItem
+from state.run_context import RunContext, get_run_context, register_run_context
+from services.section_store import load_section, save_section, task_fingerprint
+from services import tracing
+from services.job_manager import raise_if_cancelled
+from typing import List, Tuple
+from langgraph.config import get_stream_writer
 load_dotenv()
-llm=ChatOpenAI(model="gpt-4.1-mini")
+llm=get_llm()
 
 WORKER_SYSTEM="""You are a senior technical writer and developer advocate.
 Write ONE section of a technical blog post in Markdown.
@@ -39,21 +45,63 @@ Style:
 - Short paragraphs, bullets where helpful, code fences for code.
 - Avoid fluff/marketing. Be precise and implementation-oriented.
 """
+# Part of every section fingerprint, so editing the prompt or switching model rewrites sections
+WORKER_VERSION=hashlib.sha256(f"{llm.model}\n{WORKER_SYSTEM}".encode("utf-8")).hexdigest()[:16]
+
+def _stream_writer():
+    """LangGraph custom-stream writer, or a no-op when called outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _event: None
+
+def _load_inputs(payload: dict)-> Tuple[Task, RunContext, List[EvidenceItem]]:
+    """Resolve a fanout payload against the shared run context."""
+    task: Task=payload["task"]
+    ctx=get_run_context(payload["context_key"])
+    evidence=[ctx.evidence[i] for i in payload.get("evidence_idx", [])]
+    return task, ctx, evidence
+
+def _fingerprint(task: Task, ctx: RunContext, evidence: List[EvidenceItem])-> str:
+    return task_fingerprint(task, ctx.plan, [e.url for e in evidence], ctx.mode, WORKER_VERSION)
+
+def section_cache_node(state: Blog_State)-> dict:
+    """
+    Reuse sections whose task fingerprint is unchanged since an earlier run;
+    fanout then only dispatches workers for the rest. Each task's evidence
+    selection is kept in state so fanout does not search the index again.
+    """
+    ctx=register_run_context(state)
+    selections=plan_evidence_idx(ctx)
+    write=_stream_writer()
+    reused=[]
+    for task, evidence_idx in zip(ctx.plan.tasks, selections):
+        evidence=[ctx.evidence[i] for i in evidence_idx]
+        section_md=load_section(_fingerprint(task, ctx, evidence))
+        if section_md is None:
+            continue
+        reused.append((task.id, section_md))
+        write({"type": "section_done", "task_id": task.id, "title": task.title, "text": section_md,
+               "reused": True})
+    if reused:
+        tracing.add("sections_reused", len(reused))
+        print(f"[sections] reusing {len(reused)}/{len(ctx.plan.tasks)} unchanged sections")
+    return {"sections": reused, "evidence_idx": selections}
+
 def worker_node(payload: dict)-> dict:
-    task= Task(**payload["task"])
-    plan=Plan(**payload["plan"])
-    evidence=[EvidenceItem(**e) for e in payload.get("evidence",[])]
-    topic=payload["topic"]
-    mode=payload.get("mode","closed_book")
+    task, ctx, evidence=_load_inputs(payload)
+    plan=ctx.plan
 
     bullets_text= "\n-" + "\n-".join(task.bullets)
     evidence_text=""
     if evidence:
         evidence_text="\n".join(
             f"- {e.title} | {e.url} | {e.published_at or 'date:unknown'}".strip()
-            for e in evidence[:20]
+            for e in evidence
         )
-    section_md=llm.invoke([
+    write=_stream_writer()
+    chunks=[]
+    for chunk in llm.stream([
         SystemMessage(content=WORKER_SYSTEM),
         HumanMessage(
             content=(
@@ -62,9 +110,9 @@ def worker_node(payload: dict)-> dict:
                 f"Tone: {plan.tone}\n"
                 f"Blog kind : {plan.blog_kind}\n"
                 f"Constraints: {plan.constraints}\n"
-                f"Topic: {payload['topic']}\n"
-                f"Mode: {payload.get('mode')}\n"
-                f"As-of: {payload.get('as_of')} (recency days={payload.get('recency_days')})\n\n"
+                f"Topic: {ctx.topic}\n"
+                f"Mode: {ctx.mode}\n"
+                f"As-of: {ctx.as_of} (recency days={ctx.recency_days})\n\n"
                 f"Section title: {task.title}\n"
                 f"Goal: {task.goal}\n"
                 f"Target words: {task.target_words}\n"
@@ -78,6 +126,13 @@ def worker_node(payload: dict)-> dict:
                 
             )
         ),
-    ]).content.strip()
+    ]):
+        # A cancelled job stops here instead of finishing the section in the background
+        raise_if_cancelled()
+        chunks.append(chunk)
+        write({"type": "section_chunk", "task_id": task.id, "title": task.title, "text": chunk})
+    section_md="".join(chunks).strip()
+    write({"type": "section_done", "task_id": task.id, "title": task.title, "text": section_md})
+    save_section(_fingerprint(task, ctx, evidence), section_md)
 
     return {"sections":[(task.id, section_md)]}
@@ -1,10 +1,12 @@
-from langchain_openai import ChatOpenAI
+from services.llm_gateway import get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 from state.State import Blog_State
 from dotenv import load_dotenv
-from Schemas.image_schema import GlobalImagePlan
+from Schemas.image_schema import GlobalImagePlan, ImageSpec
+from typing import List
+import re
 load_dotenv()
-llm=ChatOpenAI(model="gpt-4.1-mini")
+llm=get_llm()
 
 
 
@@ -21,16 +23,95 @@ def merge_content(state: Blog_State):
 
 DECIDE_IMAGE_SYSTEM="""You are an expert technical editor.
 Decide if image/diagrams are needed for this blog.
+You get an outline of the post: each section has an id (S0, S1, ...), its heading,
+and its numbered paragraphs (first words only).
 
 RULES:
 - Max 3 images total.
 - Each image must materially improve understanding (diagram/flow/table-like visual)
-- Insert placeholder exactly: [[IMAGE_1]], [[IMAGE_2]],[[IMAGE_3]]
-- If no image needed: md_with_placeholders must equal input and images=[]
+- Use placeholders exactly: [[IMAGE_1]], [[IMAGE_2]],[[IMAGE_3]]
+- For each image give an anchor: section = the section id, after_paragraph = paragraph number
+  it should follow (0 = directly under the heading). Do NOT rewrite or return the post text.
+- If no image needed: images=[]
 - avoid decorative images; Prefer technical diagram with short labels
 Return strictly GlobalImagePlan
 """
 
+_HEADING_RE=re.compile(r"^#{1,6} ")
+_FENCE_RE=re.compile(r"^(```|~~~)")
+
+def _outline(md: str)-> List[dict]:
+    """
+    Split markdown into sections and their blocks (paragraphs, lists, code
+    fences), keeping character offsets so placeholders can be spliced in
+    without touching the text itself.
+    """
+    sections: List[dict]=[]
+    current=None
+    block_start=None
+    in_fence=False
+    pos=0
+    for line in md.splitlines(keepends=True):
+        stripped=line.strip()
+        end=pos + len(line.rstrip("\r\n"))
+        if in_fence:
+            if _FENCE_RE.match(stripped):
+                in_fence=False
+            current["blocks"][-1]["end"]=end
+        elif _HEADING_RE.match(line):
+            current={"id": f"S{len(sections)}", "heading": stripped, "end": end, "blocks": []}
+            sections.append(current)
+            block_start=None
+        elif not stripped:
+            block_start=None
+        else:
+            if current is None:
+                current={"id": "S0", "heading": "", "end": 0, "blocks": []}
+                sections.append(current)
+            if block_start is None:
+                block_start=pos
+                current["blocks"].append({"start": pos, "end": end, "text": stripped})
+            else:
+                current["blocks"][-1]["end"]=end
+            if _FENCE_RE.match(stripped):
+                in_fence=True
+        pos+=len(line)
+    return sections
+
+def _outline_text(sections: List[dict])-> str:
+    lines=[]
+    for sec in sections:
+        lines.append(f"[{sec['id']}] {sec['heading']}")
+        for i, block in enumerate(sec["blocks"], 1):
+            lines.append(f"  p{i}: {block['text'][:80]}")
+    return "\n".join(lines)
+
+def _anchor_offset(sections: List[dict], section: str, after_paragraph: int, md_len: int)-> int:
+    """Character offset for an anchor; unknown sections fall back to the end of the post."""
+    key=section.strip().lower()
+    match=None
+    for sec in sections:
+        if sec["id"].lower() == key or sec["heading"].lstrip("#").strip().lower() == key.lstrip("#").strip():
+            match=sec
+            break
+    if match is None:
+        return md_len
+    n=max(0, min(after_paragraph, len(match["blocks"])))
+    return match["blocks"][n - 1]["end"] if n else match["end"]
+
+def insert_placeholders(md: str, images: List[ImageSpec])-> str:
+    """Splice each placeholder in at its anchor; text outside the inserts is unchanged."""
+    sections=_outline(md)
+    inserts=[]
+    for order, img in enumerate(images):
+        offset=_anchor_offset(sections, img.section, img.after_paragraph, len(md.rstrip("\n")))
+        inserts.append((offset, order, f"\n\n{img.placeholders}"))
+    out=md
+    # Splice from the end so earlier offsets stay valid
+    for offset, _, text in sorted(inserts, reverse=True):
+        out=out[:offset] + text + out[offset:]
+    return out
+
 def decide_images(state: Blog_State)->dict:
     planner=llm.with_structured_output(GlobalImagePlan)
     merged_md=state["merged_md"]
@@ -41,13 +122,13 @@ def decide_images(state: Blog_State)->dict:
         HumanMessage(content=(
             f"Blog Kind: {plan.blog_kind}\n"
             f"Topic : {state['topic']}\n\n"
-            "Insert placeholders + propose image prompts.\n\n"
-            f"{merged_md}"
+            "Propose image prompts and anchors.\n\n"
+            f"{_outline_text(_outline(merged_md))}"
 
         )),
     ])
+    images=image_plan.images[:3]
     return {
-        "md_with_placeholders": image_plan.md_with_placeholders,
-        "image_specs": [img.model_dump() for img in image_plan.images],
+        "md_with_placeholders": insert_placeholders(merged_md, images),
+        "image_specs": [img.model_dump() for img in images],
     }
-
@@ -1,12 +1,19 @@
 from state.State import Blog_State
-from Schemas.plan_schema import Plan
+from Schemas.plan_schema import Plan, PlanPatch
+from Schemas.task_schema import Task
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from services.llm_gateway import get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 from typing import List
 from langgraph.types import Send
+from state.run_context import register_run_context
+from services.evidence_index import get_evidence_index, task_query
+import os
 load_dotenv()
-llm=ChatOpenAI(model="gpt-4.1-mini")
+llm=get_llm()
+# Evidence items put into the planning prompt / each section prompt
+ORCH_EVIDENCE_K=int(os.getenv("BLOG_ORCH_EVIDENCE_K", "16"))
+WORKER_EVIDENCE_K=int(os.getenv("BLOG_WORKER_EVIDENCE_K", "8"))
 ORCH_SYSTEM="""You are a senior technical writer and developer advocate.
 Your job is to produce a highly actionable outline for a technical blog post.
 
@@ -41,12 +48,24 @@ Grounding rules:
 
 Output must strictly match the Plan schema
 """
-def orchestrator_node(state: Blog_State)->dict:
-    planner=llm.with_structured_output(Plan)
-    evidence=state.get("evidence",[])
-    mode=state.get("mode", "closed_book")
+DRAFT_NOTE="""Evidence is not available yet (research is still running).
+Plan from the topic alone. Mark every section whose bullets will depend on
+fresh facts (models/tools/releases/numbers) as requires_research=True and
+keep those bullets specific in intent but free of unverified details."""
 
-    forced_kind="news_roundup" if mode=="open_book" else None
+RECONCILE_SYSTEM="""You are reviewing a draft blog outline now that research evidence is in.
+Only the sections marked requires_research are shown; the rest of the plan is final.
+- If every shown section is still accurate and well-aimed given the evidence, return accept=true and no tasks.
+- Otherwise return accept=false and, in tasks, ONLY the sections that need changes, with the same id,
+  bullets rewritten to use concrete up-to-date examples from the evidence, and requires_citations=True.
+Do not add, remove or renumber sections. Output must strictly match the PlanPatch schema.
+"""
+
+def _plan(state: Blog_State, evidence: list, note: str="")-> Plan:
+    planner=llm.with_structured_output(Plan)
+    forced_kind="news_roundup" if state.get("mode")=="open_book" else None
+    selected=[evidence[i] for i in get_evidence_index(evidence).select(state["topic"], ORCH_EVIDENCE_K)] if evidence else []
+    note_block=f"{note}\n\n" if note else ""
     plan=planner.invoke(
         [
             SystemMessage(content=ORCH_SYSTEM),
@@ -55,31 +74,87 @@ def orchestrator_node(state: Blog_State)->dict:
                 f"mode: {state.get('mode', 'closed_book')}\n"
                 f"As-of: {state.get('as_of', '')} (recency days: {state.get('recency_days', 3650)})\n"
                 f"{'Force blog_kind=news_roundup' if forced_kind else ''}\n\n"
-                f"Evidence: \n{[e.model_dump() for e in evidence][:16]}"
+                f"{note_block}"
+                f"Evidence: \n{[e.model_dump() for e in selected]}"
                 
             ))
         ]
     )
     if forced_kind:
         plan.blog_kind="news_roundup"
-    return {"plan":plan}
+    return plan
+
+def draft_planner_node(state: Blog_State)->dict:
+    """Plan from the topic alone, in parallel with research (hybrid mode)."""
+    return {"draft_plan":_plan(state, [], DRAFT_NOTE)}
+
+def reconcile_plan(state: Blog_State, draft: Plan)-> Plan:
+    """
+    Check the draft against the evidence. Only tasks flagged requires_research
+    (and the evidence relevant to them) go to the model; with none flagged,
+    or no evidence, the draft is accepted without a call.
+    """
+    evidence=state.get("evidence") or []
+    flagged=[t for t in draft.tasks if t.requires_research]
+    if not flagged or not evidence:
+        print(f"[plan] draft accepted without review ({len(flagged)} research tasks, {len(evidence)} evidence)")
+        return draft
+    index=get_evidence_index(evidence)
+    picked=sorted({i for t in flagged for i in index.select(task_query(t), WORKER_EVIDENCE_K)})
+    patch=llm.with_structured_output(PlanPatch).invoke(
+        [
+            SystemMessage(content=RECONCILE_SYSTEM),
+            HumanMessage(content=(
+                f"Topic: {state['topic']}\n"
+                f"As-of: {state.get('as_of', '')} (recency days: {state.get('recency_days', 3650)})\n\n"
+                f"Draft sections needing research:\n{[t.model_dump() for t in flagged]}\n\n"
+                f"Evidence: \n{[evidence[i].model_dump() for i in picked]}"
+            ))
+        ]
+    )
+    flagged_ids={t.id for t in flagged}
+    replacements={t.id: t for t in patch.tasks if t.id in flagged_ids}
+    if patch.accept or not replacements:
+        print(f"[plan] draft accepted after review of {len(flagged)} research task(s)")
+        return draft
+    print(f"[plan] draft patched: task(s) {sorted(replacements)} rewritten from evidence")
+    return draft.model_copy(update={"tasks": [replacements.get(t.id, t) for t in draft.tasks]})
+
+def orchestrator_node(state: Blog_State)->dict:
+    draft=state.get("draft_plan")
+    if draft is not None and state.get("mode")=="hybrid":
+        return {"plan":reconcile_plan(state, draft)}
+    return {"plan":_plan(state, state.get("evidence",[]))}
+
+def task_evidence_idx(index, task: Task)-> List[int]:
+    """Top-k evidence for a section, as indices into the run context's evidence."""
+    return index.select(task_query(task), WORKER_EVIDENCE_K) if index else []
+
+def plan_evidence_idx(ctx)-> List[List[int]]:
+    """task_evidence_idx for every task of the plan, in plan order."""
+    index=get_evidence_index(ctx.evidence) if ctx.evidence else None
+    return [task_evidence_idx(index, task) for task in ctx.plan.tasks]
 
 def fanout(state: Blog_State):
+    ctx=register_run_context(state)
+    # section_cache already selected each task's evidence; only recompute if it did not run
+    selections=state.get("evidence_idx") or []
+    if len(selections) != len(ctx.plan.tasks):
+        selections=plan_evidence_idx(ctx)
+    # Sections already in state were reused from the section store
+    done={task_id for task_id, _ in state.get("sections") or []}
     sends=[]
-    for task in state["plan"].tasks:
+    for task, evidence_idx in zip(ctx.plan.tasks, selections):
+        if task.id in done:
+            continue
         sends.append(
             Send(
                 "worker",
                 {
-                    "task":task.model_dump(),
-                    "topic":state["topic"],
-                    "mode":state["mode"],
-                    "as_of":state["as_of"],
-                    "recency_days":state["recency_days"],
-                    "plan":state["plan"].model_dump(),
-                    "evidence":[e.model_dump() for e in state.get("evidence",[])],
+                    "task":task,
+                    "context_key":ctx.key,
+                    "evidence_idx":evidence_idx,
                 },
-
             )
         )
-    return sends    
+    return sends or "reducer"
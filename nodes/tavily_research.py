@@ -1,37 +1,197 @@
+import contextvars
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+import requests
 from langchain_core.messages import SystemMessage, HumanMessage
 from dotenv import load_dotenv
 from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TAVILY_API_URL, TavilySearchAPIWrapper
 from state.State import Blog_State
-from langchain_openai import ChatOpenAI
-from typing import List, Optional
-from Schemas.evidence_schema import EvidencePack
+from services.llm_gateway import get_llm
+from typing import Callable, List, Optional
+from Schemas.evidence_schema import EvidenceItem, EvidenceRanking
+from services.evidence_pipeline import build_evidence
+from services.search_cache import cached_search
 load_dotenv()
-llm=ChatOpenAI(model="gpt-4.1-mini")
+llm=get_llm()
+
+# Search stage limits (override via env)
+SEARCH_CONCURRENCY=int(os.getenv("BLOG_SEARCH_CONCURRENCY", "4"))
+SEARCH_RATE_PER_SEC=float(os.getenv("BLOG_SEARCH_RATE_PER_SEC", "5"))
+QUERY_TIMEOUT_SECONDS=float(os.getenv("BLOG_SEARCH_QUERY_TIMEOUT", "15"))
+STAGE_TIMEOUT_SECONDS=float(os.getenv("BLOG_SEARCH_STAGE_TIMEOUT", "40"))
+# Evidence is deduplicated and normalised locally; optionally an LLM reorders it by relevance
+EVIDENCE_LLM_RANK=os.getenv("BLOG_EVIDENCE_LLM_RANK", "0")=="1"
+
+_clients: dict = {}
+_clients_lock=threading.Lock()
+_executor=ThreadPoolExecutor(max_workers=SEARCH_CONCURRENCY, thread_name_prefix="tavily")
+
+
+class _RateLimiter:
+    """Spaces out call starts so at most `rate` calls begin per second."""
+
+    def __init__(self, rate: float):
+        self.interval=1.0 / rate if rate > 0 else 0.0
+        self._next=0.0
+        self._lock=threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now=time.monotonic()
+            slot=max(now, self._next)
+            self._next=slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_rate_limiter=_RateLimiter(SEARCH_RATE_PER_SEC)
+
+
+class _TimedTavilyWrapper(TavilySearchAPIWrapper):
+    """
+    Tavily API wrapper with a request timeout. The stock wrapper posts
+    without one, so a query _search_all has given up on would keep one of
+    the few search threads busy for as long as the connection hangs.
+    """
+    timeout: float = QUERY_TIMEOUT_SECONDS
+
+    def raw_results(self, query: str, max_results: Optional[int] = 5, search_depth: Optional[str] = "advanced",
+                    include_domains: Optional[List[str]] = None, exclude_domains: Optional[List[str]] = None,
+                    include_answer: Optional[bool] = False, include_raw_content: Optional[bool] = False,
+                    include_images: Optional[bool] = False) -> dict:
+        params={
+            "api_key": self.tavily_api_key.get_secret_value(),
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains or [],
+            "exclude_domains": exclude_domains or [],
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+        response=requests.post(f"{TAVILY_API_URL}/search", json=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+def _get_client(max_results: int) -> TavilySearchResults:
+    """One shared Tavily tool per max_results setting."""
+    client=_clients.get(max_results)
+    if client is None:
+        with _clients_lock:
+            client=_clients.get(max_results)
+            if client is None:
+                client=TavilySearchResults(max_results=max_results, api_wrapper=_TimedTavilyWrapper())
+                _clients[max_results]=client
+    return client
 
 def _tavily_search(query: str, max_results: int = 5) -> List[dict]:
     if not os.getenv("TAVILY_API_KEY"):
         raise ValueError("TAVILY_API_KEY is not set")
+    tool = _get_client(max_results)
+    results=tool.invoke({"query":query})
+    if isinstance(results, str):
+        # The tool reports request errors (timeouts included) as a string
+        raise RuntimeError(results)
+    normalized: List[dict] = []
+    for r in results or []:
+        normalized.append(
+            {
+                "title":r.get("title") or "",
+                "url" : r.get("url") or "",
+                "snippet": r.get("snippet") or r.get("content") or "",
+                "published_at": r.get("published_date") or r.get("published_at"),
+                "source": r.get("source"),
+            }
+        )
+    return normalized
+
+def _search_one(search: Callable[..., List[dict]], query: str, max_results: int, recency_days: int) -> List[dict]:
+    """Cached search; backend failures with nothing cached become an empty result."""
     try:
-        tool = TavilySearchResults(max_results=max_results)
-        results=tool.invoke({"query":query})
-        normalized: List[dict] = []
-        for r in results or []:
-            normalized.append(
-                {
-                    "title":r.get("title") or "",
-                    "url" : r.get("url") or "",
-                    "snippet": r.get("snippet") or r.get("content") or "",
-                    "published_at": r.get("published_date") or r.get("published_at"),
-                    "source": r.get("source"),
-                }
-            )
-        return normalized
+        return cached_search(search, query, max_results, recency_days)
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Error searching Tavily: {e}")
         return []
 
+def _search_all(
+    queries: List[str],
+    max_results: int,
+    search: Optional[Callable[..., List[dict]]] = None,
+    recency_days: int = 3650,
+    query_timeout: float = QUERY_TIMEOUT_SECONDS,
+    stage_timeout: float = STAGE_TIMEOUT_SECONDS,
+) -> List[dict]:
+    """
+    Run all queries concurrently on the shared search pool.
+    A query that runs longer than query_timeout, or is still pending when
+    stage_timeout expires, is dropped; results of the others are returned
+    in query order.
+    """
+    search=search or _tavily_search
+    cond=threading.Condition()
+    started: dict = {}
+    results: dict = {}
+    errors: List[Exception] = []
+    abandoned: set = set()
+
+    def run(i: int, q: str):
+        # Queries dropped at the stage deadline while queued must not spend a rate slot
+        with cond:
+            if i in abandoned:
+                return
+        _rate_limiter.wait()
+        with cond:
+            if i in abandoned:
+                return
+            started[i]=time.monotonic()
+            cond.notify_all()
+        try:
+            res=_search_one(search, q, max_results, recency_days)
+        except Exception as e:
+            res=None
+            errors.append(e)
+        with cond:
+            results[i]=res or []
+            cond.notify_all()
+
+    stage_deadline=time.monotonic() + stage_timeout
+    for i, q in enumerate(queries):
+        # Carry the caller's context so search counters land on the research node's trace span
+        _executor.submit(contextvars.copy_context().run, run, i, q)
+
+    with cond:
+        while True:
+            now=time.monotonic()
+            for i, t in started.items():
+                if i not in results and i not in abandoned and now - t >= query_timeout:
+                    abandoned.add(i)
+                    print(f"[research] query timed out after {query_timeout:g}s: {queries[i]!r}")
+            unresolved=[i for i in range(len(queries)) if i not in results and i not in abandoned]
+            if not unresolved:
+                break
+            if now >= stage_deadline:
+                abandoned.update(unresolved)
+                print(f"[research] stage deadline reached, dropping {len(unresolved)} pending queries")
+                break
+            deadlines=[stage_deadline] + [started[i] + query_timeout for i in unresolved if i in started]
+            cond.wait(min(deadlines) - now)
+
+    if errors and not any(results.get(i) for i in range(len(queries))):
+        raise errors[0]
+    out: List[dict]=[]
+    for i in range(len(queries)):
+        if i in results and i not in abandoned:
+            out.extend(results[i])
+    return out
+
 def _iso_to_date(s: Optional[str]) -> Optional[date]:
     if not s:
         return None
@@ -42,44 +202,39 @@ def _iso_to_date(s: Optional[str]) -> Optional[date]:
         
     
 
-RESEARCH_SYSTEM="""You are a research synthesizer for technical writing.
-Given raw web search results, produce a deduplicated list of EvidenceItem objects.
-Rules:
-- Only include items with a non-empty url.
-- Prefer relevent + authoritative sources (company blogs, docs, reputable outlets).
-- If a published date is explicitly present in the result payload, keep it as YYYY-MM-DD.
-  If missing or unclear, set published_at=null. Do not guess
-- Keep snippets short
-- Deduplicate by url 
+RANK_SYSTEM="""You are a research assistant for technical writing.
+Given a topic and a numbered list of sources (title, source, date), return the
+indices of the sources that are relevant to the topic, most useful first.
+Prefer authoritative sources (company blogs, docs, reputable outlets).
+Leave out irrelevant sources. Only use indices from the list.
 """
+
+def _llm_rank(topic: str, evidence: List[EvidenceItem]) -> List[EvidenceItem]:
+    listing="\n".join(
+        f"{i}. {e.title} | {e.source or ''} | {e.published_at or 'undated'}" for i, e in enumerate(evidence)
+    )
+    ranking=llm.with_structured_output(EvidenceRanking).invoke(
+        [
+            SystemMessage(content=RANK_SYSTEM),
+            HumanMessage(content=f"Topic: {topic}\n\nSources:\n{listing}"),
+        ]
+    )
+    order=[i for i in dict.fromkeys(ranking.order) if 0 <= i < len(evidence)]
+    # An empty or invalid ranking keeps the local order rather than dropping all evidence
+    return [evidence[i] for i in order] or evidence
+
 def research_node(state: Blog_State)->dict:
     queries=(state.get("queries") or [])[:10]
     max_results=6
-    raw_results: List[dict]=[]
-    for q in queries:
-        raw_results.extend(_tavily_search(q, max_results=max_results))
+    raw_results=_search_all(queries, max_results=max_results, recency_days=int(state.get("recency_days", 3650)))
     if not raw_results:
         return {"evidence":[]}
-    extractor=llm.with_structured_output(EvidencePack)
-    pack=extractor.invoke(
-        [
-            SystemMessage(content=RESEARCH_SYSTEM),
-            HumanMessage(content=(
-                f"As-of date: {state['as_of']}\n"
-                f"Recency days: {state['recency_days']}\n\n"
-                f"Raw results: \n{raw_results}"))
-        ]
-    )
-    # Deduplicate by url
-    dedup={}
-    for e in pack.evidence:
-        if e.url:
-            dedup[e.url]=e
-    evidence = list(dedup.values())
+    as_of=date.fromisoformat(state["as_of"])
+    evidence=build_evidence(raw_results, today=as_of)
 
     if state.get("mode") == "open_book":
-        as_of=date.fromisoformat(state["as_of"])
         cutoff= as_of -timedelta(days=int(state["recency_days"]))
         evidence=[e for e in evidence if (d := _iso_to_date(e.published_at)) and d >=cutoff]
+    if EVIDENCE_LLM_RANK and len(evidence) > 1:
+        evidence=_llm_rank(state["topic"], evidence)
     return {"evidence":evidence}
-    
@@ -0,0 +1,76 @@
+"""
+Command-line runner for the blog graph.
+Run from project root:
+    python run_blog.py "Introduction to Python Decorators"
+    python run_blog.py --resume <thread_id>
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+from state.State import initial_state
+
+
+def _drain_images(timeout: float):
+    from nodes.image_generation_node import _service
+    if not _service.drain(timeout):
+        print("[run] some late images were still generating at exit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a blog post, or resume an interrupted run.")
+    parser.add_argument("topic", nargs="?", help="Blog topic")
+    parser.add_argument("--resume", metavar="THREAD_ID", help="Resume a run from its last checkpoint")
+    parser.add_argument("--as-of", default=date.today().isoformat())
+    parser.add_argument("--image-drain-seconds", type=float, default=600,
+                        help="How long to wait for late images before exiting")
+    args = parser.parse_args()
+    if not args.topic and not args.resume:
+        parser.error("give a topic or --resume THREAD_ID")
+
+    load_dotenv()
+    from Graph.graph import app, new_run_config, prepare_resume
+    from services.run_output import artifacts, init_manifest, run_output_dir
+
+    if args.resume:
+        config = prepare_resume(args.resume)
+        stream_input = None
+    else:
+        config = new_run_config()
+        # Each run writes into its own directory, named after its thread id
+        out_dir = run_output_dir(config["configurable"]["thread_id"])
+        init_manifest(out_dir, config["configurable"]["thread_id"], topic=args.topic)
+        stream_input = initial_state(args.topic, args.as_of, str(out_dir))
+    thread_id = config["configurable"]["thread_id"]
+    print(f"[run] thread_id={thread_id} (resume with: python run_blog.py --resume {thread_id})")
+
+    try:
+        for update in app.stream(stream_input, config=config, stream_mode="updates"):
+            for node in update:
+                print(f"[run] finished: {node}")
+    except Exception as e:
+        print(f"[run] failed: {e}")
+        print(f"[run] completed steps are saved; resume with: python run_blog.py --resume {thread_id}")
+        _drain_images(args.image_drain_seconds)
+        sys.exit(1)
+
+    # Images that missed the post's wait budget are still generating; fill them in before exiting
+    _drain_images(args.image_drain_seconds)
+    values = app.get_state(config).values
+    final = values.get("final", "")
+    print(f"[run] done ({len(final)} chars)")
+    if values.get("output_dir"):
+        for path in artifacts(values["output_dir"]):
+            print(f"[run] wrote {path}")
+    from services.tracing import format_summary, summarize_run
+    print(format_summary(summarize_run(thread_id)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+BM25 index over evidence titles and snippets.
+Built once per run (cached by evidence content) so the orchestrator and
+every worker pick the evidence relevant to them instead of a fixed
+prefix of the list.
+"""
+import hashlib
+import heapq
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+from Schemas.evidence_schema import EvidenceItem
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to what when "
+    "which why with you your vs via into about".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+class EvidenceIndex:
+    def __init__(self, evidence: Sequence[EvidenceItem], k1: float = 1.5, b: float = 0.75):
+        self.size = len(evidence)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len: List[int] = []
+        for doc_id, e in enumerate(evidence):
+            tokens = tokenize(f"{e.title} {e.snippet or ''}")
+            doc_len.append(len(tokens))
+            tf: Dict[str, int] = {}
+            for t in tokens:
+                tf[t] = tf.get(t, 0) + 1
+            for t, n in tf.items():
+                self.postings.setdefault(t, []).append((doc_id, n))
+        avgdl = (sum(doc_len) / self.size) if self.size else 0.0
+        # Per-document length normalisation, precomputed once
+        self.norm = [k1 * (1 - b + b * (dl / avgdl if avgdl else 0.0)) for dl in doc_len]
+        self.idf = {
+            t: math.log(1 + (self.size - len(p) + 0.5) / (len(p) + 0.5))
+            for t, p in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[int]:
+        """Indices of the top-k evidence items for the query, best first."""
+        scores: Dict[int, float] = {}
+        for t in set(tokenize(query)):
+            postings = self.postings.get(t)
+            if not postings:
+                continue
+            idf = self.idf[t]
+            for doc_id, tf in postings:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.norm[doc_id])
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [doc_id for doc_id, _ in best]
+
+    def select(self, query: str, k: int) -> List[int]:
+        """Like search, but falls back to the first k items when nothing matches."""
+        hits = self.search(query, k)
+        return hits or list(range(min(k, self.size)))
+
+
+_indexes: "OrderedDict[str, EvidenceIndex]" = OrderedDict()
+_lock = threading.Lock()
+_MAX_INDEXES = 16
+
+
+def _evidence_key(evidence: Sequence[EvidenceItem]) -> str:
+    h = hashlib.sha256()
+    for e in evidence:
+        h.update(f"{e.url}\0{e.title}\0{e.snippet or ''}\1".encode("utf-8"))
+    return h.hexdigest()
+
+
+def get_evidence_index(evidence: Sequence[EvidenceItem]) -> EvidenceIndex:
+    """Index for this evidence list, built on first use and reused for the rest of the run."""
+    key = _evidence_key(evidence)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = EvidenceIndex(evidence)
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def task_query(task) -> str:
+    return " ".join([task.title, task.goal, *task.bullets, *task.tags])
@@ -0,0 +1,315 @@
+"""
+Local evidence synthesis: raw search results -> deduplicated EvidenceItems.
+Does deterministically what the research LLM pass used to do:
+- canonicalize URLs (lowercase host, drop www./m., tracking params, fragments)
+  so the same page reached through different links collapses to one item;
+  the canonical form is only a dedup key, items keep the URL the search
+  returned (minus utm_* and click ids), since that is the link workers cite
+- drop near-duplicate snippets (syndicated or mirrored articles) with
+  MinHash over word shingles and LSH banding
+- parse published dates in the common formats into YYYY-MM-DD (unparseable
+  or ambiguous dates, like 03/04/2025 or "2 months ago", become None, never
+  guessed)
+- trim snippets at a word boundary
+- score source authority (docs, official blogs, known outlets) and order
+  the evidence by it
+"""
+import hashlib
+import re
+import struct
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from Schemas.evidence_schema import EvidenceItem
+
+SNIPPET_CHARS = 400
+NEAR_DUPLICATE_JACCARD = 0.6
+
+# Click ids never change the page, so they are also stripped from the URLs we emit
+CLICK_ID_PARAMS = frozenset("fbclid gclid dclid msclkid mc_cid mc_eid igshid yclid _hsenc _hsmi".split())
+# Only ignored when comparing URLs: on some sites these select content
+TRACKING_PARAMS = CLICK_ID_PARAMS | frozenset("ref ref_src ref_url spm cmpid share source".split())
+_STRIP_HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+
+# Higher is more authoritative; checked against the host and its parent domains
+AUTHORITY = {
+    "arxiv.org": 0.95, "acm.org": 0.95, "ieee.org": 0.95, "nature.com": 0.95,
+    "docs.python.org": 0.95, "python.org": 0.9, "developer.mozilla.org": 0.95,
+    "kubernetes.io": 0.9, "postgresql.org": 0.9, "rust-lang.org": 0.9, "go.dev": 0.9,
+    "openai.com": 0.9, "anthropic.com": 0.9, "deepmind.google": 0.9, "ai.meta.com": 0.9,
+    "research.google": 0.9, "microsoft.com": 0.85, "aws.amazon.com": 0.85, "cloud.google.com": 0.85,
+    "github.com": 0.8, "huggingface.co": 0.8, "pytorch.org": 0.9, "tensorflow.org": 0.9,
+    "reuters.com": 0.85, "apnews.com": 0.85, "bbc.co.uk": 0.8, "nytimes.com": 0.8,
+    "theverge.com": 0.7, "arstechnica.com": 0.75, "techcrunch.com": 0.7, "wired.com": 0.7,
+    "wikipedia.org": 0.7, "stackoverflow.com": 0.65,
+    "medium.com": 0.4, "dev.to": 0.4, "substack.com": 0.4, "reddit.com": 0.35,
+    "quora.com": 0.25, "pinterest.com": 0.1,
+}
+_TLD_AUTHORITY = {"gov": 0.9, "edu": 0.85, "org": 0.6, "io": 0.55}
+_HOST_HINTS = (("docs.", 0.8), ("developer.", 0.8), ("engineering.", 0.75), ("blog.", 0.6))
+DEFAULT_AUTHORITY = 0.5
+
+
+def canonical_host(host: str) -> str:
+    host = (host or "").lower().rstrip(".")
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    for prefix in _STRIP_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    return host
+
+
+def canonical_url(url: str) -> str:
+    """Stable key for a page: https, canonical host, no tracking params/fragment, sorted query."""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    for index_page in ("/index.html", "/index.htm", "/index.php"):
+        if path.endswith(index_page):
+            path = path[: -len(index_page)] or "/"
+    return urlunsplit((scheme, canonical_host(parts.netloc), path, urlencode(query), ""))
+
+
+def clean_url(url: str) -> str:
+    """The URL as given, minus utm_* and click-id params (scheme, host, path and other params untouched)."""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    pairs = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [(k, v) for k, v in pairs if not k.lower().startswith("utm_") and k.lower() not in CLICK_ID_PARAMS]
+    if len(kept) == len(pairs):
+        return url
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(kept), parts.fragment))
+
+
+def authority(url: str) -> float:
+    host = canonical_host(urlsplit(url if "://" in url else "https://" + url).netloc)
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        score = AUTHORITY.get(".".join(labels[i:]))
+        if score is not None:
+            return score
+    for prefix, score in _HOST_HINTS:
+        if host.startswith(prefix):
+            return score
+    return _TLD_AUTHORITY.get(labels[-1], DEFAULT_AUTHORITY) if host else 0.0
+
+
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%d %B %Y", "%d %b %Y", "%B %d, %Y", "%b %d, %Y",
+    "%B %d %Y", "%b %d %Y", "%b. %d, %Y",
+)
+_ISO_PREFIX = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+# Day and month order differ by locale, so only a part over 12 tells them apart
+_NUMERIC = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$")
+_RELATIVE = re.compile(r"^(\d+)\s+(minute|hour|day|week|month|year)s?\s+ago$")
+# Months and years have no fixed length, so "N months ago" stays unknown
+_RELATIVE_DAYS = {"minute": 0, "hour": 0, "day": 1, "week": 7}
+
+
+def parse_date(value, today: Optional[date] = None) -> Optional[str]:
+    """YYYY-MM-DD for the date formats search backends return, or None when unclear."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, timezone.utc).date().isoformat()
+        except (OverflowError, OSError, ValueError):
+            return None
+    s = str(value).strip()
+    m = _ISO_PREFIX.match(s)
+    if m:
+        try:
+            return date(int(m[1]), int(m[2]), int(m[3])).isoformat()
+        except ValueError:
+            return None
+    m = _NUMERIC.match(s)
+    if m:
+        a, b, year = int(m[1]), int(m[2]), int(m[3])
+        if a <= 12 and b <= 12 and a != b:
+            return None
+        day, month = (a, b) if a > 12 or a == b else (b, a)
+        try:
+            return date(year, month, day).isoformat()
+        except ValueError:
+            return None
+    s = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", s.replace("Sept", "Sep"))
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date().isoformat()
+        except ValueError:
+            pass
+    try:
+        # RFC 2822, e.g. "Tue, 14 Jan 2025 10:00:00 GMT"
+        return parsedate_to_datetime(s).date().isoformat()
+    except (TypeError, ValueError, IndexError):
+        pass
+    m = _RELATIVE.match(s.lower())
+    if m and today is not None and m[2] in _RELATIVE_DAYS:
+        return (today - timedelta(days=_RELATIVE_DAYS[m[2]] * int(m[1]))).isoformat()
+    return None
+
+
+def truncate(text: Optional[str], limit: int = SNIPPET_CHARS) -> str:
+    text = " ".join((text or "").split())
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[: cut if cut > limit // 2 else limit].rstrip(" ,;:-") + "…"
+
+
+_WORD_RE = re.compile(r"\w+")
+_MINHASH_KEYS = (b"blog-minhash-0", b"blog-minhash-1")
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+
+
+def shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """32-value MinHash signature of the text's word 3-shingles (two keyed blake2b digests of 16 lanes)."""
+    grams = [g.encode("utf-8") for g in shingles(text)]
+    if not grams:
+        return ()
+    signature: List[int] = []
+    for key in _MINHASH_KEYS:
+        rows = [struct.unpack("<16I", hashlib.blake2b(g, digest_size=64, key=key).digest()) for g in grams]
+        signature.extend(min(lane) for lane in zip(*rows))
+    return tuple(signature)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class _NearDuplicates:
+    """
+    MinHash LSH: signatures are split into 8 bands of 4 values and only
+    items sharing a band are compared, so lookups stay close to O(1) while
+    pairs above ~0.6 Jaccard almost always collide in some band.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_JACCARD):
+        self.threshold = threshold
+        self.bands: List[Dict[tuple, List[int]]] = [{} for _ in range(MINHASH_BANDS)]
+        self.signatures: List[Tuple[int, ...]] = []
+
+    def _keys(self, signature: Tuple[int, ...]):
+        for b in range(MINHASH_BANDS):
+            yield b, signature[b * MINHASH_ROWS:(b + 1) * MINHASH_ROWS]
+
+    def find(self, signature: Tuple[int, ...]) -> Optional[int]:
+        seen = set()
+        for b, key in self._keys(signature):
+            for i in self.bands[b].get(key, ()):
+                if i not in seen:
+                    seen.add(i)
+                    if similarity(signature, self.signatures[i]) >= self.threshold:
+                        return i
+        return None
+
+    def add(self, signature: Tuple[int, ...]) -> int:
+        i = len(self.signatures)
+        self.signatures.append(signature)
+        for b, key in self._keys(signature):
+            self.bands[b].setdefault(key, []).append(i)
+        return i
+
+
+def _source(result: dict, url: str) -> str:
+    return (result.get("source") or canonical_host(urlsplit(url).netloc)).strip()
+
+
+def _better(a: Tuple[float, int, Optional[str]], b: Tuple[float, int, Optional[str]]) -> bool:
+    # (authority, snippet length, date): prefer authority, then a dated item, then more text
+    return (a[0], a[2] is not None, a[1]) > (b[0], b[2] is not None, b[1])
+
+
+def build_evidence(raw_results: Iterable[dict], today: Optional[date] = None,
+                   snippet_chars: int = SNIPPET_CHARS, near_duplicate: float = NEAR_DUPLICATE_JACCARD,
+                   min_snippet_words: int = 8) -> List[EvidenceItem]:
+    """
+    Deduplicate and normalise raw search results (dicts with title, url,
+    snippet, published_at, source). When two results are the same page or
+    near-duplicate text, the more authoritative one is kept. Output is
+    ordered by authority, then by the order results arrived in.
+    """
+    kept: List[dict] = []
+    by_url: Dict[str, int] = {}
+    near = _NearDuplicates(near_duplicate)
+    near_to_kept: List[int] = []
+    for r in raw_results:
+        key = canonical_url(r.get("url") or "")
+        if not key:
+            continue
+        url = clean_url(r["url"])
+        snippet = " ".join((r.get("snippet") or r.get("content") or "").split())
+        candidate = {
+            "url": url,
+            "title": " ".join((r.get("title") or "").split()) or url,
+            "snippet": snippet,
+            "published_at": parse_date(r.get("published_at") or r.get("published_date"), today),
+            "source": _source(r, url),
+            "authority": authority(url),
+            "order": len(kept),
+        }
+        slot = by_url.get(key)
+        if slot is None and len(snippet.split()) >= min_snippet_words:
+            signature = minhash(snippet)
+            match = near.find(signature)
+            if match is None:
+                near_to_kept.append(len(kept))
+                near.add(signature)
+            else:
+                slot = near_to_kept[match]
+        if slot is None:
+            by_url[key] = len(kept)
+            kept.append(candidate)
+            continue
+        current = kept[slot]
+        if _better((candidate["authority"], len(snippet), candidate["published_at"]),
+                   (current["authority"], len(current["snippet"]), current["published_at"])):
+            candidate["order"] = current["order"]
+            candidate["published_at"] = candidate["published_at"] or current["published_at"]
+            kept[slot] = candidate
+            by_url[key] = slot
+        elif current["published_at"] is None:
+            current["published_at"] = candidate["published_at"]
+    kept.sort(key=lambda c: (-c["authority"], c["order"]))
+    return [
+        EvidenceItem(title=c["title"], url=c["url"], source=c["source"] or None,
+                     published_at=c["published_at"], snippet=truncate(c["snippet"], snippet_chars) or None)
+        for c in kept
+    ]
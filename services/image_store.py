@@ -0,0 +1,217 @@
+"""
+Content-addressed store for generated images.
+Images are keyed by a hash of everything that determines the pixels
+(prompt, size, seed, steps, model, scheduler, guidance), not by the
+filename the LLM picked, so a repeated diagram prompt is generated once
+and reused across posts, and a new prompt under an old filename is never
+served a stale image.
+
+Blobs live under <dir>/<key[:2]>/<key>.png with a small SQLite index
+(size, last access, hit count) used for LRU eviction by entry count and
+total bytes. Posts get a hardlink to the blob (falls back to a symlink or
+a copy), so evicting a blob never breaks a post that already uses it.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from services.kv_cache import default_cache_dir
+
+STORE_ENABLED = os.getenv("BLOG_IMAGE_STORE", "1") != "0"
+STORE_DIR = os.getenv("BLOG_IMAGE_STORE_DIR", os.path.join(default_cache_dir(), "images"))
+STORE_MAX_ENTRIES = int(os.getenv("BLOG_IMAGE_STORE_MAX_ENTRIES", "2000"))
+STORE_MAX_MB = float(os.getenv("BLOG_IMAGE_STORE_MAX_MB", "1024"))
+# hardlink | symlink | copy
+LINK_MODE = os.getenv("BLOG_IMAGE_STORE_LINK", "hardlink").lower()
+
+
+def image_key(prompt: str, width: int, height: int, seed: int, steps: int, model: str,
+              scheduler: str = "", guidance_scale: Optional[float] = None) -> str:
+    payload = {"prompt": prompt.strip(), "width": width, "height": height, "seed": seed, "steps": steps,
+               "model": model, "scheduler": scheduler, "guidance_scale": guidance_scale}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    def __init__(self, root: str, max_entries: int = STORE_MAX_ENTRIES,
+                 max_bytes: Optional[int] = int(STORE_MAX_MB * 1024 * 1024), link_mode: str = LINK_MODE):
+        self.root = Path(root).resolve()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.link_mode = link_mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, prompt TEXT NOT NULL, hits INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS images_accessed ON images(accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._conn.commit()
+
+    def blob_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def _count(self, name: str):
+        # Caller holds the lock. Lifetime counters, shared by every process using the store.
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value=value+1",
+            (name,),
+        )
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Path of the stored image, or None. Counts a hit or a miss."""
+        path = self.blob_path(key)
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM images WHERE key=?", (key,)).fetchone()
+            if row is not None and not path.exists():
+                # Blob deleted behind our back: forget it
+                self._conn.execute("DELETE FROM images WHERE key=?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                self._count("misses")
+            else:
+                self.hits += 1
+                self._count("hits")
+                self._conn.execute(
+                    "UPDATE images SET accessed_at=?, hits=hits+1 WHERE key=?", (time.time(), key)
+                )
+            self._conn.commit()
+        return path if row is not None else None
+
+    def put(self, key: str, data: bytes, prompt: str = "") -> Path:
+        path = self.blob_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{key}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, size, prompt, hits, created_at, accessed_at) "
+                "VALUES (?, ?, ?, COALESCE((SELECT hits FROM images WHERE key=?), 0), ?, ?)",
+                (key, len(data), prompt[:500], key, now, now),
+            )
+            doomed = self._evict()
+            self._conn.commit()
+        for k in doomed:
+            self.blob_path(k).unlink(missing_ok=True)
+        return path
+
+    def link(self, key: str, dest: Path) -> bool:
+        """Place the stored image at `dest` (replacing whatever is there). False if not stored."""
+        src = self.blob_path(key)
+        if not src.exists():
+            return False
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        modes = {"hardlink": ("hardlink", "copy"), "symlink": ("symlink", "copy")}.get(self.link_mode, ("copy",))
+        for mode in modes:
+            try:
+                if mode == "hardlink":
+                    os.link(src, tmp)
+                elif mode == "symlink":
+                    os.symlink(src, tmp)
+                else:
+                    shutil.copyfile(src, tmp)
+                break
+            except OSError:
+                # e.g. a post directory on another filesystem: fall through to a copy
+                tmp.unlink(missing_ok=True)
+        else:
+            return False
+        os.replace(tmp, dest)
+        return True
+
+    def _evict(self) -> List[str]:
+        # Caller holds the lock. Least recently used blobs go first; returns the evicted keys.
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+        if count <= self.max_entries and (self.max_bytes is None or total <= self.max_bytes):
+            return []
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM images ORDER BY accessed_at ASC").fetchall():
+            if count <= self.max_entries and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            doomed.append(key)
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM images WHERE key=?", [(k,) for k in doomed])
+        return doomed
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            top = self._conn.execute(
+                "SELECT prompt, hits, size FROM images WHERE hits > 0 ORDER BY hits DESC LIMIT 5"
+            ).fetchall()
+        lookups = self.hits + self.misses
+        lifetime = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "lifetime_hits": counters.get("hits", 0),
+            "lifetime_misses": counters.get("misses", 0),
+            "lifetime_hit_rate": (counters.get("hits", 0) / lifetime) if lifetime else 0.0,
+            "top_prompts": [{"prompt": p, "hits": h, "bytes": s} for p, h, s in top],
+        }
+
+
+_store: Optional[ImageStore] = None
+_enabled = STORE_ENABLED
+_lock = threading.Lock()
+
+
+def configure_image_store(enabled: bool = True, path: Optional[str] = None, **kwargs):
+    global _store, _enabled
+    with _lock:
+        _enabled = enabled
+        _store = ImageStore(path, **kwargs) if enabled and path else None
+
+
+def get_image_store() -> Optional[ImageStore]:
+    global _store
+    if not _enabled:
+        return None
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = ImageStore(STORE_DIR)
+    return _store
+
+
+def format_report(stats: dict) -> str:
+    """Plain-text hit-rate report of `ImageStore.stats()`."""
+    lines = [
+        f"image store: {stats['entries']} images, {stats['bytes'] / 1e6:.1f} MB",
+        f"  this process: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%})",
+        f"  lifetime:     {stats['lifetime_hits']} hits / {stats['lifetime_misses']} misses "
+        f"({stats['lifetime_hit_rate']:.0%})",
+    ]
+    for p in stats["top_prompts"]:
+        lines.append(f"  {p['hits']:>4}x  {p['prompt'][:70]}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    store = get_image_store()
+    print(format_report(store.stats()) if store is not None else "image store disabled (BLOG_IMAGE_STORE=0)")
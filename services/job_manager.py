@@ -0,0 +1,346 @@
+"""
+In-process background jobs for graph runs.
+Long-lived hosts (the Streamlit app, the HTTP API) submit a run here and
+poll it instead of streaming the graph in the request thread, so a
+browser refresh or a second visitor neither blocks on nor restarts
+somebody else's run. Runs execute on a bounded thread pool
+(BLOG_MAX_JOBS); each job keeps its status, the text of its sections as
+they stream in, and an event log that readers follow by sequence number.
+
+Cancelling is cooperative: the job stops at its next stream event and
+workers stop at their next chunk (`raise_if_cancelled`). Completed steps
+stay checkpointed, so a cancelled job can be resumed by its id (the
+run's thread id).
+"""
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from services.run_output import init_manifest, run_output_dir
+from state.State import initial_state
+
+MAX_JOBS = int(os.getenv("BLOG_MAX_JOBS", "2"))
+JOBS_KEPT = int(os.getenv("BLOG_JOBS_KEPT", "100"))
+# Chunk events beyond this many are not logged (section text still accumulates)
+MAX_EVENTS_PER_JOB = int(os.getenv("BLOG_JOB_MAX_EVENTS", "20000"))
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+
+# Thread ids of runs asked to stop; checked by nodes through raise_if_cancelled()
+_cancelled: set = set()
+_cancelled_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def raise_if_cancelled():
+    """Raise JobCancelled inside a node whose run has been cancelled; no-op otherwise."""
+    if not _cancelled:
+        return
+    from langgraph.config import get_config
+    try:
+        thread_id = (get_config().get("configurable") or {}).get("thread_id")
+    except RuntimeError:
+        return
+    if thread_id in _cancelled:
+        raise JobCancelled(f"run {thread_id} cancelled")
+
+
+def request_stop(thread_id: str):
+    """Ask the run with this thread id to stop at its next chunk or stream event."""
+    with _cancelled_lock:
+        _cancelled.add(thread_id)
+
+
+def stop_requested(thread_id: str) -> bool:
+    return thread_id in _cancelled
+
+
+def clear_stop(thread_id: str):
+    with _cancelled_lock:
+        _cancelled.discard(thread_id)
+
+
+class Job:
+    """One graph run; readers poll snapshot() or follow events_since()."""
+
+    def __init__(self, job_id: str, topic: str, output_dir: str = "", resumed: bool = False):
+        self.id = job_id
+        self.topic = topic
+        self.output_dir = output_dir
+        self.resumed = resumed
+        self.status = QUEUED
+        self.title: Optional[str] = None
+        self.current_node: Optional[str] = None
+        self.final = ""
+        self.error: Optional[str] = None
+        self.traceback: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future = None
+        # task_id -> {"title", "text", "done", "reused"}, in plan order once the plan is known
+        self._sections: "OrderedDict[int, dict]" = OrderedDict()
+        self._sections_total = 0
+        self._events: List[dict] = []
+        self._dropped_chunks = 0
+        self._cond = threading.Condition()
+        self._cancel = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(self.done, timeout)
+
+    def events_since(self, after: int = 0, timeout: Optional[float] = None) -> List[dict]:
+        """Events with seq > `after`; waits up to `timeout` for one if there are none yet."""
+        with self._cond:
+            if timeout and len(self._events) <= after and not self.done():
+                self._cond.wait_for(lambda: len(self._events) > after or self.done(), timeout)
+            return self._events[after:]
+
+    def snapshot(self, include_text: bool = True) -> dict:
+        with self._cond:
+            sections = [
+                {"task_id": task_id, "title": s["title"], "done": s["done"], "reused": s["reused"],
+                 **({"text": s["text"]} if include_text else {"chars": len(s["text"])})}
+                for task_id, s in self._sections.items()
+            ]
+            return {
+                "id": self.id,
+                "topic": self.topic,
+                "title": self.title,
+                "status": self.status,
+                "resumed": self.resumed,
+                "current_node": self.current_node,
+                "sections": sections,
+                "sections_done": sum(1 for s in sections if s["done"]),
+                "sections_total": max(self._sections_total, len(sections)),
+                "output_dir": self.output_dir,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "events": len(self._events),
+                "final_chars": len(self.final),
+            }
+
+    # -- updates, called from the job's thread ---------------------------------
+
+    def _emit(self, type_: str, **data):
+        # Caller holds the condition
+        if type_ == "section_chunk" and len(self._events) >= MAX_EVENTS_PER_JOB:
+            self._dropped_chunks += 1
+            return
+        self._events.append({"seq": len(self._events) + 1, "type": type_, "t": time.time(), **data})
+        self._cond.notify_all()
+
+    def _set_status(self, status: str, error: Optional[str] = None):
+        with self._cond:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            if status in FINISHED:
+                self.finished_at = time.time()
+                self.error = error
+            self._emit("status", status=status, **({"error": error} if error else {}))
+
+    def _section(self, task_id, title: Optional[str]) -> dict:
+        # Caller holds the condition
+        section = self._sections.get(task_id)
+        if section is None:
+            section = self._sections[task_id] = {"title": title or "", "text": "", "done": False,
+                                                 "reused": False}
+        elif title and not section["title"]:
+            section["title"] = title
+        return section
+
+    def _set_plan(self, plan):
+        with self._cond:
+            self.title = plan.blog_title
+            self._sections_total = len(plan.tasks)
+            # Reserve slots in plan order so sections render in place
+            ordered = OrderedDict((t.id, self._section(t.id, t.title)) for t in plan.tasks)
+            for task_id, section in self._sections.items():
+                ordered.setdefault(task_id, section)
+            self._sections = ordered
+
+    def _on_custom(self, event: dict):
+        if event.get("type") not in ("section_chunk", "section_done"):
+            return
+        with self._cond:
+            section = self._section(event.get("task_id"), event.get("title"))
+            if event["type"] == "section_chunk":
+                section["text"] += event.get("text", "")
+            else:
+                section.update(text=event.get("text", ""), done=True, reused=bool(event.get("reused")))
+            self._emit(event["type"], task_id=event.get("task_id"), title=section["title"],
+                       text=event.get("text", ""), **({"reused": True} if event.get("reused") else {}))
+
+    def _on_update(self, node: str, values):
+        if isinstance(values, dict):
+            if values.get("plan") is not None:
+                self._set_plan(values["plan"])
+            if values.get("final"):
+                self.final = values["final"]
+        with self._cond:
+            self.current_node = node
+            self._emit("node", node=node)
+
+
+class JobManager:
+    """
+    Runs graph jobs on a bounded thread pool. All jobs share the process's
+    LLM, search and image budgets, so BLOG_MAX_JOBS bounds how many posts
+    make progress at once rather than how much load the backends see.
+    """
+
+    def __init__(self, max_jobs: int = MAX_JOBS, graph=None, new_config: Optional[Callable[..., dict]] = None,
+                 prepare_resume: Optional[Callable[..., dict]] = None, output_root: Optional[str] = None,
+                 keep: int = JOBS_KEPT):
+        self.max_jobs = max(1, max_jobs)
+        self._graph = graph
+        self._new_config = new_config
+        self._prepare_resume = prepare_resume
+        self.output_root = output_root
+        self.keep = keep
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="blog-job")
+
+    def _runtime(self):
+        if self._graph is None or self._new_config is None or self._prepare_resume is None:
+            from Graph.graph import app, new_run_config, prepare_resume
+            self._graph = self._graph or app
+            self._new_config = self._new_config or new_run_config
+            self._prepare_resume = self._prepare_resume or prepare_resume
+        return self._graph
+
+    def submit(self, topic: str, as_of: Optional[str] = None) -> Job:
+        """Queue a new run of `topic`; returns immediately."""
+        graph = self._runtime()
+        config = self._new_config()
+        thread_id = config["configurable"]["thread_id"]
+        out_dir = run_output_dir(thread_id, self.output_root)
+        init_manifest(out_dir, thread_id, topic=topic)
+        job = Job(thread_id, topic, str(out_dir))
+        state = initial_state(topic, as_of or date.today().isoformat(), str(out_dir))
+        return self._start(job, graph, state, config)
+
+    def resume(self, thread_id: str) -> Job:
+        """Continue an interrupted or cancelled run from its last checkpoint."""
+        with self._lock:
+            current = self._jobs.get(thread_id)
+            if current is not None and not current.done():
+                raise ValueError(f"Job {thread_id} is still {current.status}")
+        graph = self._runtime()
+        config = self._prepare_resume(thread_id, graph)
+        values = graph.get_state(config).values
+        job = Job(thread_id, values.get("topic", ""), values.get("output_dir") or "", resumed=True)
+        if values.get("plan") is not None:
+            job._set_plan(values["plan"])
+        for task_id, section_md in values.get("sections") or []:
+            job._on_custom({"type": "section_done", "task_id": task_id, "text": section_md, "reused": True})
+        return self._start(job, graph, None, config)
+
+    def _start(self, job: Job, graph, stream_input, config: dict) -> Job:
+        with self._lock:
+            self._jobs[job.id] = job
+            self._jobs.move_to_end(job.id)
+            self._prune()
+        job.future = self._pool.submit(self._run, job, graph, stream_input, config)
+        print(f"[jobs] queued {job.id} ({'resume' if job.resumed else job.topic})")
+        return job
+
+    def _prune(self):
+        # Caller holds the lock. Forget the oldest finished jobs beyond `keep`.
+        finished = [job_id for job_id, job in self._jobs.items() if job.done()]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job, graph, stream_input, config: dict):
+        if job.cancel_requested:
+            job._set_status(CANCELLED)
+            return
+        job._set_status(RUNNING)
+        try:
+            for mode, event in graph.stream(stream_input, config=config, stream_mode=["updates", "custom"]):
+                if job.cancel_requested:
+                    raise JobCancelled(f"run {job.id} cancelled")
+                if mode == "custom":
+                    job._on_custom(event)
+                else:
+                    for node, values in event.items():
+                        job._on_update(node, values)
+            job._set_status(DONE)
+            print(f"[jobs] done {job.id} ({len(job.final)} chars)")
+        except JobCancelled:
+            job._set_status(CANCELLED)
+            print(f"[jobs] cancelled {job.id}; completed steps are checkpointed")
+        except Exception as e:
+            job.traceback = traceback.format_exc()
+            job._set_status(ERROR, f"{type(e).__name__}: {e}")
+            print(f"[jobs] failed {job.id}: {e}")
+        finally:
+            clear_stop(job.id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a queued or running job to stop. False if it is unknown or already finished."""
+        job = self.get(job_id)
+        if job is None or job.done():
+            return False
+        job._cancel.set()
+        request_stop(job.id)
+        if job.future is not None and job.future.cancel():
+            # Never started: settle it here since _run will not
+            job._set_status(CANCELLED)
+            clear_stop(job.id)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {"max_jobs": self.max_jobs, **{s: statuses.count(s) for s in (QUEUED, RUNNING, *FINISHED)}}
+
+    def shutdown(self, cancel: bool = True, wait: bool = True):
+        if cancel:
+            for job in self.list():
+                self.cancel(job.id)
+        self._pool.shutdown(wait=wait)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """The process-wide job manager (built on first use)."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
@@ -0,0 +1,149 @@
+"""
+Small persistent key/value store on SQLite.
+Entries carry their write time (for TTL checks) and last access time
+(for LRU eviction by entry count and total size).
+Entry count and byte size are tracked as running totals so writes do not
+scan the table; they are re-read from the table when eviction runs and every
+RESYNC_EVERY writes, which also picks up rows written by other processes.
+"""
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+RESYNC_EVERY = 500
+
+
+class SqliteCache:
+    def __init__(self, path: str, table: str = "cache", max_entries: int = 10000,
+                 max_bytes: Optional[int] = None):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)"
+            )
+            self._conn.commit()
+            self._resync()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """Return (value, created_at), or None if missing or older than max_age seconds."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key=?", (key,)
+            ).fetchone()
+            if row is None or (max_age is not None and now - row[1] > max_age):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at=? WHERE key=?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return row[0], row[1]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute(
+                f"SELECT size FROM {self.table} WHERE key=?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._count += old is None
+            self._bytes += size - (old[0] if old else 0)
+            self._writes += 1
+            if self._writes >= RESYNC_EVERY:
+                self._resync()
+            if self._over_limit():
+                self._evict()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT size FROM {self.table} WHERE key=?", (key,)
+            ).fetchone()
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key=?", (key,))
+            self._conn.commit()
+            if row is not None:
+                self._count -= 1
+                self._bytes -= row[0]
+
+    def purge_expired(self, max_age: float) -> int:
+        """Drop entries older than max_age seconds; returns how many were removed."""
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - max_age,)
+            )
+            self._conn.commit()
+            self._resync()
+            return cur.rowcount
+
+    def _resync(self):
+        # Caller holds the lock.
+        self._count, self._bytes = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        self._writes = 0
+
+    def _over_limit(self) -> bool:
+        return self._count > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        )
+
+    def _evict(self):
+        # Caller holds the lock. Least recently accessed entries go first, until both
+        # the count and the size limits hold.
+        self._resync()
+        if not self._over_limit():
+            return
+        doomed = []
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ):
+            if not self._over_limit():
+                break
+            doomed.append((key,))
+            self._count -= 1
+            self._bytes -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key=?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def default_cache_dir() -> str:
+    return os.getenv("BLOG_CACHE_DIR", ".cache")
@@ -0,0 +1,280 @@
+"""
+Shared LLM gateway used by every node.
+Holds one chat client per model and a persistent response cache keyed by
+model, messages (system prompt included) and output schema, so reruns of
+the same topic do not pay for the same calls twice.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+from langchain_core.messages import AIMessage
+from dotenv import load_dotenv
+
+from services import tracing
+from services.kv_cache import SqliteCache, default_cache_dir
+from services.rate_limiter import RateLimiter, estimate_tokens
+
+load_dotenv()
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+CACHE_ENABLED = os.getenv("BLOG_LLM_CACHE", "1") != "0"
+CACHE_TTL_SECONDS = float(os.getenv("BLOG_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("BLOG_LLM_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_MB = float(os.getenv("BLOG_LLM_CACHE_MAX_MB", "200"))
+# Process-wide limits shared by every run in the process
+LLM_CONCURRENCY = int(os.getenv("BLOG_LLM_CONCURRENCY", "16"))
+LLM_RPM = float(os.getenv("BLOG_OPENAI_RPM", "500"))
+LLM_TPM = float(os.getenv("BLOG_OPENAI_TPM", "200000"))
+LLM_MAX_RETRIES = int(os.getenv("BLOG_LLM_MAX_RETRIES", "6"))
+# Output allowance added to the prompt estimate before the real usage is known
+LLM_EST_OUTPUT_TOKENS = int(os.getenv("BLOG_LLM_EST_OUTPUT_TOKENS", "1000"))
+
+_clients: dict = {}
+_client_factory: Optional[Callable[[str], object]] = None
+_cache: Optional[SqliteCache] = None
+_cache_enabled = CACHE_ENABLED
+_lock = threading.Lock()
+_schema_keys: dict = {}
+_limiter = RateLimiter(LLM_RPM, LLM_TPM, LLM_CONCURRENCY, max_retries=LLM_MAX_RETRIES)
+
+
+def _default_factory(model: str):
+    from langchain_openai import ChatOpenAI
+    # Retries (429s, connection errors, timeouts, 5xx) are done by the shared rate limiter,
+    # which knows about every other caller
+    return ChatOpenAI(model=model, max_retries=0, stream_usage=True)
+
+
+def set_client_factory(factory: Optional[Callable[[str], object]]):
+    """Swap the backend (e.g. a fake model for benchmarks). None restores ChatOpenAI."""
+    global _client_factory
+    with _lock:
+        _client_factory = factory
+        _clients.clear()
+
+
+def get_client(model: str = DEFAULT_MODEL):
+    client = _clients.get(model)
+    if client is None:
+        with _lock:
+            client = _clients.get(model)
+            if client is None:
+                client = (_client_factory or _default_factory)(model)
+                _clients[model] = client
+    return client
+
+
+def configure_rate_limits(requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                          max_concurrency: Optional[int] = None, **kwargs) -> RateLimiter:
+    """Replace the shared limiter (unset values keep the env defaults). Extra kwargs go to RateLimiter."""
+    global _limiter
+    with _lock:
+        _limiter = RateLimiter(
+            requests_per_minute or LLM_RPM,
+            tokens_per_minute or LLM_TPM,
+            max_concurrency or LLM_CONCURRENCY,
+            **{"max_retries": LLM_MAX_RETRIES, **kwargs},
+        )
+        return _limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _limiter
+
+
+def set_llm_concurrency(limit: int):
+    """Resize the global in-flight budget. Calls already running keep their slot."""
+    _limiter.concurrency.set_max(int(limit))
+
+
+def concurrency_stats() -> dict:
+    """Limiter counters: calls, 429s, retries, current limit and in-flight peak since the last reset."""
+    return _limiter.stats()
+
+
+def reset_concurrency_stats():
+    _limiter.reset_stats()
+
+
+def configure_cache(enabled: bool = True, path: Optional[str] = None):
+    """Turn the response cache on/off, optionally pointing it at another file."""
+    global _cache, _cache_enabled
+    with _lock:
+        _cache_enabled = enabled
+        _cache = None
+        if enabled and path:
+            _cache = _open_cache(path)
+
+
+def _open_cache(path: str) -> SqliteCache:
+    return SqliteCache(
+        path,
+        table="llm_responses",
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+    )
+
+
+def get_cache() -> Optional[SqliteCache]:
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                path = os.getenv(
+                    "BLOG_LLM_CACHE_PATH", os.path.join(default_cache_dir(), "llm_cache.sqlite")
+                )
+                _cache = _open_cache(path)
+    return _cache
+
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    return cache.stats() if cache else {"enabled": False}
+
+
+def _schema_key(schema) -> Optional[str]:
+    if schema is None:
+        return None
+    key = _schema_keys.get(schema)
+    if key is None:
+        key = json.dumps(schema.model_json_schema(), sort_keys=True)
+        _schema_keys[schema] = key
+    return key
+
+
+def cache_key(model: str, messages: List, schema=None) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "schema": _schema_key(schema),
+            "messages": [(m.type, m.content) for m in messages],
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedLLM:
+    """
+    Minimal chat-model facade: `invoke(messages)`, `stream(messages)` and
+    `with_structured_output(schema).invoke(messages)`, served from the
+    shared cache when possible.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, schema=None):
+        self.model = model
+        self.schema = schema
+
+    def with_structured_output(self, schema) -> "CachedLLM":
+        return CachedLLM(self.model, schema)
+
+    def invoke(self, messages: List):
+        cache = get_cache()
+        key = cache_key(self.model, messages, self.schema) if cache else None
+        if cache:
+            hit = cache.get(key, max_age=CACHE_TTL_SECONDS)
+            if hit is not None:
+                tracing.add("llm_cache_hits")
+                return self._decode(hit[0])
+
+        client = get_client(self.model)
+        limiter = _limiter
+        started = time.monotonic()
+        for attempt in limiter.attempts(estimate_tokens(messages, LLM_EST_OUTPUT_TOKENS)):
+            with attempt:
+                if self.schema is not None:
+                    raw, result = _unwrap_structured(
+                        client.with_structured_output(self.schema, include_raw=True).invoke(messages)
+                    )
+                else:
+                    raw = result = client.invoke(messages)
+                usage = _usage(raw)
+                attempt.used_tokens(sum(usage) if usage else None)
+
+        encoded = self._encode(result)
+        _trace_call(self.model, messages, usage, encoded, time.monotonic() - started)
+        if cache:
+            cache.set(key, encoded)
+        return result
+
+    def stream(self, messages: List) -> Iterator[str]:
+        """
+        Yield response text as it is generated. A cached response is
+        yielded as a single chunk; a fresh one is cached once complete.
+        """
+        if self.schema is not None:
+            raise ValueError("stream() is only available for plain-text calls")
+        cache = get_cache()
+        key = cache_key(self.model, messages) if cache else None
+        if cache:
+            hit = cache.get(key, max_age=CACHE_TTL_SECONDS)
+            if hit is not None:
+                tracing.add("llm_cache_hits")
+                yield hit[0]
+                return
+
+        parts = []
+        usage = None
+        limiter = _limiter
+        started = time.monotonic()
+        for attempt in limiter.attempts(estimate_tokens(messages, LLM_EST_OUTPUT_TOKENS)):
+            with attempt:
+                for chunk in get_client(self.model).stream(messages):
+                    # With stream_usage the last chunk carries the token counts
+                    usage = _usage(chunk) or usage
+                    text = chunk.content if isinstance(chunk.content, str) else ""
+                    if text:
+                        # Output already went to the caller; a retry would repeat it
+                        attempt.retryable = False
+                        parts.append(text)
+                        yield text
+                attempt.used_tokens(sum(usage) if usage else None)
+        _trace_call(self.model, messages, usage, "".join(parts), time.monotonic() - started)
+        if cache and parts:
+            cache.set(key, "".join(parts))
+
+    def _encode(self, result) -> str:
+        if self.schema is not None:
+            return result.model_dump_json()
+        return result.content
+
+    def _decode(self, value: str):
+        if self.schema is not None:
+            return self.schema.model_validate_json(value)
+        return AIMessage(content=value)
+
+
+def _unwrap_structured(out) -> tuple:
+    """(raw message, parsed object) from an include_raw=True structured call."""
+    if isinstance(out, dict) and "parsed" in out:
+        if out.get("parsing_error") is not None:
+            raise out["parsing_error"]
+        if out["parsed"] is None:
+            raise ValueError("model returned no structured output")
+        return out.get("raw"), out["parsed"]
+    # Clients that ignore include_raw (e.g. fakes) return the object itself
+    return None, out
+
+
+def _usage(message) -> Optional[tuple]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    if not usage.get("input_tokens") and not usage.get("output_tokens"):
+        return None
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+def _trace_call(model: str, messages: List, usage: Optional[tuple], output: str, seconds: float):
+    if usage:
+        tracing.record_llm_call(model, usage[0], usage[1], seconds)
+    else:
+        tracing.record_llm_call(model, estimate_tokens(messages, 0), len(output) // 4, seconds, estimated=True)
+
+
+def get_llm(model: str = DEFAULT_MODEL) -> CachedLLM:
+    return CachedLLM(model)
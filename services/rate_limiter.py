@@ -0,0 +1,347 @@
+"""
+Process-wide rate limiting for model calls.
+Every LLM request reserves from a requests/min and a tokens/min bucket
+(tokens estimated from the prompt, corrected from reported usage), then
+takes a concurrency slot. Both the request rate and the concurrency
+limit adapt AIMD-style: they creep back up on healthy calls (the rate by
+a fixed step per window, not per call), are halved on a wave of 429s,
+and concurrency is trimmed when latency per token climbs well above its
+best observed level. 429s are retried with full-jitter
+backoff, honouring Retry-After, and pause every caller until it passes,
+so a burst of rejections does not turn into a retry storm. Connection
+errors, timeouts and 5xx answers are retried with the same backoff but
+leave the rate and concurrency alone (the SDK's own retries are off).
+"""
+import random
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+
+class TokenBucket:
+    """
+    Reservation-style token bucket refilled at `per_minute / 60` per second.
+    `reserve` always succeeds and returns how long the caller must wait, so
+    waiters are served in order without polling.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.rate = max(per_minute, 1e-9) / 60.0
+        self.max_rate = self.rate
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._last_rate_change = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, amount: float):
+        """Give back (positive) or charge (negative) tokens after the fact."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def drain(self):
+        """Drop any saved-up burst so callers wait for fresh refill."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, 0.0)
+
+    def scale_rate(self, factor: float, floor: float = 0.05):
+        """Multiply the refill rate, never below `floor` of the configured rate."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.max_rate * floor, self.rate * factor)
+            self._last_rate_change = now
+
+    def recover_rate(self, fraction: float, interval: float = 1.0):
+        """
+        Raise the refill rate by `fraction` of the configured rate, up to that
+        rate, at most once per `interval` seconds since the last change. The
+        increase is per window rather than per call, so it does not grow with
+        the request rate and outrun the once-per-window cut.
+        """
+        with self._lock:
+            now = self._clock()
+            if self.rate < self.max_rate and now - self._last_rate_change >= interval:
+                self._refill(now)
+                self.rate = min(self.max_rate, self.rate + self.max_rate * fraction)
+                self._last_rate_change = now
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit between `min_limit` and `max_limit`, adjusted by
+    additive increase / multiplicative decrease. Decreases happen at most
+    once per `cooldown` seconds, so one wave of 429s halves the limit once.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, cooldown: float = 1.0,
+                 latency_factor: float = 3.0):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.cooldown = cooldown
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._best_per_token: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def set_max(self, max_limit: int):
+        with self._cond:
+            self.max_limit = max(1, max_limit)
+            self.min_limit = min(self.min_limit, self.max_limit)
+            self.limit = float(self.max_limit)
+            self._cond.notify_all()
+
+    def on_success(self, latency: float, tokens: float):
+        with self._cond:
+            per_token = latency / max(tokens, 1.0)
+            best = self._best_per_token
+            # Slowly forget the best level so a permanently slower model is not punished forever
+            self._best_per_token = per_token if best is None else min(per_token, best * 1.01)
+            if best is not None and per_token > best * self.latency_factor:
+                self._decrease(0.9)
+                return
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self._decrease(0.5)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for a retryable 429 (an exhausted quota is a 429 too, but retrying will not help)."""
+    if getattr(error, "code", None) == "insufficient_quota":
+        return False
+    return _status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+# openai.APIConnectionError (timeouts included) and httpx's transport errors, matched by name
+_TRANSIENT_ERROR_TYPES = {"APIConnectionError", "TransportError"}
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for failures the OpenAI SDK would retry besides 429: connection errors, timeouts, 408/409 and 5xx."""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    return any(cls.__name__ in _TRANSIENT_ERROR_TYPES for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def estimate_tokens(messages: List, output_tokens: int = 1000) -> int:
+    """Rough prompt size (~4 characters per token, plus per-message overhead) plus an output allowance."""
+    chars = 0
+    for m in messages:
+        content = getattr(m, "content", m)
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // 4 + 4 * len(messages) + output_tokens
+
+
+class RateLimiter:
+    """
+    Shared gate for model calls. Use as:
+
+        for attempt in limiter.attempts(estimated_tokens):
+            with attempt:
+                result = client.invoke(messages)
+
+    A 429 or transient error inside the `with` block is swallowed and
+    retried (after backoff) unless retries are exhausted or
+    `attempt.retryable` was set to False, e.g. once a streamed response has
+    started producing output.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int,
+                 min_concurrency: int = 1, max_retries: int = 6, base_delay: float = 0.5,
+                 max_delay: float = 30.0, burst_seconds: float = 1.0, latency_factor: float = 3.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds)
+        # 429s within one burst window answer the same over-send, so they count as one cut
+        self.rate_window = burst_seconds
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self.concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency, latency_factor=latency_factor)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._paused_until = 0.0
+        self._last_rate_cut = float("-inf")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "transient_errors": 0, "rate_cuts": 0, "retries": 0,
+                       "failed": 0, "wait_seconds": 0.0}
+
+    def attempts(self, estimated_tokens: float) -> Iterator["_Attempt"]:
+        for number in range(self.max_retries + 1):
+            attempt = _Attempt(self, estimated_tokens, number, last=number == self.max_retries)
+            yield attempt
+            if attempt.succeeded:
+                return
+            self._count("retries")
+            self._sleep(attempt.backoff)
+
+    def call(self, fn: Callable[[], object], estimated_tokens: float):
+        for attempt in self.attempts(estimated_tokens):
+            with attempt:
+                return fn()
+
+    def backoff(self, number: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** number))
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        out.update(
+            concurrency_limit=int(self.concurrency.limit),
+            requests_per_minute=round(self.requests.rate * 60, 1),
+            in_flight=self.concurrency.in_flight,
+            peak_in_flight=self.concurrency.peak_in_flight,
+        )
+        return out
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0 if k != "wait_seconds" else 0.0
+        self.concurrency.peak_in_flight = self.concurrency.in_flight
+
+    def _count(self, key: str, amount: float = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _admit(self, estimated_tokens: float):
+        start = time.monotonic()
+        pause = self._paused_until - start
+        if pause > 0:
+            self._sleep(pause)
+        self.concurrency.acquire()
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            self._sleep(wait)
+        self._count("calls")
+        self._count("wait_seconds", time.monotonic() - start)
+
+    def _succeeded(self, latency: float, tokens: float):
+        self.concurrency.on_success(latency, tokens)
+        self.requests.recover_rate(0.05, self.rate_window)
+
+    def _throttled(self, retry_after: Optional[float]):
+        self._count("throttled")
+        self.concurrency.on_throttle()
+        now = time.monotonic()
+        with self._lock:
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            # The configured rate is evidently too high: cut it once per wave of 429s
+            cut = now - self._last_rate_cut >= self.rate_window
+            if cut:
+                self._last_rate_cut = now
+        if cut:
+            self._count("rate_cuts")
+            self.requests.scale_rate(0.5)
+        self.requests.drain()
+
+
+class _Attempt:
+    def __init__(self, limiter: RateLimiter, estimated_tokens: float, number: int, last: bool):
+        self.limiter = limiter
+        self.number = number
+        self.estimated_tokens = estimated_tokens
+        self.last = last
+        self.retryable = True
+        self.succeeded = False
+        self.backoff = 0.0
+        self._started = 0.0
+
+    def used_tokens(self, actual: Optional[float]):
+        """Correct the token bucket once the provider reports real usage."""
+        if actual:
+            self.limiter.tokens.adjust(self.estimated_tokens - actual)
+            self.estimated_tokens = actual
+
+    def __enter__(self) -> "_Attempt":
+        self.limiter._admit(self.estimated_tokens)
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        limiter = self.limiter
+        limiter.concurrency.release()
+        if exc is None:
+            self.succeeded = True
+            limiter._succeeded(time.monotonic() - self._started, self.estimated_tokens)
+            return False
+        if isinstance(exc, GeneratorExit):
+            # A streaming caller stopped reading early; not a failure
+            return False
+        if is_rate_limit_error(exc):
+            retry_after = retry_after_seconds(exc)
+            limiter._throttled(retry_after)
+        elif is_transient_error(exc):
+            # Not a sign of overload, so the rate and concurrency stay as they are
+            retry_after = None
+            limiter._count("transient_errors")
+        else:
+            limiter._count("failed")
+            return False
+        if self.last or not self.retryable:
+            limiter._count("failed")
+            return False
+        self.backoff = limiter.backoff(self.number, retry_after)
+        return True
@@ -0,0 +1,117 @@
+"""
+Run-scoped output directories.
+Every run writes into its own directory (<BLOG_OUTPUT_DIR>/<run id> by
+default) so parallel batch runs and concurrent app sessions never share
+files. Files are written to a temp file in the same directory and moved
+into place with os.replace, so readers see either the old or the new
+file, never a partial one. Each directory has a manifest.json listing its
+artifacts; the UI and the batch runner read the manifest instead of
+globbing.
+"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+OUTPUT_ROOT = os.getenv("BLOG_OUTPUT_DIR", "output")
+MANIFEST_NAME = "manifest.json"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def run_output_dir(run_id: str, root: Optional[str] = None) -> Path:
+    return Path(root or OUTPUT_ROOT) / run_id
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def atomic_write_text(path: Union[str, Path], text: str):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def _dir_lock(run_dir: Path) -> threading.Lock:
+    key = str(run_dir.resolve())
+    with _locks_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def load_manifest(run_dir: Union[str, Path]) -> dict:
+    path = Path(run_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"run_id": Path(run_dir).name, "artifacts": []}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _update(run_dir: Path, change):
+    with _dir_lock(run_dir):
+        manifest = load_manifest(run_dir)
+        change(manifest)
+        manifest["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        atomic_write_text(run_dir / MANIFEST_NAME, json.dumps(manifest, indent=2) + "\n")
+    return manifest
+
+
+def init_manifest(run_dir: Union[str, Path], run_id: str, **meta) -> dict:
+    """Create (or update the metadata of) a run directory's manifest."""
+    run_dir = Path(run_dir)
+    return _update(run_dir, lambda m: m.update(run_id=run_id, **meta))
+
+
+def record_artifact(run_dir: Union[str, Path], path: Union[str, Path], kind: str, **meta) -> dict:
+    """Add or refresh a file in the manifest; `path` is inside `run_dir`."""
+    run_dir = Path(run_dir)
+    path = Path(path)
+    rel = os.path.relpath(path, run_dir).replace(os.sep, "/")
+    data = path.read_bytes()
+    entry = {"path": rel, "kind": kind, "bytes": len(data),
+             "sha256": hashlib.sha256(data).hexdigest(), **meta}
+
+    def change(manifest: dict):
+        manifest["artifacts"] = [a for a in manifest.get("artifacts", []) if a["path"] != rel] + [entry]
+
+    _update(run_dir, change)
+    return entry
+
+
+def read_post(run_dir: Union[str, Path]) -> Optional[Tuple[str, int]]:
+    """
+    (text, pending image count) of the run's saved post, or None before it is
+    written. Images that finish after the run are filled in here, not in the
+    graph state's `final`, so readers of a finished run should prefer this.
+    """
+    run_dir = Path(run_dir)
+    for a in reversed(load_manifest(run_dir).get("artifacts", [])):
+        path = run_dir / a["path"]
+        if a["kind"] == "markdown" and path.exists():
+            return path.read_text(encoding="utf-8"), a.get("pending_images", 0)
+    return None
+
+
+def artifacts(run_dir: Union[str, Path], kind: Optional[str] = None) -> List[Path]:
+    """Paths of the run's artifacts (optionally of one kind) that still exist, in manifest order."""
+    run_dir = Path(run_dir)
+    out = []
+    for a in load_manifest(run_dir).get("artifacts", []):
+        if kind is None or a["kind"] == kind:
+            p = run_dir / a["path"]
+            if p.exists():
+                out.append(p)
+    return out
@@ -0,0 +1,116 @@
+"""
+Persistent cache for web search results.
+Keys are the normalized query plus max_results. How long an entry stays
+fresh follows the run's recency window: a 7-day open_book window keeps
+results for hours, an evergreen 3650-day window keeps them for weeks.
+When the backend fails, the last stored result is served even if stale.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from services import tracing
+from services.kv_cache import SqliteCache, default_cache_dir
+
+CACHE_ENABLED = os.getenv("BLOG_SEARCH_CACHE", "1") != "0"
+CACHE_MAX_ENTRIES = int(os.getenv("BLOG_SEARCH_CACHE_MAX_ENTRIES", "20000"))
+MIN_FRESH_SECONDS = 3600
+MAX_FRESH_SECONDS = 21 * 24 * 3600
+
+_cache: Optional[SqliteCache] = None
+_enabled = CACHE_ENABLED
+_lock = threading.Lock()
+_stats = {"fresh_hits": 0, "stale_served": 0, "misses": 0, "backend_errors": 0}
+
+
+def configure_search_cache(enabled: bool = True, path: Optional[str] = None):
+    global _cache, _enabled
+    with _lock:
+        _enabled = enabled
+        _cache = SqliteCache(path, table="search_results", max_entries=CACHE_MAX_ENTRIES) \
+            if enabled and path else None
+        for k in _stats:
+            _stats[k] = 0
+
+
+def get_search_cache() -> Optional[SqliteCache]:
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                path = os.getenv(
+                    "BLOG_SEARCH_CACHE_PATH", os.path.join(default_cache_dir(), "search_cache.sqlite")
+                )
+                _cache = SqliteCache(path, table="search_results", max_entries=CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def search_cache_stats() -> dict:
+    return dict(_stats)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase and collapse whitespace. Punctuation and word order are kept:
+    "C++" and "C#" are different languages, and "Python to Rust" is not
+    "Rust to Python".
+    """
+    return " ".join(query.lower().split())
+
+
+def freshness_seconds(recency_days: int) -> float:
+    """One hour of validity per day of recency window, clamped to [1 hour, 3 weeks]."""
+    return float(min(max(int(recency_days) * 3600, MIN_FRESH_SECONDS), MAX_FRESH_SECONDS))
+
+
+def _key(query: str, max_results: int) -> str:
+    raw = f"{normalize_query(query)}|{max_results}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def cached_search(search: Callable[..., List[dict]], query: str, max_results: int,
+                  recency_days: int = 3650) -> List[dict]:
+    """
+    Serve `search(query, max_results=...)` from the cache while fresh.
+    On a miss the backend is called; if it raises, a stale entry is returned
+    instead, and with no entry at all the error propagates.
+    """
+    cache = get_search_cache()
+    if cache is None:
+        tracing.add("search_calls")
+        return search(query, max_results=max_results)
+
+    key = _key(query, max_results)
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry[1] <= freshness_seconds(recency_days):
+        _count("fresh_hits")
+        tracing.add("search_cache_hits")
+        return json.loads(entry[0])
+
+    tracing.add("search_calls")
+    try:
+        results = search(query, max_results=max_results)
+    except Exception:
+        _count("backend_errors")
+        if entry is not None:
+            _count("stale_served")
+            tracing.add("search_cache_hits")
+            age_h = (time.time() - entry[1]) / 3600
+            print(f"[research] search failed, serving cached results ({age_h:.1f}h old) for {query!r}")
+            return json.loads(entry[0])
+        raise
+
+    _count("misses")
+    if results:
+        cache.set(key, json.dumps(results))
+    return results
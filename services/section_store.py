@@ -0,0 +1,82 @@
+"""
+Store of written sections keyed by task fingerprint.
+A fingerprint covers everything that shapes a section's text: the task's
+own fields, the plan fields that set its voice (audience, tone, kind,
+constraints), the URLs of the evidence selected for it, the mode, and a
+version string for the worker prompt and model. When a user tweaks a
+topic and regenerates, tasks whose fingerprint is unchanged are served
+from here and only the changed ones go to workers.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Iterable, Optional
+
+from Schemas.plan_schema import Plan
+from Schemas.task_schema import Task
+from services.kv_cache import SqliteCache, default_cache_dir
+
+STORE_ENABLED = os.getenv("BLOG_SECTION_STORE", "1") != "0"
+STORE_MAX_ENTRIES = int(os.getenv("BLOG_SECTION_STORE_MAX_ENTRIES", "5000"))
+STORE_TTL_SECONDS = float(os.getenv("BLOG_SECTION_STORE_TTL", str(30 * 24 * 3600)))
+
+# Task fields that do not change what gets written (ids only order sections)
+_TASK_EXCLUDE = {"id"}
+_PLAN_FIELDS = ("audience", "tone", "blog_kind", "constraints")
+
+_store: Optional[SqliteCache] = None
+_enabled = STORE_ENABLED
+_lock = threading.Lock()
+
+
+def configure_section_store(enabled: bool = True, path: Optional[str] = None):
+    global _store, _enabled
+    with _lock:
+        _enabled = enabled
+        _store = SqliteCache(path, table="sections", max_entries=STORE_MAX_ENTRIES) \
+            if enabled and path else None
+
+
+def get_section_store() -> Optional[SqliteCache]:
+    global _store
+    if not _enabled:
+        return None
+    if _store is None:
+        with _lock:
+            if _store is None:
+                path = os.getenv("BLOG_SECTION_STORE_PATH", os.path.join(default_cache_dir(), "sections.sqlite"))
+                _store = SqliteCache(path, table="sections", max_entries=STORE_MAX_ENTRIES)
+    return _store
+
+
+def task_fingerprint(task: Task, plan: Plan, evidence_urls: Iterable[str], mode: str,
+                     version: str = "") -> str:
+    payload = {
+        "task": task.model_dump(mode="json", exclude=_TASK_EXCLUDE),
+        "plan": {f: getattr(plan, f) for f in _PLAN_FIELDS},
+        "evidence": list(evidence_urls),
+        "mode": mode,
+        "version": version,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def load_section(fingerprint: str) -> Optional[str]:
+    store = get_section_store()
+    if store is None:
+        return None
+    entry = store.get(fingerprint, max_age=STORE_TTL_SECONDS)
+    return entry[0] if entry is not None else None
+
+
+def save_section(fingerprint: str, section_md: str):
+    store = get_section_store()
+    if store is not None and section_md:
+        store.set(fingerprint, section_md)
+
+
+def section_store_stats() -> dict:
+    store = get_section_store()
+    return store.stats() if store is not None else {}
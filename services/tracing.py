@@ -0,0 +1,280 @@
+"""
+Per-node tracing for graph runs.
+Every node is wrapped by `traced(name, fn)`. The wrapper opens a span for the
+node's execution and records:
+- start and end times
+- queue wait: from the moment its superstep became ready to the moment it
+  actually started, for example a worker held back by max_concurrency
+- counters that code running inside the node adds with `add()`: LLM calls,
+  tokens and cost, cache hits, search calls, image time
+
+Spans go to a JSONL file shaped like OpenTelemetry spans (trace_id, span_id,
+unix-nano times, attributes) and, when opentelemetry is installed, to the
+active OTel tracer as well. `summarize_run(run_id)` totals a run per stage,
+which shows whether router, research, orchestrator, workers or reducer
+dominate.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from services.kv_cache import default_cache_dir
+
+# off | jsonl | otel | both
+TRACE_MODE = os.getenv("BLOG_TRACE", "jsonl").lower()
+TRACE_PATH = os.getenv("BLOG_TRACE_PATH", os.path.join(default_cache_dir(), "traces.jsonl"))
+MAX_RUNS_IN_MEMORY = 32
+
+# USD per 1M tokens (input, output); override with BLOG_LLM_PRICE_IN / BLOG_LLM_PRICE_OUT
+MODEL_PRICES = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Nodes of the reducer subgraph are reported together as "reducer"
+STAGES = {
+    "merge_content": "reducer",
+    "decide_images": "reducer",
+    "generate_and_place_images": "reducer",
+}
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("blog_trace_span", default=None)
+_runs: "OrderedDict[str, List[dict]]" = OrderedDict()
+_step_ends: Dict[tuple, float] = {}
+_lock = threading.Lock()
+_mode = TRACE_MODE
+_path = TRACE_PATH
+
+
+def configure_tracing(mode: str = "jsonl", path: Optional[str] = None):
+    global _mode, _path
+    with _lock:
+        _mode = mode
+        _path = path or TRACE_PATH
+
+
+def model_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4.1-mini"])
+    price_in = float(os.getenv("BLOG_LLM_PRICE_IN", price_in))
+    price_out = float(os.getenv("BLOG_LLM_PRICE_OUT", price_out))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+class Span:
+    def __init__(self, run_id: str, name: str, step: Optional[int], namespace: str):
+        self.run_id = run_id
+        self.name = name
+        self.step = step
+        self.namespace = namespace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.queue_wait = 0.0
+        self.error: Optional[str] = None
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float = 1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def to_record(self) -> dict:
+        attributes = {
+            "blog.run_id": self.run_id,
+            "blog.node": self.name,
+            "blog.stage": STAGES.get(self.name, self.name),
+            "blog.step": self.step,
+            "blog.queue_wait_s": round(self.queue_wait, 6),
+            "blog.exec_s": round((self.end or self.start) - self.start, 6),
+        }
+        attributes.update({f"blog.{k}": (round(v, 6) if isinstance(v, float) else v)
+                           for k, v in sorted(self.counters.items())})
+        return {
+            "trace_id": trace_id(self.run_id),
+            "span_id": self.span_id,
+            "name": self.name,
+            "start_time_unix_nano": int(self.start * 1e9),
+            "end_time_unix_nano": int((self.end or self.start) * 1e9),
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "attributes": attributes,
+        }
+
+
+def trace_id(run_id: str) -> str:
+    """Stable 128-bit trace id per run, so a resumed run continues the same trace."""
+    return hashlib.sha256(run_id.encode("utf-8")).hexdigest()[:32]
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add(key: str, amount: float = 1):
+    """Add to a counter on the span of the node this code is running in (no-op outside a node)."""
+    span = _current.get()
+    if span is not None:
+        span.add(key, amount)
+
+
+def record_llm_call(model: str, prompt_tokens: int, completion_tokens: int, seconds: float,
+                    estimated: bool = False):
+    add("llm_calls")
+    add("llm_prompt_tokens", prompt_tokens)
+    add("llm_completion_tokens", completion_tokens)
+    add("llm_seconds", seconds)
+    add("llm_cost_usd", model_cost(model, prompt_tokens, completion_tokens))
+    if estimated:
+        add("llm_tokens_estimated")
+
+
+def _run_id(config: Optional[dict]) -> str:
+    configurable = (config or {}).get("configurable") or {}
+    return str(configurable.get("thread_id") or "untracked")
+
+
+def _namespace(config: Optional[dict]) -> str:
+    # "reducer:<task id>|merge_content:<task id>" -> "reducer:<task id>"
+    ns = str(((config or {}).get("metadata") or {}).get("langgraph_checkpoint_ns", ""))
+    return ns.rsplit("|", 1)[0] if "|" in ns else ""
+
+
+def traced(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so each call is recorded as a span."""
+
+    def node(state, config):
+        if _mode == "off":
+            return fn(state)
+        metadata = (config or {}).get("metadata") or {}
+        step = metadata.get("langgraph_step")
+        span = Span(_run_id(config), name, step, _namespace(config))
+        if step is not None:
+            ready = _step_ends.get((span.run_id, span.namespace, step - 1))
+            if ready is not None:
+                span.queue_wait = max(0.0, span.start - ready)
+        token = _current.set(span)
+        try:
+            return fn(state)
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            span.end = time.time()
+            _finish(span)
+
+    # No functools.wraps: LangGraph reads the signature to decide whether to pass `config`
+    node.__name__ = getattr(fn, "__name__", name)
+    node.__doc__ = fn.__doc__
+    return node
+
+
+def _finish(span: Span):
+    record = span.to_record()
+    with _lock:
+        if span.step is not None:
+            key = (span.run_id, span.namespace, span.step)
+            _step_ends[key] = max(_step_ends.get(key, 0.0), span.end)
+        spans = _runs.setdefault(span.run_id, [])
+        spans.append(record)
+        _runs.move_to_end(span.run_id)
+        while len(_runs) > MAX_RUNS_IN_MEMORY:
+            old, _ = _runs.popitem(last=False)
+            for k in [k for k in _step_ends if k[0] == old]:
+                del _step_ends[k]
+        mode, path = _mode, _path
+    if mode in ("jsonl", "both"):
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with _lock, open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"[trace] could not write {path}: {e}")
+    if mode in ("otel", "both"):
+        _export_otel(record)
+
+
+def _export_otel(record: dict):
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return
+    tracer = trace.get_tracer("blog-writing-agent")
+    otel_span = tracer.start_span(record["name"], start_time=record["start_time_unix_nano"],
+                                  attributes={k: v for k, v in record["attributes"].items() if v is not None})
+    if record["status"]["code"] == "ERROR":
+        otel_span.set_status(trace.Status(trace.StatusCode.ERROR, record["status"]["message"]))
+    otel_span.end(end_time=record["end_time_unix_nano"])
+
+
+def run_spans(run_id: str) -> List[dict]:
+    """Spans of a run: from memory, or from the trace file (e.g. after a restart)."""
+    with _lock:
+        spans = list(_runs.get(run_id, []))
+        path = _path
+    if spans or not Path(path).exists():
+        return spans
+    tid = trace_id(run_id)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if tid in line:
+                record = json.loads(line)
+                if record.get("trace_id") == tid:
+                    spans.append(record)
+    return spans
+
+
+def summarize_run(run_id: str) -> dict:
+    """
+    Per-stage totals for a run. `wall_s` is first start to last end within
+    the stage (parallel workers overlap), `exec_s` and `queue_wait_s` are
+    summed over its spans.
+    """
+    spans = run_spans(run_id)
+    stages: Dict[str, dict] = {}
+    for s in spans:
+        a = s["attributes"]
+        stage = stages.setdefault(a["blog.stage"], {"spans": 0, "start": s["start_time_unix_nano"],
+                                                    "end": s["end_time_unix_nano"]})
+        stage["spans"] += 1
+        stage["start"] = min(stage["start"], s["start_time_unix_nano"])
+        stage["end"] = max(stage["end"], s["end_time_unix_nano"])
+        for key, value in a.items():
+            if key.startswith("blog.") and isinstance(value, (int, float)) and key != "blog.step":
+                short = key[len("blog."):]
+                stage[short] = stage.get(short, 0) + value
+    out = {}
+    for name, stage in sorted(stages.items(), key=lambda kv: kv[1]["start"]):
+        start, end = stage.pop("start"), stage.pop("end")
+        stage["wall_s"] = (end - start) / 1e9
+        out[name] = stage
+    if not out:
+        return {"stages": {}, "total": {}}
+    total = {k: sum(st.get(k, 0) for st in out.values())
+             for k in ("exec_s", "queue_wait_s", "llm_calls", "llm_cache_hits", "llm_prompt_tokens",
+                       "llm_completion_tokens", "llm_cost_usd", "search_calls", "search_cache_hits",
+                       "images_generated", "image_cache_hits", "image_seconds", "sections_reused")}
+    first = min(s["start_time_unix_nano"] for s in spans)
+    last = max(s["end_time_unix_nano"] for s in spans)
+    total["wall_s"] = (last - first) / 1e9
+    return {"stages": out, "total": total}
+
+
+def format_summary(summary: dict) -> str:
+    """Plain-text table of `summarize_run` output, for logs and CLIs."""
+    lines = [f"{'stage':<14}{'wall':>8}{'exec':>8}{'queue':>8}{'llm':>5}{'tokens':>9}{'cost $':>9}{'search':>8}"]
+    for name, st in summary["stages"].items():
+        tokens = int(st.get("llm_prompt_tokens", 0) + st.get("llm_completion_tokens", 0))
+        lines.append(f"{name:<14}{st['wall_s']:>7.2f}s{st.get('exec_s', 0):>7.2f}s{st.get('queue_wait_s', 0):>7.2f}s"
+                     f"{int(st.get('llm_calls', 0)):>5}{tokens:>9}{st.get('llm_cost_usd', 0):>9.4f}"
+                     f"{int(st.get('search_calls', 0)):>8}")
+    return "\n".join(lines)
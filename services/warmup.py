@@ -0,0 +1,100 @@
+"""
+Process warm-up and health checks.
+Long-lived hosts (the Streamlit app, batch and API workers) call
+`warm_up()` once per process so the first run does not pay for importing
+and compiling the graph, building the LLM client, opening the SQLite
+caches or, optionally, loading Stable Diffusion. `health()` reports
+whether each of those resources is usable without making a billable
+request.
+"""
+import os
+import time
+from typing import Dict
+
+
+def warm_up(images: bool = False) -> Dict[str, float]:
+    """Build the shared resources now; returns seconds spent per component."""
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    import Graph.graph  # noqa: F401 - compiles the graph and opens the checkpointer
+    timings["graph"] = time.perf_counter() - start
+
+    from services import llm_gateway, search_cache, section_store, image_store
+    start = time.perf_counter()
+    try:
+        llm_gateway.get_client(llm_gateway.DEFAULT_MODEL)
+    except Exception as e:
+        # e.g. no OPENAI_API_KEY yet; health() reports it
+        print(f"[warmup] LLM client not ready: {e}")
+    timings["llm_client"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    llm_gateway.get_cache()
+    search_cache.get_search_cache()
+    section_store.get_section_store()
+    image_store.get_image_store()
+    timings["caches"] = time.perf_counter() - start
+
+    if images:
+        from nodes.image_generation_node import start_warmup
+        start_warmup()  # runs in the background; see health()["image_pipeline"]
+    return timings
+
+
+def _check(fn) -> dict:
+    try:
+        detail = fn()
+        return {"ok": True, "detail": detail or "ok"}
+    except Exception as e:
+        return {"ok": False, "detail": f"{type(e).__name__}: {e}"}
+
+
+def health() -> Dict[str, dict]:
+    """{component: {"ok": bool, "detail": str}} for the graph, LLM, search, caches and image pipeline."""
+    from services import llm_gateway, search_cache, section_store, image_store
+
+    def graph():
+        import Graph.graph as graph_module
+        if graph_module.checkpointer is None:
+            return "compiled, checkpoints off"
+        with graph_module.checkpointer.lock:
+            graph_module.checkpointer.conn.execute("SELECT 1").fetchone()
+        return f"compiled, checkpoints at {graph_module.CHECKPOINT_PATH}"
+
+    def llm():
+        if not os.getenv("OPENAI_API_KEY"):
+            raise RuntimeError("OPENAI_API_KEY is not set")
+        llm_gateway.get_client(llm_gateway.DEFAULT_MODEL)
+        stats = llm_gateway.concurrency_stats()
+        return (f"{llm_gateway.DEFAULT_MODEL}, {stats['in_flight']} in flight, "
+                f"limit {stats['concurrency_limit']}, {stats['throttled']} throttled")
+
+    def search():
+        if not os.getenv("TAVILY_API_KEY"):
+            raise RuntimeError("TAVILY_API_KEY is not set (research disabled)")
+        return "configured"
+
+    def caches():
+        parts = []
+        for name, cache in (("llm", llm_gateway.get_cache()), ("search", search_cache.get_search_cache()),
+                            ("sections", section_store.get_section_store())):
+            parts.append(f"{name}: {cache.stats()['entries']}" if cache is not None else f"{name}: off")
+        store = image_store.get_image_store()
+        parts.append(f"images: {store.stats()['entries']}" if store is not None else "images: off")
+        return ", ".join(parts)
+
+    def image_pipeline():
+        from nodes.image_generation_node import get_engine_profile, pipeline_status
+        status = pipeline_status()
+        if status.startswith("failed"):
+            raise RuntimeError(status)
+        return f"{status} (profile {get_engine_profile().name})"
+
+    return {
+        "graph": _check(graph),
+        "llm": _check(llm),
+        "search": _check(search),
+        "caches": _check(caches),
+        "image_pipeline": _check(image_pipeline),
+    }
@@ -12,11 +12,39 @@ class Blog_State(TypedDict):
     queries: List[str]
     evidence: List[EvidenceItem]
     plan: Optional[Plan]
+    # Plan drafted from the topic alone while research runs (hybrid mode)
+    draft_plan: Optional[Plan]
     as_of: str
     recency_days: int
     sections: Annotated[List[tuple[int, str]],operator.add]
+    # Evidence indices per plan task (plan order), selected once by section_cache
+    evidence_idx: List[List[int]]
     # Reducer
     merged_md: str
     md_with_placeholders: str
     image_specs: List[dict]
-    final: str
\ No newline at end of file
+    final: str
+    # Where the post and its images are written ("" = working directory)
+    output_dir: str
+
+
+def initial_state(topic: str, as_of: str, output_dir: str = "") -> Blog_State:
+    """Input for a fresh run of the graph."""
+    return {
+        "topic": topic,
+        "mode": "",
+        "needs_research": False,
+        "queries": [],
+        "evidence": [],
+        "plan": None,
+        "draft_plan": None,
+        "as_of": as_of,
+        "recency_days": 3650,
+        "sections": [],
+        "evidence_idx": [],
+        "merged_md": "",
+        "md_with_placeholders": "",
+        "image_specs": [],
+        "final": "",
+        "output_dir": output_dir,
+    }
@@ -0,0 +1,74 @@
+"""
+Read-only per-run context shared by all workers.
+fanout registers one RunContext per run and each Send carries only its
+key, the Task and the evidence indices for that task, so the plan and
+evidence are not copied or re-validated once per section.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+
+from Schemas.evidence_schema import EvidenceItem
+from Schemas.plan_schema import Plan
+from state.State import Blog_State
+
+# Contexts are small, but keep only the most recent runs in memory.
+MAX_CONTEXTS = 64
+
+_contexts: "OrderedDict[str, RunContext]" = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RunContext:
+    key: str
+    topic: str
+    mode: str
+    as_of: str
+    recency_days: int
+    plan: Plan
+    evidence: Tuple[EvidenceItem, ...]
+
+
+def context_key(state: Blog_State) -> str:
+    """Content hash of the fields workers read, so a resumed run maps to the same key."""
+    h = hashlib.sha256()
+    for part in (state["topic"], state.get("mode", ""), state.get("as_of", ""),
+                 str(state.get("recency_days", ""))):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    h.update(state["plan"].model_dump_json().encode("utf-8"))
+    for e in state.get("evidence", []) or []:
+        h.update(f"\0{e.url}|{e.title}|{e.published_at}".encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def register_run_context(state: Blog_State) -> RunContext:
+    key = context_key(state)
+    with _lock:
+        ctx = _contexts.get(key)
+        if ctx is None:
+            ctx = RunContext(
+                key=key,
+                topic=state["topic"],
+                mode=state.get("mode") or "closed_book",
+                as_of=state.get("as_of", ""),
+                recency_days=state.get("recency_days", 3650),
+                plan=state["plan"],
+                evidence=tuple(state.get("evidence", []) or []),
+            )
+            _contexts[key] = ctx
+        _contexts.move_to_end(key)
+        while len(_contexts) > MAX_CONTEXTS:
+            _contexts.popitem(last=False)
+    return ctx
+
+
+def get_run_context(key: str) -> RunContext:
+    with _lock:
+        ctx = _contexts.get(key)
+    if ctx is None:
+        raise KeyError(f"Run context {key} is not registered (was fanout run in this process?)")
+    return ctx
@@ -33,7 +33,7 @@ def run_schema_tests():
     # image
     try:
         spec = ImageSpec(placeholders="[[IMAGE_1]]", filename="test.png", alt="alt", caption="cap", prompt="p")
-        plan = GlobalImagePlan(md_with_placeholders="# Title", images=[spec])
+        plan = GlobalImagePlan(images=[spec])
         print("  [PASS] image_schema")
         passed += 1
     except Exception as e:
@@ -111,7 +111,7 @@ def run_node_import_tests():
         import importlib.util
         spec = importlib.util.spec_from_file_location(
             "router_node",
-            os.path.join(os.path.dirname(__file__), "nodes", "Router_Node.py")
+            os.path.join(os.path.dirname(__file__), "nodes", "Route_Node.py")
         )
         mod = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(mod)
@@ -143,6 +143,1124 @@ def run_merge_logic_test():
         print(f"  [FAIL] merge_content: {e}")
         failed += 1
 
+# --- Image anchors (no API) ---
+print("\n--- Image placeholder anchors (no API) ---")
+def run_image_anchor_test():
+    global passed, failed
+    try:
+        from nodes.merging_node import insert_placeholders
+        from Schemas.image_schema import ImageSpec
+        md = "# T\n\n## Intro\nOne.\n\nTwo.\n\n## Code\n\n```py\nx = 1\n\ny = 2\n```\n"
+        specs = [
+            ImageSpec(placeholders="[[IMAGE_1]]", filename="a.png", alt="a", caption="c", prompt="p", section="S1", after_paragraph=1),
+            ImageSpec(placeholders="[[IMAGE_2]]", filename="b.png", alt="b", caption="c", prompt="p", section="## Code", after_paragraph=5),
+        ]
+        out = insert_placeholders(md, specs)
+        assert "One.\n\n[[IMAGE_1]]\n\nTwo." in out
+        assert out.rstrip().endswith("```\n\n[[IMAGE_2]]")
+        assert out.replace("\n\n[[IMAGE_1]]", "").replace("\n\n[[IMAGE_2]]", "") == md
+        print("  [PASS] anchors spliced locally, prose byte-identical")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] image anchors: {e}")
+        failed += 1
+
+# --- Fanout (no API) ---
+print("\n--- Fanout (one Send per task, no API) ---")
+def run_fanout_test():
+    global passed, failed
+    try:
+        from nodes.orches_node import fanout
+        from Schemas.plan_schema import Plan
+        from Schemas.task_schema import Task
+        tasks = [Task(id=i, title=f"S{i}", goal="g", bullets=["a","b","c"], target_words=150) for i in range(1, 4)]
+        state = {
+            "topic": "t", "mode": "closed_book", "as_of": "2026-01-01", "recency_days": 3650,
+            "plan": Plan(blog_title="B", audience="a", tone="t", tasks=tasks), "evidence": [],
+        }
+        sends = fanout(state)
+        assert [s.node for s in sends] == ["worker"] * 3
+        assert [s.arg["task"].id for s in sends] == [1, 2, 3]
+        assert set(sends[0].arg) == {"task", "context_key", "evidence_idx"}
+        from nodes.Worker_node import _load_inputs
+        task, ctx, evidence = _load_inputs(sends[1].arg)
+        assert task.id == 2 and ctx.plan is state["plan"] and evidence == []
+        # Selections made by section_cache are passed through, not searched again
+        assert [s.arg["evidence_idx"] for s in fanout({**state, "evidence_idx": [[], [5], []]})] == [[], [5], []]
+        # Reused sections are not dispatched again; with none left fanout goes to the reducer
+        assert [s.arg["task"].id for s in fanout({**state, "sections": [(2, "## S2")]})] == [1, 3]
+        assert fanout({**state, "sections": [(i, "") for i in range(1, 4)]}) == "reducer"
+        print("  [PASS] fanout sends one worker per task with a shared run context")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] fanout: {e}")
+        failed += 1
+
+# --- Evidence index (no API) ---
+print("\n--- Evidence index (BM25, no API) ---")
+def run_evidence_index_test():
+    global passed, failed
+    try:
+        from Schemas.evidence_schema import EvidenceItem
+        from services.evidence_index import EvidenceIndex
+        evidence = [
+            EvidenceItem(title="Kubernetes autoscaling guide", url="https://a", snippet="HPA and VPA"),
+            EvidenceItem(title="Python decorators", url="https://b", snippet="functools.wraps explained"),
+            EvidenceItem(title="Decorator caching in Python", url="https://c", snippet="lru_cache decorators"),
+        ]
+        index = EvidenceIndex(evidence)
+        assert index.search("python decorators", 2) == [1, 2]
+        assert index.search("autoscaling", 5) == [0]
+        assert index.select("nothing matches here", 2) == [0, 1]
+        print("  [PASS] BM25 top-k selection")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] evidence index: {e}")
+        failed += 1
+
+# --- Evidence pipeline (no API) ---
+print("\n--- Evidence pipeline (local dedup, no API) ---")
+def run_evidence_pipeline_test():
+    global passed, failed
+    try:
+        from datetime import date
+        from services.evidence_pipeline import build_evidence, canonical_url, clean_url, parse_date
+        assert canonical_url("http://WWW.Example.com/a/?utm_source=x&b=2&fbclid=y#top") == "https://example.com/a?b=2"
+        # The canonical form only finds duplicates; the emitted URL is the one the search returned
+        mobile = "http://m.example.com/news/Story?id=5&source=rss&utm_medium=social"
+        assert clean_url(mobile) == "http://m.example.com/news/Story?id=5&source=rss"
+        assert parse_date("Jan 5, 2025") == "2025-01-05"
+        assert parse_date("Tue, 14 Jan 2025 10:00:00 GMT") == "2025-01-14"
+        assert parse_date("sometime last spring") is None
+        # Day/month order is only trusted when a part is over 12; month/year spans are not guessed
+        assert parse_date("12/01/2025") is None and parse_date("3.4.2025") is None
+        assert parse_date("25/12/2025") == "2025-12-25" and parse_date("12/25/2025") == "2025-12-25"
+        assert parse_date("05/05/2025") == "2025-05-05"
+        assert parse_date("2 weeks ago", date(2025, 3, 15)) == "2025-03-01"
+        assert parse_date("3 months ago", date(2025, 3, 15)) is None
+        assert parse_date("1 year ago", date(2025, 3, 15)) is None
+        article = ("LangGraph checkpoints let long running agents resume after a crash "
+                   "without redoing the work finished by earlier nodes in the graph")
+        raw = [
+            {"title": "Copy", "url": "https://medium.com/@x/post?utm_source=rss", "snippet": article,
+             "published_at": "5 January 2025"},
+            {"title": "Same page", "url": "https://www.medium.com/@x/post#comments", "snippet": "short"},
+            {"title": "Original", "url": "https://blog.langchain.dev/post", "snippet": article + " today"},
+            {"title": "Docs", "url": "https://docs.python.org/3/library/asyncio.html",
+             "snippet": "word " * 200, "published_at": "2025-02-01T09:00:00Z"},
+            {"title": "No url", "url": "", "snippet": "x"},
+        ]
+        evidence = build_evidence(raw, today=date(2025, 3, 1), snippet_chars=100)
+        assert [e.title for e in evidence] == ["Docs", "Original"], [e.title for e in evidence]
+        assert evidence[1].published_at == "2025-01-05" and evidence[0].published_at == "2025-02-01"
+        assert len(evidence[0].snippet) <= 101
+        assert evidence[1].url == "https://blog.langchain.dev/post"
+        dupes = build_evidence([{"title": "A", "url": mobile, "snippet": "one"},
+                                {"title": "B", "url": "https://example.com/news/Story?id=5", "snippet": "two"}])
+        assert [e.url for e in dupes] == ["http://m.example.com/news/Story?id=5&source=rss"], dupes
+        print("  [PASS] canonical URLs, near-duplicate removal, dates, authority order")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] evidence pipeline: {e}")
+        failed += 1
+
+# --- Research search stage (fake backend, no API) ---
+print("\n--- Research search stage (fake backend) ---")
+def run_search_stage_test():
+    global passed, failed
+    try:
+        import time
+        from nodes.tavily_research import _search_all
+        from benchmarks.fakes import FakeSearch
+        from services.search_cache import configure_search_cache
+        configure_search_cache(enabled=False)
+        search = FakeSearch(latency=lambda q: 2.0 if q == "slow" else 0.2, results_per_query=2)
+        start = time.monotonic()
+        out = _search_all(["a", "slow", "b", "c"], max_results=2, search=search,
+                          query_timeout=0.6, stage_timeout=1.5)
+        elapsed = time.monotonic() - start
+        assert [r["title"] for r in out][::2] == ["a result 0", "b result 0", "c result 0"]
+        assert elapsed < 1.5, elapsed
+        # Queries still queued at the stage deadline are dropped without taking a rate slot
+        from nodes import tavily_research
+        waits = []
+        limiter_wait = tavily_research._rate_limiter.wait
+        tavily_research._rate_limiter.wait = lambda: waits.append(1) or limiter_wait()
+        try:
+            slow = FakeSearch(latency=lambda q: 0.5, results_per_query=1)
+            queued = [f"q{i}" for i in range(tavily_research.SEARCH_CONCURRENCY * 2)]
+            _search_all(queued, max_results=1, search=slow, query_timeout=5, stage_timeout=0.1)
+            # Tasks run in submission order, so once this one starts every dropped query has been taken
+            tavily_research._executor.submit(lambda: None).result()
+        finally:
+            tavily_research._rate_limiter.wait = limiter_wait
+        assert len(waits) <= tavily_research.SEARCH_CONCURRENCY, f"{len(waits)} rate slots for dropped queries"
+        # Tavily requests give up after the query timeout instead of holding a search thread
+        import requests
+        seen = []
+        def hanging_post(url, json=None, timeout=None):
+            seen.append(timeout)
+            raise requests.Timeout("read timed out")
+        key, post = os.environ.get("TAVILY_API_KEY"), requests.post
+        os.environ["TAVILY_API_KEY"] = key or "test-key"
+        requests.post = hanging_post
+        try:
+            tavily_research._tavily_search("hangs", max_results=7)
+            raise AssertionError("timeout not raised")
+        except RuntimeError as e:
+            assert "timed out" in str(e), e
+        finally:
+            requests.post = post
+            tavily_research._clients.pop(7, None)
+            if key is None:
+                os.environ.pop("TAVILY_API_KEY")
+        assert seen == [tavily_research.QUERY_TIMEOUT_SECONDS], seen
+        print(f"  [PASS] concurrent search returns partial results ({elapsed:.2f}s), Tavily request timeout")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] search stage: {e}")
+        failed += 1
+
+# --- Search cache (fake backend, no API) ---
+print("\n--- Search cache (fake backend) ---")
+def run_search_cache_test():
+    global passed, failed
+    try:
+        import tempfile
+        from services import search_cache
+        from benchmarks.fakes import FakeSearch
+        assert search_cache.normalize_query("  Python   Decorators ") == search_cache.normalize_query("python decorators")
+        # Symbols inside words and word order change the meaning, so they change the key
+        keys = {search_cache._key(q, 3) for q in ("C++ memory model 2025", "C# memory model 2025", "C memory model 2025",
+                                                   "migrate from Python to Rust", "migrate from Rust to Python")}
+        assert len(keys) == 5
+        assert search_cache.freshness_seconds(7) == 7 * 3600
+        assert search_cache.freshness_seconds(3650) == search_cache.MAX_FRESH_SECONDS
+        with tempfile.TemporaryDirectory() as tmp:
+            search_cache.configure_search_cache(enabled=True, path=os.path.join(tmp, "search.sqlite"))
+            search = FakeSearch()
+            first = search_cache.cached_search(search, "Python decorators", 3, recency_days=7)
+            assert search_cache.cached_search(search, "python  Decorators", 3, recency_days=7) == first
+            assert search.calls == 1
+            # Entry is stale for a 0-day window; a failing backend still gets it served
+            search_cache.MIN_FRESH_SECONDS = 0
+            def broken(query, max_results=5):
+                raise ConnectionError("backend down")
+            assert search_cache.cached_search(broken, "python decorators", 3, recency_days=0) == first
+            stats = search_cache.search_cache_stats()
+            assert stats["fresh_hits"] == 1 and stats["stale_served"] == 1, stats
+            search_cache.MIN_FRESH_SECONDS = 3600
+            search_cache.get_search_cache()._conn.close()
+        search_cache.configure_search_cache(enabled=search_cache.CACHE_ENABLED)
+        print("  [PASS] normalized keys, recency-based freshness, stale on failure")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] search cache: {e}")
+        failed += 1
+
+# --- LLM gateway cache (fake backend, no API) ---
+print("\n--- LLM gateway cache (fake backend) ---")
+def run_llm_cache_test():
+    global passed, failed
+    try:
+        import tempfile
+        from langchain_core.messages import SystemMessage, HumanMessage
+        from services import llm_gateway
+        from services.kv_cache import SqliteCache
+        from benchmarks.fakes import FakeChatModel
+        from Schemas.router_schema import RouterDecision
+        fake = FakeChatModel()
+        llm_gateway.set_client_factory(lambda model: fake)
+        llm_gateway.configure_rate_limits(1e9, 1e9)
+        with tempfile.TemporaryDirectory() as tmp:
+            llm_gateway.configure_cache(enabled=True, path=os.path.join(tmp, "llm.sqlite"))
+            llm = llm_gateway.get_llm()
+            msgs = [SystemMessage(content="sys"), HumanMessage(content="Section title: Intro")]
+            first = llm.invoke(msgs).content
+            assert llm.invoke(msgs).content == first
+            decision = llm.with_structured_output(RouterDecision).invoke(msgs)
+            assert llm.with_structured_output(RouterDecision).invoke(msgs) == decision
+            assert fake.calls == 2, fake.calls
+            stats = llm_gateway.cache_stats()
+            assert stats["hits"] == 2 and stats["misses"] == 2, stats
+            llm_gateway.get_cache()._conn.close()
+
+            lru = SqliteCache(os.path.join(tmp, "lru.sqlite"), max_entries=2)
+            lru.set("a", "1"); lru.set("b", "2"); lru.get("a"); lru.set("c", "3")
+            assert lru.get("b") is None and lru.get("a") is not None
+            lru._conn.close()
+            # Over both limits at once: dropping the oldest entry satisfies both, so only it goes
+            sized = SqliteCache(os.path.join(tmp, "sized.sqlite"), max_entries=2, max_bytes=10)
+            sized.set("a", "1111"); sized.set("b", "2222"); sized.set("c", "3333")
+            assert sized.get("a") is None and sized.get("b") is not None, sized.stats()
+            sized.set("b", "22"); sized.delete("c")
+            assert (sized._count, sized._bytes) == (1, 2) and sized.stats()["bytes"] == 2, sized.stats()
+            sized._conn.close()
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        print("  [PASS] cached responses, hit/miss counters, LRU eviction")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] llm cache: {e}")
+        failed += 1
+
+# --- Section streaming (headless harness, fake streaming LLM) ---
+print("\n--- Section streaming (fake streaming LLM) ---")
+def run_streaming_test():
+    global passed, failed
+    try:
+        import time
+        from langgraph.graph import StateGraph, START, END
+        from services import llm_gateway, section_store
+        from benchmarks.fakes import FakeChatModel
+        import nodes.orches_node as orches_node
+        import nodes.Worker_node as Worker_node
+        from state.State import Blog_State
+        llm_gateway.set_client_factory(lambda model: FakeChatModel(words=30, num_tasks=4, chunk_latency=0.002))
+        llm_gateway.configure_rate_limits(1e9, 1e9)
+        llm_gateway.configure_cache(enabled=False)
+        section_store.configure_section_store(enabled=False)
+        g = StateGraph(Blog_State)
+        g.add_node("orchestrator", orches_node.orchestrator_node)
+        g.add_node("worker", Worker_node.worker_node)
+        g.add_edge(START, "orchestrator")
+        g.add_conditional_edges("orchestrator", orches_node.fanout, ["worker"])
+        g.add_edge("worker", END)
+        state = {"topic": "streaming", "mode": "closed_book", "as_of": "2026-01-01", "recency_days": 3650,
+                 "evidence": [], "plan": None, "sections": []}
+        chunks, done, final = {}, {}, None
+        start, first_chunk = time.monotonic(), None
+        for mode, payload in g.compile().stream(state, stream_mode=["custom", "values"]):
+            if mode == "values":
+                final = payload
+            elif payload["type"] == "section_chunk":
+                assert payload["task_id"] not in done, "chunk after section_done"
+                first_chunk = first_chunk or time.monotonic() - start
+                chunks.setdefault(payload["task_id"], []).append(payload["text"])
+            elif payload["type"] == "section_done":
+                done[payload["task_id"]] = payload["text"]
+        assert sorted(done) == [1, 2, 3, 4], sorted(done)
+        for task_id, text in done.items():
+            assert "".join(chunks[task_id]).strip() == text
+        assert dict(final["sections"]) == done
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        print(f"  [PASS] streamed chunks ordered and complete for 4 sections (first chunk after {first_chunk * 1000:.0f}ms)")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] section streaming: {e}")
+        failed += 1
+
+# --- Checkpoint + resume (fake LLM, temp SQLite) ---
+print("\n--- Checkpoint and resume (fake LLM) ---")
+def run_checkpoint_resume_test():
+    global passed, failed
+    try:
+        import tempfile
+        from langgraph.graph import StateGraph, START, END
+        from services import llm_gateway, section_store
+        from benchmarks.fakes import FakeChatModel
+        import nodes.orches_node as orches_node
+        import nodes.Worker_node as Worker_node
+        from state.State import Blog_State
+        from state import run_context
+        from Graph.graph import make_checkpointer, new_run_config, prepare_resume
+
+        class Flaky(FakeChatModel):
+            fail, written = True, []
+            def stream(self, messages, **kwargs):
+                title = [l for l in messages[-1].content.splitlines() if l.startswith("Section title:")][0]
+                if self.fail and title.endswith(" 3"):
+                    raise RuntimeError("worker 3 crashed")
+                self.written.append(title.split(": ")[1])
+                yield from super().stream(messages)
+
+        fake = Flaky(words=5, num_tasks=4)
+        llm_gateway.set_client_factory(lambda model: fake)
+        llm_gateway.configure_rate_limits(1e9, 1e9)
+        llm_gateway.configure_cache(enabled=False)
+        section_store.configure_section_store(enabled=False)
+        with tempfile.TemporaryDirectory() as tmp:
+            g = StateGraph(Blog_State)
+            g.add_node("orchestrator", orches_node.orchestrator_node)
+            g.add_node("worker", Worker_node.worker_node)
+            g.add_edge(START, "orchestrator")
+            g.add_conditional_edges("orchestrator", orches_node.fanout, ["worker"])
+            g.add_edge("worker", END)
+            saver = make_checkpointer(os.path.join(tmp, "checkpoints.sqlite"))
+            graph = g.compile(checkpointer=saver)
+            state = {"topic": "resume", "mode": "closed_book", "as_of": "2026-01-01", "recency_days": 3650,
+                     "evidence": [], "plan": None, "sections": []}
+            config = new_run_config()
+            try:
+                graph.invoke(state, config)
+                raise AssertionError("expected the first run to fail")
+            except RuntimeError:
+                pass
+            assert sorted(fake.written) == ["Section 1", "Section 2", "Section 4"], fake.written
+            # Fresh process: no run contexts in memory
+            run_context._contexts.clear()
+            fake.fail, fake.written[:] = False, []
+            out = graph.invoke(None, prepare_resume(config["configurable"]["thread_id"], graph=graph))
+            assert fake.written == ["Section 3"], fake.written
+            assert sorted(dict(out["sections"])) == [1, 2, 3, 4]
+            saver.conn.close()
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        print("  [PASS] resume re-runs only the failed worker")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] checkpoint resume: {e}")
+        failed += 1
+
+# --- Rate limiter (local fake OpenAI server returning 429s) ---
+print("\n--- LLM rate limiter (fake 429 server) ---")
+def run_rate_limiter_test():
+    global passed, failed
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        from langchain_core.messages import HumanMessage
+        from langchain_openai import ChatOpenAI
+        from services import llm_gateway, section_store
+        from benchmarks.fakes import FakeOpenAIServer
+        llm_gateway.configure_cache(enabled=False)
+        section_store.configure_section_store(enabled=False)
+        results = {}
+        # The 2x run needs enough calls that its first burst of 429s does not dominate the ratio
+        for name, rpm_factor, calls in (("at limit", 1.0, 60), ("2x limit", 2.0, 120)):
+            with FakeOpenAIServer(requests_per_second=40, burst=10, latency=0.02) as server:
+                llm_gateway.set_client_factory(lambda model: ChatOpenAI(
+                    model=model, base_url=server.base_url, api_key="fake", max_retries=0, timeout=10))
+                llm_gateway.configure_rate_limits(40 * 60 * rpm_factor, 1e9, max_concurrency=16,
+                                                  max_retries=10, base_delay=0.1, burst_seconds=0.25)
+                llm = llm_gateway.get_llm()
+                with ThreadPoolExecutor(max_workers=16) as pool:
+                    replies = list(pool.map(lambda i: llm.invoke([HumanMessage(content=f"call {i}")]).content, range(calls)))
+                assert len(replies) == calls and all(replies)
+                results[name] = (server.throttled, llm_gateway.concurrency_stats())
+        throttled, _ = results["at limit"]
+        assert throttled <= 6, f"{throttled} 429s at the provider's limit"
+        throttled_2x, stats_2x = results["2x limit"]
+        assert stats_2x["throttled"] == throttled_2x > 0 and stats_2x["failed"] == 0, stats_2x
+        # The rate recovers once the 429s stop, so check that it was cut rather than where it ended up
+        assert stats_2x["rate_cuts"] >= 1, "request rate never backed off"
+        # Learning the real limit must not turn into a retry storm
+        assert throttled_2x < 120 * 0.2, f"{throttled_2x} 429s for 120 calls configured at 2x"
+        # Connection errors and 5xx are retried without touching the rate; other errors are not retried
+        from services.rate_limiter import RateLimiter
+        limiter = RateLimiter(60, 1e9, 4, sleep=lambda seconds: None)
+        outcomes = iter([ConnectionError("reset"), type("InternalServerError", (Exception,), {"status_code": 503})(), "ok"])
+        def flaky():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        assert limiter.call(flaky, 10) == "ok"
+        stats = limiter.stats()
+        assert stats["transient_errors"] == 2 and stats["retries"] == 2 and stats["throttled"] == 0, stats
+        assert stats["requests_per_minute"] == 60 and stats["failed"] == 0, stats
+        try:
+            limiter.call(lambda: {}["missing"], 10)
+            raise AssertionError("KeyError swallowed")
+        except KeyError:
+            assert limiter.stats()["retries"] == 2
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        print(f"  [PASS] all calls succeeded; 429s: {throttled} at limit, {throttled_2x} when configured 2x "
+              f"({stats_2x['rate_cuts']} rate cut(s)); connection errors and 5xx retried")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] rate limiter: {e}")
+        failed += 1
+
+# --- Batch runner (fake LLM, temp output dirs) ---
+print("\n--- Batch runner (fake LLM) ---")
+def run_batch_test():
+    global passed, failed
+    try:
+        import json, tempfile, threading, time, uuid
+        from pathlib import Path
+        from langgraph.graph import StateGraph, START, END
+        from services import llm_gateway, section_store
+        from benchmarks.fakes import FakeChatModel, fake_plan
+        from Schemas.plan_schema import Plan
+        import nodes.orches_node as orches_node
+        import nodes.Worker_node as Worker_node
+        from nodes.merging_node import merge_content
+        from nodes.image_generation_node import generate_and_place_images
+        from state.State import Blog_State
+        import batch_run
+
+        def plan(messages):
+            # One topic's planning call hangs well past the run timeout
+            if "stuck topic" in messages[-1].content:
+                time.sleep(2.5)
+            return fake_plan(3)
+        fake = FakeChatModel(latency=0.05, words=20, structured={Plan: plan})
+        llm_gateway.set_client_factory(lambda model: fake)
+        llm_gateway.configure_cache(enabled=False)
+        section_store.configure_section_store(enabled=False)
+        llm_gateway.configure_rate_limits(1e9, 1e9, max_concurrency=2)
+        g = StateGraph(Blog_State)
+        g.add_node("orchestrator", orches_node.orchestrator_node)
+        g.add_node("worker", Worker_node.worker_node)
+        g.add_node("merge_content", merge_content)
+        g.add_node("generate_and_place_images", generate_and_place_images)
+        g.add_edge(START, "orchestrator")
+        g.add_conditional_edges("orchestrator", orches_node.fanout, ["worker"])
+        g.add_edge("worker", "merge_content")
+        g.add_edge("merge_content", "generate_and_place_images")
+        g.add_edge("generate_and_place_images", END)
+        graph = g.compile()
+        jobs = [{"topic": "stuck topic"}] + [{"topic": f"topic {i}"} for i in range(4)]
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.monotonic()
+            batch_run.run_batch(jobs, tmp, runs=2, run_timeout=0.8, graph=graph,
+                                new_config=lambda: {"configurable": {"thread_id": uuid.uuid4().hex}})
+            elapsed = time.monotonic() - start
+            for t in threading.enumerate():
+                if t.name.startswith("blog-run-"):
+                    t.join()
+            manifest = [json.loads(l) for l in (Path(tmp) / "manifest.jsonl").read_text().splitlines()]
+            status = {r["topic"]: r["status"] for r in manifest}
+            assert status.pop("stuck topic") == "timeout", manifest
+            # The timed-out run was stopped after planning instead of writing its post in the background
+            stuck = next(r for r in manifest if r["status"] == "timeout")
+            assert not batch_run.artifacts(stuck["output_dir"], "markdown"), "timed-out run kept going"
+            assert not batch_run.stop_requested(stuck["thread_id"])
+            assert set(status.values()) == {"ok"} and len(status) == 4, status
+            # The stuck run only held one slot: the other four finished alongside it
+            assert elapsed < 2.0, f"queue stalled ({elapsed:.2f}s)"
+            md_paths = {r["md_path"] for r in manifest if r["status"] == "ok"}
+            assert len(md_paths) == 4 and all(Path(p).exists() for p in md_paths)
+            assert all("merge_content" in r["node_finished_s"] for r in manifest if r["status"] == "ok")
+        peak = llm_gateway.concurrency_stats()["peak_in_flight"]
+        assert peak <= 2, f"LLM budget exceeded: {peak} in flight"
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        print(f"  [PASS] 5 runs in {elapsed:.2f}s, stuck run timed out without stalling, peak {peak} LLM calls in flight")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] batch runner: {e}")
+        failed += 1
+
+# --- Speculative planning (hybrid mode) ---
+print("\n--- Speculative planning ---")
+def run_speculative_plan_test():
+    global passed, failed
+    try:
+        import argparse, tempfile, uuid
+        from Graph.graph import g
+        from services import llm_gateway, section_store, tracing
+        from benchmarks import bench_end_to_end as bench
+        from benchmarks.fakes import FakeChatModel, fake_plan
+        from Schemas.evidence_schema import EvidenceItem
+        from Schemas.plan_schema import PlanPatch
+        from Schemas.task_schema import Task
+        from nodes.orches_node import reconcile_plan
+        import nodes.Route_Node as Route_Node
+
+        # Opt-in: draft runs alongside research; the orchestrator only reviews flagged tasks
+        assert not Route_Node.SPECULATIVE_PLANNING or os.getenv("BLOG_SPECULATIVE_PLAN") == "1"
+        args = argparse.Namespace(mode="hybrid", sections=4, research_every=2, words=20, llm_latency=0.2,
+                                  token_latency=0.0, search_latency=0.3, queries=2, images=0, sd_step_seconds=0.0)
+        restore = bench.install_fakes(args)
+        speculative, Route_Node.SPECULATIVE_PLANNING = Route_Node.SPECULATIVE_PLANNING, True
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                tracing.configure_tracing("jsonl", os.path.join(tmp, "traces.jsonl"))
+                run_id = uuid.uuid4().hex
+                out = g.compile().invoke({"topic": "speculative", "as_of": "2026-01-01", "sections": [], "output_dir": tmp},
+                                         {"configurable": {"thread_id": run_id}})
+                spans = {s["name"]: s for s in tracing.run_spans(run_id)}
+        finally:
+            Route_Node.SPECULATIVE_PLANNING = speculative
+            restore()
+            tracing.configure_tracing(tracing.TRACE_MODE)
+        draft, research = spans["draft_planner"], spans["research"]
+        assert draft["start_time_unix_nano"] < research["end_time_unix_nano"], "draft did not overlap research"
+        assert spans["orchestrator"]["attributes"]["blog.llm_calls"] == 1  # one PlanPatch review, no full re-plan
+        assert [t.id for t in out["plan"].tasks] == [1, 2, 3, 4] and out["final"].count("## Section") == 4
+
+        # Only flagged tasks are replaced; a patch touching other ids is ignored
+        patched = Task(id=2, title="Section 2 (2026)", goal="Fresh.", bullets=["a", "b", "c"], target_words=200,
+                       requires_research=True, requires_citations=True)
+        stray = Task(id=1, title="Rewritten", goal="No.", bullets=["a", "b", "c"], target_words=200)
+        fake = FakeChatModel(structured={PlanPatch: lambda m: PlanPatch(accept=False, tasks=[patched, stray])})
+        llm_gateway.set_client_factory(lambda model: fake)
+        llm_gateway.configure_rate_limits(1e9, 1e9)
+        llm_gateway.configure_cache(enabled=False)
+        section_store.configure_section_store(enabled=False)
+        evidence = [EvidenceItem(title="Release notes", url="https://example.com/r")]
+        plan = reconcile_plan({"topic": "t", "evidence": evidence}, fake_plan(4, research_every=2))
+        assert [t.title for t in plan.tasks] == ["Section 1", "Section 2 (2026)", "Section 3", "Section 4"]
+        calls = fake.calls
+        reconcile_plan({"topic": "t", "evidence": evidence}, fake_plan(4))
+        assert fake.calls == calls, "draft without research tasks should not need a review call"
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        overlap = (research["end_time_unix_nano"] - draft["start_time_unix_nano"]) / 1e9
+        print(f"  [PASS] draft overlapped research by {overlap:.2f}s, only flagged tasks patched")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] speculative planning: {e}")
+        failed += 1
+
+# --- Incremental regeneration (section store) ---
+print("\n--- Incremental regeneration ---")
+def run_section_store_test():
+    global passed, failed
+    try:
+        import argparse, tempfile
+        from Graph.graph import g
+        from services import llm_gateway, section_store
+        from benchmarks import bench_end_to_end as bench
+        from benchmarks.fakes import FakeChatModel, fake_plan
+        from Schemas.plan_schema import Plan
+
+        args = argparse.Namespace(mode="closed_book", sections=9, research_every=0, words=20, llm_latency=0.0,
+                                  token_latency=0.0, search_latency=0.0, queries=0, images=0, sd_step_seconds=0.0)
+        plans = [fake_plan(9)]
+        fake = FakeChatModel(words=20, num_tasks=9, structured={Plan: lambda m: plans[-1]})
+        restore = bench.install_fakes(args)
+        llm_gateway.set_client_factory(lambda model: fake)
+        written = []
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                section_store.configure_section_store(enabled=True, path=os.path.join(tmp, "sections.sqlite"))
+                graph = g.compile()
+
+                def regenerate():
+                    calls = fake.calls
+                    out = graph.invoke({"topic": "incremental", "as_of": "2026-01-01", "sections": [],
+                                        "output_dir": tmp})
+                    # router + orchestrator + decide_images, the rest are workers
+                    written.append(fake.calls - calls - 3)
+                    return out
+
+                regenerate()
+                edited = fake_plan(9)
+                edited.tasks[2].bullets = ["a sharper point", "b", "c"]
+                plans.append(edited)
+                out = regenerate()
+                regenerate()
+        finally:
+            restore()
+            section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        assert written == [9, 1, 0], written
+        assert out["final"].count("## Section") == 9
+        print(f"  [PASS] sections written per run: {written} (one task edited, then unchanged)")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] incremental regeneration: {e}")
+        failed += 1
+
+# --- Run-scoped output (fakes, temp dirs) ---
+print("\n--- Run-scoped output directories ---")
+def run_output_dirs_test():
+    global passed, failed
+    try:
+        import argparse, tempfile, uuid
+        from concurrent.futures import ThreadPoolExecutor
+        from Graph.graph import g
+        from services import run_output
+        from benchmarks import bench_end_to_end as bench
+
+        args = argparse.Namespace(mode="closed_book", sections=3, research_every=0, words=20, llm_latency=0.0,
+                                  token_latency=0.0, search_latency=0.0, queries=0, images=2, sd_step_seconds=0.0)
+        restore = bench.install_fakes(args)
+        saved_root = run_output.OUTPUT_ROOT
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                run_output.OUTPUT_ROOT = tmp
+                graph = g.compile()
+                ids = [uuid.uuid4().hex for _ in range(3)]
+                # No output_dir in state: each run writes under <output root>/<thread id>
+                with ThreadPoolExecutor(3) as pool:
+                    list(pool.map(lambda t: graph.invoke({"topic": "same topic", "as_of": "2026-01-01", "sections": []},
+                                                         {"configurable": {"thread_id": t}}), ids))
+                kinds = []
+                for t in ids:
+                    run_dir = run_output.run_output_dir(t)
+                    manifest = run_output.load_manifest(run_dir)
+                    kinds.append(sorted(a["kind"] for a in manifest["artifacts"]))
+                    assert all((run_dir / a["path"]).exists() for a in manifest["artifacts"])
+                    assert not list(run_dir.rglob("*.tmp"))
+                assert sorted(os.listdir(tmp)) == sorted(ids)
+        finally:
+            restore()
+            run_output.OUTPUT_ROOT = saved_root
+        assert kinds == [["image", "image", "markdown"]] * 3, kinds
+        print("  [PASS] 3 concurrent runs, each with its own directory and manifest")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] run output dirs: {e}")
+        failed += 1
+
+# --- Background jobs (fakes, temp checkpoints and output) ---
+print("\n--- Background job manager ---")
+def run_job_manager_test():
+    global passed, failed
+    try:
+        import argparse, tempfile
+        from Graph.graph import g, make_checkpointer, new_run_config, prepare_resume
+        from services.job_manager import JobManager
+        from benchmarks import bench_end_to_end as bench
+
+        args = argparse.Namespace(mode="closed_book", sections=3, research_every=0, words=40, llm_latency=0.0,
+                                  token_latency=0.01, search_latency=0.0, queries=0, images=1, sd_step_seconds=0.0)
+        restore = bench.install_fakes(args)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                saver = make_checkpointer(os.path.join(tmp, "checkpoints.sqlite"))
+                graph = g.compile(checkpointer=saver)
+                manager = JobManager(max_jobs=2, graph=graph, new_config=new_run_config,
+                                     prepare_resume=prepare_resume, output_root=tmp)
+                a = manager.submit("job a", "2026-01-01")
+                b = manager.submit("job b", "2026-01-01")
+                c = manager.submit("job c", "2026-01-01")
+                # Two slots: the third job waits, and can be cancelled before it starts
+                assert c.status == "queued", c.status
+                assert manager.cancel(c.id) and c.status == "cancelled"
+                # Stop a once its first section is streaming
+                seq = 0
+                while not any(e["type"] == "section_chunk" for e in a.events_since(0)):
+                    assert a.events_since(seq, timeout=5), "no events from job a"
+                    seq = len(a.events_since(0))
+                assert manager.cancel(a.id)
+                assert a.wait(10) and b.wait(10), (a.status, b.status)
+                assert a.status == "cancelled" and b.status == "done", (a.status, b.error)
+                # Both ran at the same time
+                assert a.started_at < b.finished_at and b.started_at < a.finished_at
+                snap = b.snapshot()
+                assert snap["sections_done"] == snap["sections_total"] == 3, snap
+                assert b.final.count("## Section") == 3 and not manager.cancel(b.id)
+                assert [e["seq"] for e in b.events_since(0)] == list(range(1, snap["events"] + 1))
+                # The cancelled run picks up from its checkpoint
+                resumed = manager.resume(a.id)
+                assert resumed.wait(10) and resumed.status == "done", (resumed.status, resumed.error)
+                assert resumed.final and resumed.output_dir == a.output_dir
+                assert [j.id for j in manager.list()][:1] == [a.id] and manager.get(c.id) is c
+                manager.shutdown()
+                saver.conn.close()
+        finally:
+            restore()
+        print(f"  [PASS] 2 concurrent jobs, queued and running jobs cancelled, cancelled job resumed "
+              f"({snap['events']} events)")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] job manager: {e}")
+        failed += 1
+
+# --- HTTP API (fakes, in-process client) ---
+print("\n--- HTTP API ---")
+def run_api_server_test():
+    global passed, failed
+    try:
+        import fastapi  # noqa: F401
+    except ImportError:
+        print("  [SKIP] fastapi not installed - skipping API tests (pip install fastapi uvicorn)")
+        return
+    try:
+        import argparse, tempfile, time
+        from fastapi.testclient import TestClient
+        from Graph.graph import g, make_checkpointer
+        from api_server import create_app
+        from services.job_manager import JobManager
+        from benchmarks import bench_end_to_end as bench
+
+        args = argparse.Namespace(mode="closed_book", sections=3, research_every=0, words=20, llm_latency=0.0,
+                                  token_latency=0.0, search_latency=0.0, queries=0, images=1, sd_step_seconds=0.0)
+        restore = bench.install_fakes(args)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                saver = make_checkpointer(os.path.join(tmp, "checkpoints.sqlite"))
+                manager = JobManager(max_jobs=2, graph=g.compile(checkpointer=saver), output_root=tmp)
+                client = TestClient(create_app(manager, warm=False))
+                assert client.post("/runs", json={"topic": "  "}).status_code == 422
+                resp = client.post("/runs", json={"topic": "api topic", "as_of": "2026-01-01"})
+                assert resp.status_code == 202, resp.text
+                run_id = resp.json()["id"]
+                deadline = time.time() + 10
+                while client.get(f"/runs/{run_id}").json()["status"] not in ("done", "error", "cancelled"):
+                    assert time.time() < deadline, "run did not finish"
+                    time.sleep(0.05)
+                run = client.get(f"/runs/{run_id}").json()
+                assert run["status"] == "done" and run["markdown"].count("## Section") == 3, run
+                assert run["pending_images"] == 0, run
+                assert client.post(f"/runs/{run_id}/cancel").status_code == 409
+                # The event stream replays the finished run and ends; Last-Event-ID skips what was seen
+                body = client.get(f"/runs/{run_id}/events").text
+                ids = [int(line[4:]) for line in body.splitlines() if line.startswith("id: ")]
+                assert ids == list(range(1, len(ids) + 1)) and "event: section_done" in body
+                assert body.rstrip().endswith('"status": "done"}'), body[-200:]
+                tail = client.get(f"/runs/{run_id}/events", headers={"Last-Event-ID": str(len(ids) - 1)}).text
+                assert tail.count("event: ") == 1
+                manifest = client.get(f"/runs/{run_id}/artifacts").json()
+                image = next(a for a in manifest["artifacts"] if a["kind"] == "image")
+                resp = client.get(f"/runs/{run_id}/artifacts/{image['path']}")
+                assert resp.status_code == 200 and resp.headers["content-type"] == "image/png"
+                assert len(resp.content) == image["bytes"]
+                # Only files listed in the manifest are served
+                assert client.get(f"/runs/{run_id}/artifacts/manifest.json").status_code == 404
+                assert client.get(f"/runs/{run_id}/artifacts/../checkpoints.sqlite").status_code == 404
+                assert client.get("/runs/nope").status_code == 404
+                manager.shutdown()
+                saver.conn.close()
+        finally:
+            restore()
+        print(f"  [PASS] POST/GET run, {len(ids)} SSE events, image download, 404/409/422 cases")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] API: {e}")
+        failed += 1
+
+# --- Tracing spans (fake LLM, temp trace file) ---
+print("\n--- Per-node tracing ---")
+def run_tracing_test():
+    global passed, failed
+    try:
+        import json, tempfile, uuid
+        from langgraph.graph import StateGraph, START, END
+        from services import llm_gateway, section_store, tracing
+        from benchmarks.fakes import FakeChatModel
+        import nodes.orches_node as orches_node
+        import nodes.Worker_node as Worker_node
+        from state.State import Blog_State
+        with tempfile.TemporaryDirectory() as tmp:
+            trace_path = os.path.join(tmp, "traces.jsonl")
+            tracing.configure_tracing("jsonl", trace_path)
+            llm_gateway.set_client_factory(lambda model: FakeChatModel(latency=0.05, words=40, num_tasks=3))
+            llm_gateway.configure_rate_limits(1e9, 1e9)
+            llm_gateway.configure_cache(enabled=True, path=os.path.join(tmp, "llm.sqlite"))
+            section_store.configure_section_store(enabled=False)
+            g = StateGraph(Blog_State)
+            g.add_node("orchestrator", tracing.traced("orchestrator", orches_node.orchestrator_node))
+            g.add_node("worker", tracing.traced("worker", Worker_node.worker_node))
+            g.add_edge(START, "orchestrator")
+            g.add_conditional_edges("orchestrator", orches_node.fanout, ["worker"])
+            g.add_edge("worker", END)
+            graph = g.compile()
+            state = {"topic": "tracing", "mode": "closed_book", "as_of": "2026-01-01", "recency_days": 3650,
+                     "evidence": [], "plan": None, "sections": []}
+            runs = []
+            for _ in range(2):  # second run is served from the LLM cache
+                run_id = uuid.uuid4().hex
+                graph.invoke(state, {"configurable": {"thread_id": run_id}, "max_concurrency": 1})
+                runs.append(tracing.summarize_run(run_id))
+            first, second = runs
+            workers = first["stages"]["worker"]
+            assert workers["spans"] == 3 and workers["llm_calls"] == 3, workers
+            assert workers["llm_prompt_tokens"] > 0 and workers["llm_completion_tokens"] > 0
+            # max_concurrency=1: the later workers waited for a slot
+            assert workers["queue_wait_s"] >= 0.05, workers
+            assert second["total"]["llm_cache_hits"] == 4 and second["total"]["llm_calls"] == 0, second["total"]
+            spans = [json.loads(line) for line in open(trace_path, encoding="utf-8")]
+            assert len(spans) == 8 and all(len(s["trace_id"]) == 32 and s["end_time_unix_nano"] >= s["start_time_unix_nano"] for s in spans)
+            # A fresh process can rebuild the summary from the file
+            tracing._runs.clear()
+            assert tracing.summarize_run(run_id)["total"]["llm_cache_hits"] == 4
+            tracing.configure_tracing(tracing.TRACE_MODE)
+        llm_gateway.set_client_factory(None)
+        llm_gateway.configure_rate_limits()
+        llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+        section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+        print(f"  [PASS] 3 worker spans, {workers['queue_wait_s']:.2f}s queue wait, "
+              f"{int(workers['llm_prompt_tokens'] + workers['llm_completion_tokens'])} tokens; rerun all cache hits")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] tracing: {e}")
+        failed += 1
+
+# --- End-to-end benchmark suite (all backends faked) ---
+print("\n--- End-to-end benchmark suite (offline) ---")
+def run_benchmark_suite_test():
+    global passed, failed
+    try:
+        import argparse, copy
+        from Graph.graph import g
+        from benchmarks import bench_end_to_end as bench
+        args = argparse.Namespace(mode="hybrid", sections=3, research_every=2, words=30, llm_latency=0.0, token_latency=0.0,
+                                  search_latency=0.0, queries=2, images=1, sd_step_seconds=0.0, runs=2,
+                                  concurrency=[2], verbose=False)
+        report = bench.run_suite(args, graph=g.compile())
+        level = report["levels"]["2"]
+        assert level["runs"] == 2 and level["p95_s"] >= level["p50_s"] > 0 and level["peak_rss_mb"] > 0
+        assert {"router", "research", "orchestrator", "worker", "generate_and_place_images"} <= set(level["nodes_p50_s"])
+        assert bench.compare(report, report) == []
+        faster = copy.deepcopy(report)
+        faster["levels"]["2"]["p50_s"] = level["p50_s"] / 2 - 0.1
+        faster["levels"]["2"]["throughput_rpm"] = level["throughput_rpm"] * 2
+        flagged = bench.compare(report, faster)
+        assert any("p50_s" in f for f in flagged) and any("throughput" in f for f in flagged), flagged
+        print(f"  [PASS] full graph on fakes: p50 {level['p50_s']:.2f}s, {len(level['nodes_p50_s'])} nodes timed, regressions flagged")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] benchmark suite: {e}")
+        failed += 1
+
+# --- Image generation service (fake pipeline, no model download) ---
+print("\n--- Image generation service (fake pipeline) ---")
+def run_image_service_test():
+    global passed, failed
+    cwd = os.getcwd()
+    try:
+        import tempfile
+        import time
+        import nodes.image_generation_node as ign
+        from benchmarks.fakes import FakeDiffusionPipeline
+        from services import image_store
+        ign._pipeline = FakeDiffusionPipeline(step_seconds=0.02)
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            image_store.configure_image_store(enabled=True, path=os.path.join(tmp, "store"))
+            # Cancellation stops the job at the next step callback
+            job = ign._service.submit("cancel me", 64, 64)
+            time.sleep(0.1)
+            job.cancel()
+            assert job.wait(30) and isinstance(job.error, ign._JobCancelled)
+            # Slow image: post is finalized with a pending block, filled in later
+            ign.IMAGE_WAIT_SECONDS = 0.05
+            spec = {"placeholders": "[[IMAGE_1]]", "filename": "a.png", "alt": "A", "caption": "Cap", "prompt": "p", "size": "1024*1024"}
+            state = {"plan": type("Plan", (), {"blog_title": "Img Test"})(), "merged_md": "# T\n\n[[IMAGE_1]]\n",
+                     "md_with_placeholders": "# T\n\n[[IMAGE_1]]\n", "image_specs": [spec]}
+            out = ign.generate_and_place_images(state)
+            assert "image-pending:a.png" in out["final"]
+            deadline = time.time() + 30
+            while "images/a.png" not in open("img_test.md").read() and time.time() < deadline:
+                time.sleep(0.05)
+            text = open("img_test.md").read()
+            assert "![A](images/a.png)" in text and "image-pending" not in text, text
+            # Graph state keeps the placeholder; readers get the filled post from the manifest
+            from services.run_output import read_post
+            deadline = time.time() + 30
+            while read_post(".")[1] and time.time() < deadline:
+                time.sleep(0.05)
+            assert read_post(".") == (text, 0) and "image-pending" in out["final"]
+            os.chdir(cwd)
+        image_store.configure_image_store(enabled=image_store.STORE_ENABLED)
+        ign._pipeline = None
+        ign.IMAGE_WAIT_SECONDS = 10
+        print("  [PASS] step-callback cancellation, late placeholder fill, filled post via the manifest")
+        passed += 1
+    except Exception as e:
+        os.chdir(cwd)
+        print(f"  [FAIL] image service: {e}")
+        failed += 1
+
+# --- Image batching (fake pipeline) ---
+print("\n--- Image batching (fake pipeline) ---")
+def run_image_batching_test():
+    global passed, failed
+    import nodes.image_generation_node as ign
+    from benchmarks.fakes import FakeDiffusionPipeline
+    try:
+        # Batches group by resolution in submission order and respect the size cap
+        jobs = [ign.ImageJob(f"p{i}", *size) for i, size in enumerate([(64, 64), (32, 48), (64, 64), (64, 64), (64, 64)])]
+        plan = ign._plan_batches(jobs, max_batch_size=3)
+        assert [[j.prompt for j in b] for b in plan] == [["p0", "p2", "p3"], ["p4"], ["p1"]], plan
+
+        requests = [("lighthouse", 64, 64, 11), ("harbour", 64, 64, 12), ("lighthouse", 32, 48, 11)]
+
+        def generate(max_batch_size):
+            fake = FakeDiffusionPipeline()
+            ign._pipeline = fake
+            service = ign.ImageGenerationService(max_batch_size=max_batch_size)
+            jobs = service.submit_many(requests)
+            assert all(job.wait(30) for job in jobs) and not any(job.error for job in jobs)
+            service.drain(30)
+            return fake.batches, [job.result for job in jobs]
+
+        # Two sizes -> two pipeline calls; a cap of 1 -> one call per image
+        batched, batched_images = generate(4)
+        assert sorted(batched) == [(32, 48, 1), (64, 64, 2)], batched
+        single, single_images = generate(1)
+        assert len(single) == 3, single
+        # Each spec's seed gives the same image however the jobs were batched
+        assert batched_images == single_images
+        assert batched_images[0] != batched_images[1]
+        print("  [PASS] 2 sizes -> 2 pipeline calls, batch cap honoured, seeds reproduce across batchings")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] image batching: {e}")
+        failed += 1
+    finally:
+        ign._pipeline = None
+
+# --- Diffusion engine profiles (tiny real pipeline) ---
+print("\n--- Diffusion engine profiles (tiny pipeline) ---")
+def run_engine_profile_test():
+    global passed, failed
+    try:
+        import diffusers  # noqa: F401
+        import transformers  # noqa: F401
+    except ImportError:
+        print("  [SKIP] engine profiles: needs diffusers and transformers")
+        return
+    import nodes.image_generation_node as ign
+    from benchmarks.fakes import tiny_sd_pipeline
+    previous = ign.get_engine_profile()
+    env = {k: os.environ.get(k) for k in ("BLOG_SD_PROFILE", "BLOG_SD_COMPILE")}
+    try:
+        # BLOG_SD_COMPILE turns torch.compile on for any profile
+        os.environ.update(BLOG_SD_PROFILE="fast", BLOG_SD_COMPILE="1")
+        assert ign._profile_from_env() == ign.PROFILES["fast"].model_copy(update={"compile": True})
+        assert ign.PROFILES["compiled"].compile
+
+        compiled = ign._apply_profile(tiny_sd_pipeline(), ign.PROFILES["compiled"])
+        assert type(compiled.unet).__name__ == "OptimizedModule", type(compiled.unet)
+
+        profile = ign.set_engine_profile("balanced")
+        ign._pipeline = ign._apply_profile(tiny_sd_pipeline(), profile)
+        assert type(ign._pipeline.scheduler).__name__ == "DPMSolverMultistepScheduler"
+        assert ign._pipeline.scheduler.config.algorithm_type == "dpmsolver++"
+        before = ign.engine_stats().get("balanced", {}).get("images", 0)
+        steps = []
+        service = ign.ImageGenerationService(max_batch_size=2)
+        scheduler_step = ign._pipeline.scheduler.step
+        ign._pipeline.scheduler.step = lambda *a, **kw: steps.append(1) or scheduler_step(*a, **kw)
+        jobs = service.submit_many([("a diagram", 32, 32, 1), ("another diagram", 32, 32, 2)])
+        assert all(job.wait(120) for job in jobs) and not any(job.error for job in jobs), [j.error for j in jobs]
+        service.drain(30)
+        # One batched call runs the profile's step count
+        assert len(steps) == profile.steps, len(steps)
+        stats = ign.engine_stats()["balanced"]
+        assert stats["images"] == before + 2 and stats["seconds_per_image"] > 0, stats
+        print(f"  [PASS] BLOG_SD_COMPILE override, compiled UNet, dpm++ scheduler with {profile.steps} steps, engine_stats")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] engine profiles: {e}")
+        failed += 1
+    finally:
+        for k, v in env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        ign.set_engine_profile(previous)
+
+# --- Image store (fake pipeline, temp dirs) ---
+print("\n--- Image store (content-addressed) ---")
+def run_image_store_test():
+    global passed, failed
+    try:
+        import tempfile
+        import nodes.image_generation_node as ign
+        from benchmarks.fakes import FakeDiffusionPipeline
+        from services import image_store
+        fake = FakeDiffusionPipeline()
+        ign._pipeline = fake
+        with tempfile.TemporaryDirectory() as tmp:
+            image_store.configure_image_store(enabled=True, path=os.path.join(tmp, "store"))
+
+            def post(name, specs):
+                specs = [{"placeholders": f"[[IMAGE_{i}]]", "alt": "A", "caption": "C", "size": "64*64", **spec}
+                         for i, spec in enumerate(specs, 1)]
+                md = "# T\n\n" + "\n\n".join(s["placeholders"] for s in specs) + "\n"
+                state = {"plan": type("Plan", (), {"blog_title": name})(), "merged_md": md,
+                         "md_with_placeholders": md, "image_specs": specs, "output_dir": os.path.join(tmp, name)}
+                ign.generate_and_place_images(state)
+                return os.path.join(tmp, name, "images")
+
+            # Same prompt under two names in one post, then again in another post under a third name
+            first = post("one", [{"filename": "a.png", "prompt": "cache diagram"},
+                                 {"filename": "b.png", "prompt": "cache diagram"}])
+            second = post("two", [{"filename": "flow.png", "prompt": "cache diagram"}])
+            assert fake.calls == 1, fake.calls
+            blob = image_store.get_image_store().blob_path(
+                ign._store_key({"prompt": "cache diagram"}, 64, 64, ign._spec_seed({"prompt": "cache diagram", "size": "64*64"})))
+            assert os.path.samefile(os.path.join(second, "flow.png"), blob)
+            # An old filename with a new prompt is regenerated, not served stale
+            third = post("two", [{"filename": "flow.png", "prompt": "a much longer and different prompt"}])
+            assert fake.calls == 2
+            assert open(os.path.join(third, "flow.png"), "rb").read() != open(os.path.join(first, "a.png"), "rb").read()
+            stats = image_store.get_image_store().stats()
+            assert stats["hits"] == 1 and stats["misses"] == 2 and stats["entries"] == 2, stats
+
+            # LRU eviction removes blobs; posts keep their hardlinked copies
+            store = image_store.ImageStore(os.path.join(tmp, "small"), max_entries=2)
+            for i in range(3):
+                store.put(f"{i:064x}", b"x" * 10)
+                store.link(f"{i:064x}", os.path.join(tmp, "post", f"{i}.png"))
+            assert store.lookup(f"{0:064x}") is None and store.lookup(f"{2:064x}") is not None
+            assert open(os.path.join(tmp, "post", "0.png"), "rb").read() == b"x" * 10
+        image_store.configure_image_store(enabled=image_store.STORE_ENABLED)
+        ign._pipeline = None
+        print("  [PASS] 3 uses of one prompt -> 1 generation; renamed prompt regenerated; LRU keeps post links")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] image store: {e}")
+        failed += 1
+
+# --- Warm-up and health checks (fake LLM, temp caches) ---
+print("\n--- Warm-up and health checks ---")
+def run_warmup_health_test():
+    global passed, failed
+    try:
+        import tempfile
+        from services import image_store, llm_gateway, search_cache, section_store
+        from services.warmup import health, warm_up
+        from benchmarks.fakes import FakeChatModel
+        with tempfile.TemporaryDirectory() as tmp:
+            llm_gateway.set_client_factory(lambda model: FakeChatModel())
+            llm_gateway.configure_cache(enabled=True, path=os.path.join(tmp, "llm.sqlite"))
+            search_cache.configure_search_cache(enabled=True, path=os.path.join(tmp, "search.sqlite"))
+            section_store.configure_section_store(enabled=False)
+            image_store.configure_image_store(enabled=True, path=os.path.join(tmp, "images"))
+            timings = warm_up()
+            # The client is built once and then reused by every caller
+            client = llm_gateway.get_client(llm_gateway.DEFAULT_MODEL)
+            warm_up()
+            assert llm_gateway.get_client(llm_gateway.DEFAULT_MODEL) is client
+            report = health()
+            llm_gateway.set_client_factory(None)
+            llm_gateway.configure_cache(enabled=llm_gateway.CACHE_ENABLED)
+            search_cache.configure_search_cache(enabled=search_cache.CACHE_ENABLED)
+            section_store.configure_section_store(enabled=section_store.STORE_ENABLED)
+            image_store.configure_image_store(enabled=image_store.STORE_ENABLED)
+        assert set(timings) == {"graph", "llm_client", "caches"}, timings
+        assert set(report) == {"graph", "llm", "search", "caches", "image_pipeline"}
+        assert report["graph"]["ok"] and report["caches"]["ok"], report
+        assert "sections: off" in report["caches"]["detail"]
+        assert report["image_pipeline"]["detail"].startswith(("not loaded", "ready")), report["image_pipeline"]
+        print(f"  [PASS] warm-up ({sum(timings.values()):.2f}s), health of {len(report)} components")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] warm-up/health: {e}")
+        failed += 1
+
+# --- Graph import (no torch/diffusers at import time) ---
+print("\n--- Graph import (lazy heavy backends) ---")
+def run_graph_import_test():
+    global passed, failed
+    try:
+        import subprocess
+        code = (
+            "import sys; import Graph.graph as g; "
+            "assert 'worker' in g.app.get_graph().nodes; "
+            "heavy = [m for m in ('torch', 'diffusers') if m in sys.modules]; "
+            "assert not heavy, heavy"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, env={**os.environ, "BLOG_SD_WARMUP": "0"})
+        assert proc.returncode == 0, proc.stderr.strip().splitlines()[-1:]
+        print("  [PASS] Graph.graph imports without torch/diffusers")
+        passed += 1
+    except Exception as e:
+        print(f"  [FAIL] graph import: {e}")
+        failed += 1
+
 # --- Full pipeline (optional - needs OpenAI + optional Tavily API keys) ---
 # Set RUN_LIVE=1 to test Router + Orchestrator with real API
 print("\n--- Full run (Router + Orchestrator - needs OPENAI_API_KEY) ---")
@@ -158,7 +1276,7 @@ def run_full_test():
         import importlib.util
         spec = importlib.util.spec_from_file_location(
             "router_node",
-            os.path.join(os.path.dirname(__file__), "nodes", "Router_Node.py")
+            os.path.join(os.path.dirname(__file__), "nodes", "Route_Node.py")
         )
         mod = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(mod)
@@ -205,6 +1323,30 @@ if __name__ == "__main__":
     run_state_test()
     run_node_import_tests()
     run_merge_logic_test()
+    run_image_anchor_test()
+    run_fanout_test()
+    run_evidence_index_test()
+    run_evidence_pipeline_test()
+    run_search_stage_test()
+    run_search_cache_test()
+    run_llm_cache_test()
+    run_streaming_test()
+    run_checkpoint_resume_test()
+    run_rate_limiter_test()
+    run_batch_test()
+    run_speculative_plan_test()
+    run_section_store_test()
+    run_output_dirs_test()
+    run_job_manager_test()
+    run_api_server_test()
+    run_tracing_test()
+    run_benchmark_suite_test()
+    run_image_service_test()
+    run_image_batching_test()
+    run_engine_profile_test()
+    run_image_store_test()
+    run_warmup_health_test()
+    run_graph_import_test()
     run_full_test()
 
     print("\n" + "=" * 50)